@@ -0,0 +1,5 @@
+"""
+Benchmarks for the handlers, run against a local `discord_lumberjack.testing.FakeDiscord` server so that they need neither a network connection nor a bot.
+
+Run them from the root of the repository, for example `python -m benchmarks.throughput --help`.
+"""
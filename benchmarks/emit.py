@@ -0,0 +1,78 @@
+"""
+Measure how long logging a record through a `DiscordHandler` blocks the thread that logs it.
+
+The handler sends to a local fake Discord server that doesn't respond until the measurements are over, so that its sender thread spends the benchmark waiting rather than competing for the GIL. The results report, in nanoseconds per record:
+
+- handle: the cost of `handler.handle(record)` for a record that was already created, which is everything the handler adds.
+- logger: the cost of a call like `logger.info(...)` with the handler attached.
+- baseline: the cost of the same call with a handler that does nothing, for comparison.
+
+It also reports `handle` as a fraction of `baseline`, which depends less on the machine than the absolute numbers.
+
+On a single-vCPU Xeon VM with CPython 3.11, where an uncontended lock takes about 450 ns, `handle` measures 2.3-3.0 µs per record, `logger` 8.4-12.7 µs and `baseline` 5.9-10.1 µs. So the handler adds about a quarter of what the logging call costs anyway, and most of that is queuing the record under the queue's lock. That is well above the few hundred nanoseconds that were aimed for, so measure on your own hardware before relying on a figure.
+
+Run `python -m benchmarks.emit --help` for the options.
+"""
+
+import argparse
+import logging
+import timeit
+from typing import List, Optional
+from discord_lumberjack.handlers import DiscordWebhookHandler
+from discord_lumberjack.testing import FakeDiscord
+
+
+class _NullHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        pass
+
+
+def per_call(statement, number: int, repeat: int) -> float:
+    """Time a statement, returning the best time per call in nanoseconds."""
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1e9
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.emit",
+        description="Measure the cost of logging a record through a DiscordHandler.",
+    )
+    parser.add_argument("-n", "--number", type=int, default=10000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    with FakeDiscord(latency=3600, rate_limit=1000000) as discord:
+        handler = DiscordWebhookHandler(
+            discord.webhook_url(), flush_on_exit=False, max_batch_size=1000
+        )
+        logger = logging.Logger("benchmark.emit")
+        logger.addHandler(handler)
+        baseline_logger = logging.Logger("benchmark.baseline")
+        baseline_logger.addHandler(_NullHandler())
+        record = logger.makeRecord(
+            logger.name, logging.INFO, __file__, 1, "Hello %s", ("world",), None
+        )
+        results = {
+            "handle": per_call(
+                lambda: handler.handle(record), args.number, args.repeat
+            ),
+            "logger": per_call(
+                lambda: logger.info("Hello %s", "world"), args.number, args.repeat
+            ),
+            "baseline": per_call(
+                lambda: baseline_logger.info("Hello %s", "world"),
+                args.number,
+                args.repeat,
+            ),
+        }
+        discord.latency = 0
+        handler.flush()
+        handler.close()
+    for name, nanoseconds in results.items():
+        print(f"{name:<9} {nanoseconds:>8.0f} ns/record")
+    print(
+        f"{'ratio':<9} {results['handle'] / results['baseline']:>8.2f} handle/baseline"
+    )
+
+
+if __name__ == "__main__":
+    main()
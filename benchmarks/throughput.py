@@ -0,0 +1,227 @@
+"""
+Measure how fast each handler delivers records to a local fake Discord server, for every message creator.
+
+For each combination, a number of records is logged as fast as possible, and the handler is flushed. The results report:
+
+- records/s: records delivered per second, from the first record logged until the flush returned.
+- req/record: HTTP requests made per record, including requests rejected due to rate limits.
+- p50 and p99: the time from each record being logged until the request containing it was accepted by the server.
+- peak KiB: the peak memory allocated while logging and sending, as measured by `tracemalloc`.
+
+The requests are made with the transport chosen by `--transport`. With `memory`, they aren't made at all, but recorded by a `RecordingTransport`, which measures the cost of creating and encoding the messages alone.
+
+Run `python -m benchmarks.throughput --help` for the options.
+"""
+
+import argparse
+import logging
+import re
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+from discord_lumberjack.handlers import (
+    DiscordChannelHandler,
+    DiscordDMHandler,
+    DiscordHandler,
+    DiscordWebhookHandler,
+)
+from discord_lumberjack.message_creators import (
+    BasicMessageCreator,
+    EmbedLongMessageCreator,
+    EmbedMessageCreator,
+    MessageCreator,
+)
+from discord_lumberjack.handlers.rate_limiter import RateLimiter
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+from discord_lumberjack.transports import (
+    HTTPClientTransport,
+    RequestsTransport,
+    Transport,
+)
+
+_tag_pattern = re.compile(r"rec-(\d+)-")
+
+handler_factories: Dict[str, Callable[..., DiscordHandler]] = {
+    "webhook": lambda discord, **kwargs: DiscordWebhookHandler(
+        discord.webhook_url(), **kwargs
+    ),
+    "channel": lambda discord, **kwargs: DiscordChannelHandler(
+        "token", 1234, api_url=discord.api_url, **kwargs
+    ),
+    "dm": lambda discord, **kwargs: DiscordDMHandler(
+        "token", 5678, api_url=discord.api_url, **kwargs
+    ),
+}
+
+message_creators: Dict[str, Callable[[], MessageCreator]] = {
+    "basic": BasicMessageCreator,
+    "embed": EmbedMessageCreator,
+    "embed-long": EmbedLongMessageCreator,
+}
+
+
+transports: Dict[str, Callable[[], Transport]] = {
+    "requests": RequestsTransport,
+    "http.client": HTTPClientTransport,
+    "memory": RecordingTransport,
+}
+
+
+class Result(NamedTuple):
+    handler: str
+    creator: str
+    records: int
+    seconds: float
+    requests: int
+    p50: float
+    p99: float
+    peak_bytes: int
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else float("inf")
+
+    @property
+    def requests_per_record(self) -> float:
+        return self.requests / self.records if self.records else 0.0
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Get a percentile of some values by the nearest rank method.
+
+    Args:
+        values (List[float]): The values, in any order.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The value below which `fraction` of the values fall, or NaN if there are no values.
+    """
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def run(
+    handler_name: str,
+    creator_name: str,
+    records: int,
+    latency: float = 0.0,
+    rate_limit: int = 5,
+    rate_limit_window: float = 2.0,
+    message_size: int = 100,
+    transport_name: str = "requests",
+    **handler_kwargs,
+) -> Result:
+    """Benchmark one handler with one message creator.
+
+    Args:
+        handler_name (str): A key of `handler_factories`.
+        creator_name (str): A key of `message_creators`.
+        records (int): The number of records to log.
+        latency (float, optional): The latency of the fake server in seconds. Defaults to 0.
+        rate_limit (int, optional): The number of requests the fake server allows per window. Defaults to 5.
+        rate_limit_window (float, optional): The length of the fake server's rate limit windows in seconds. Defaults to 2.
+        message_size (int, optional): The approximate length of each record's message. Defaults to 100.
+        transport_name (str, optional): A key of `transports`. Defaults to "requests".
+        **handler_kwargs: Any other keyword arguments are passed on to the handler.
+
+    Returns:
+        Result: The measurements.
+    """
+    with FakeDiscord(
+        latency=latency, rate_limit=rate_limit, rate_limit_window=rate_limit_window
+    ) as discord:
+        transport = transports[transport_name]()
+        tracemalloc.start()
+        handler = handler_factories[handler_name](
+            discord,
+            message_creator=message_creators[creator_name](),
+            flush_on_exit=False,
+            rate_limiter=RateLimiter(),
+            transport=transport,
+            **handler_kwargs,
+        )
+        logger = logging.Logger(f"benchmark.{handler_name}.{creator_name}")
+        logger.addHandler(handler)
+        padding = "x" * max(0, message_size - 16)
+        logged_at: Dict[int, float] = {}
+        start = time.perf_counter()
+        for i in range(records):
+            logged_at[i] = time.time()
+            logger.info("rec-%d-%s", i, padding)
+        handler.flush(raise_exceptions=False)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        handler.close()
+        transport.close()
+        latencies: List[float] = []
+        messages = 0
+        received = (
+            transport.requests
+            if isinstance(transport, RecordingTransport)
+            else discord.requests
+        )
+        for request in received:
+            if request.path.endswith("/users/@me/channels"):
+                continue
+            messages += 1
+            body = request.body.decode(errors="replace")
+            for match in set(_tag_pattern.findall(body)):
+                latencies.append(request.received_at - logged_at[int(match)])
+        return Result(
+            handler_name,
+            creator_name,
+            records,
+            seconds,
+            messages + discord.rate_limited,
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.99),
+            peak,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.throughput",
+        description="Benchmark the handlers against a local fake Discord server.",
+    )
+    parser.add_argument("-n", "--records", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=1000)
+    parser.add_argument("--rate-limit-window", type=float, default=1.0)
+    parser.add_argument("--message-size", type=int, default=100)
+    parser.add_argument("--max-batch-size", type=int, default=1)
+    parser.add_argument("--handler", action="append", choices=sorted(handler_factories))
+    parser.add_argument("--creator", action="append", choices=sorted(message_creators))
+    parser.add_argument("--transport", choices=sorted(transports), default="requests")
+    args = parser.parse_args(argv)
+    print(
+        f"{'handler':<8} {'creator':<11} {'records/s':>10} {'req/record':>10}"
+        f" {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9}"
+    )
+    for handler_name in args.handler or handler_factories:
+        for creator_name in args.creator or message_creators:
+            result = run(
+                handler_name,
+                creator_name,
+                args.records,
+                latency=args.latency,
+                rate_limit=args.rate_limit,
+                rate_limit_window=args.rate_limit_window,
+                message_size=args.message_size,
+                max_batch_size=args.max_batch_size,
+                transport_name=args.transport,
+            )
+            print(
+                f"{result.handler:<8} {result.creator:<11}"
+                f" {result.records_per_second:>10.1f}"
+                f" {result.requests_per_record:>10.2f}"
+                f" {result.p50 * 1000:>9.1f} {result.p99 * 1000:>9.1f}"
+                f" {result.peak_bytes / 1024:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -18,3 +18,4 @@ except importlib.metadata.PackageNotFoundError:
 
 from . import handlers
 from . import message_creators
+from . import transports
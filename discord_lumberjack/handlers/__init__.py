@@ -10,10 +10,40 @@ from .discord_handler import DiscordHandler
 from .discord_webhook_handler import DiscordWebhookHandler
 from .discord_channel_handler import DiscordChannelHandler
 from .discord_dm_handler import DiscordDMHandler
+from .async_discord_handler import AsyncDiscordHandler
+from .async_discord_webhook_handler import AsyncDiscordWebhookHandler
+from .async_discord_channel_handler import AsyncDiscordChannelHandler
+from .async_discord_dm_handler import AsyncDiscordDMHandler
+from .rate_limiter import RateLimiter
+from .record_queue import OverflowPolicy, RecordQueue
+from .record_aggregator import RecordAggregator
+from .record_sampler import RecordSampler
+from .record_spool import RecordSpool
+from .dispatch_engine import DispatchEngine
+from .circuit_breaker import CircuitBreaker, CircuitState
+from .fan_in_server import FanInServer
+from .fan_in_handler import FanInHandler
+from .handler_stats import prometheus_text
 
 __all__ = (
     "DiscordHandler",
     "DiscordWebhookHandler",
     "DiscordChannelHandler",
     "DiscordDMHandler",
+    "AsyncDiscordHandler",
+    "AsyncDiscordWebhookHandler",
+    "AsyncDiscordChannelHandler",
+    "AsyncDiscordDMHandler",
+    "RateLimiter",
+    "OverflowPolicy",
+    "RecordQueue",
+    "RecordAggregator",
+    "RecordSampler",
+    "RecordSpool",
+    "DispatchEngine",
+    "CircuitBreaker",
+    "CircuitState",
+    "FanInServer",
+    "FanInHandler",
+    "prometheus_text",
 )
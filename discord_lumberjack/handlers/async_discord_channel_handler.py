@@ -0,0 +1,35 @@
+import logging
+from typing import Any
+from discord_lumberjack.message_creators import MessageCreator
+from .async_discord_handler import AsyncDiscordHandler
+from .discord_handler import default_api_url
+
+
+class AsyncDiscordChannelHandler(AsyncDiscordHandler):
+    """An asyncio logging handler that sends messages to a Discord Channel from a Bot. It is the asyncio counterpart of `DiscordChannelHandler`.
+
+    Args:
+        bot_token (str): The authentication token of the Bot to send the message with.
+        channel_id (int): The ID of the Channel to send the message to.
+        level (int, optional): The level at which to log. Defaults to logging.NOTSET.
+        message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
+        api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+        **kwargs: Any other keyword arguments are passed on to `AsyncDiscordHandler`.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        channel_id: int,
+        level: int = logging.NOTSET,
+        message_creator: MessageCreator = None,
+        api_url: str = default_api_url,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            f"{api_url}/channels/{channel_id}/messages",
+            level=level,
+            message_creator=message_creator,
+            http_headers={"Authorization": f"Bot {bot_token}"},
+            **kwargs,
+        )
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Any, Optional
+from discord_lumberjack.message_creators import MessageCreator
+from discord_lumberjack.transports import Response
+from .async_discord_handler import AsyncDiscordHandler
+from .discord_dm_handler import (
+    cache_dm_channel,
+    cached_dm_channel,
+    create_dm_channel,
+    forget_dm_channel,
+)
+from .discord_handler import default_api_url
+
+
+class AsyncDiscordDMHandler(AsyncDiscordHandler):
+    """An asyncio logging handler that sends messages to a Discord Direct Message Channel from a Bot. It is the asyncio counterpart of `DiscordDMHandler`.
+
+    Rather than creating the DM channel upon construction, it is created when the first message is sent, so that the event loop isn't blocked. If this fails, sending the message fails with a ValueError. Like `DiscordDMHandler`, the channel is remembered for the rest of the process, and with `dm_cache_path` in a file for later processes, and is shared with any `DiscordDMHandler` for the same bot and user.
+
+    Args:
+        bot_token (str): The authentication token of the Bot to send the message with.
+        user_id (int): The ID of the user to send the message to.
+        level (int, optional): The level at which to log. Defaults to logging.NOTSET.
+        message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
+        api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+        dm_cache_path (str, optional): The path of a JSON file in which to remember the IDs of DM channels between processes. Defaults to None, which only remembers them in memory.
+        **kwargs: Any other keyword arguments are passed on to `AsyncDiscordHandler`.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        user_id: int,
+        level: int = logging.NOTSET,
+        message_creator: MessageCreator = None,
+        api_url: str = default_api_url,
+        dm_cache_path: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            "",
+            level=level,
+            message_creator=message_creator,
+            http_headers={"Authorization": f"Bot {bot_token}"},
+            **kwargs,
+        )
+        self.__api_url = api_url
+        self.__bot_token = bot_token
+        self.__user_id = user_id
+        self.__dm_cache_path = dm_cache_path
+        self.__url: Optional[str] = None
+        self.__url_lock: Optional[asyncio.Lock] = None
+
+    async def resolve_url(self) -> str:
+        """Create the DM channel the first time this is awaited, and get the URL to send the messages to.
+
+        Returns:
+                str: The URL of the DM channel's messages.
+
+        Raises:
+                ValueError: If the bot was unable to create a DM channel with the user.
+        """
+        if self.__url is None:
+            self.__url_lock = self.__url_lock or asyncio.Lock()
+            async with self.__url_lock:
+                if self.__url is None:
+                    channel_id = await self._run_in_executor(self.__create_dm_channel)
+                    self.__url = f"{self.__api_url}/channels/{channel_id}/messages"
+        return self.__url
+
+    def message_rejected(self, response: Response) -> None:
+        """Forget the DM channel if Discord says it doesn't exist, so that it is created again for the next message.
+
+        Args:
+                response (Response): The response rejecting the message.
+        """
+        if response.status_code == 404 and self.__url is not None:
+            forget_dm_channel(
+                self.__user_id, self.__bot_token, self.__api_url, self.__dm_cache_path
+            )
+            self.__url = None
+
+    def __create_dm_channel(self) -> int:
+        channel_id = cached_dm_channel(
+            self.__user_id, self.__bot_token, self.__api_url, self.__dm_cache_path
+        )
+        if channel_id is None:
+            channel_id = create_dm_channel(
+                self.__user_id,
+                self.__bot_token,
+                self.__api_url,
+                transport=self.transport,
+            )
+            cache_dm_channel(
+                self.__user_id,
+                self.__bot_token,
+                channel_id,
+                self.__api_url,
+                self.__dm_cache_path,
+            )
+        return channel_id
@@ -0,0 +1,388 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Mapping, Optional, Set, TypeVar
+from discord_lumberjack.message_creators import BasicMessageCreator, MessageCreator
+from discord_lumberjack.transports import (
+    RequestsTransport,
+    Response,
+    Transport,
+    TransportError,
+)
+from .discord_handler import (
+    _default_rate_limiter,
+    _jitter,
+    _own_logger_prefix,
+    _request_body,
+)
+from .rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+_default_message_creator = BasicMessageCreator()
+
+_executor_threads: Set[int] = set()
+"""The identifiers of the threads of the shared executor."""
+_executor = ThreadPoolExecutor(
+    thread_name_prefix="DiscordLumberjack",
+    initializer=lambda: _executor_threads.add(threading.get_ident()),
+)
+"""The thread pool in which every asyncio handler makes its blocking requests."""
+_default_transport: Optional[Transport] = None
+_default_transport_lock = threading.Lock()
+
+
+def _shared_transport() -> Transport:
+    """Get the transport shared by the asyncio handlers that aren't given one, creating it the first time."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = RequestsTransport()
+        return _default_transport
+
+
+_T = TypeVar("_T")
+
+
+class AsyncDiscordHandler(logging.Handler):
+    """A base class for logging handlers that send messages to Discord from an asyncio event loop.
+
+    Unlike `DiscordHandler`, this handler doesn't start a thread of its own. Records are handed to an `asyncio.Queue` (thread safely, so they may be logged from any thread), and they are sent by a task running on the event loop, several at a time. Transports make blocking requests, so the requests themselves are run in a thread pool shared by all the asyncio handlers, through a transport that is also shared unless one is given. Records logged by those threads (such as the HTTP client's debug logs) are ignored, so that sending a message can't cause more messages to be sent.
+
+    Like `DiscordHandler`, the handler waits for the rate limits Discord reports, and retries messages that failed due to a server error, a connection error or a timeout, with an exponential backoff.
+
+    The handler starts on the event loop that is running when it is created, or if there is none, on the first one that logs a record through it. You can also start it explicitly with `start`.
+
+    Since blocking the event loop is not an option, use `aflush` and `aclose` to wait for the messages to be sent. `flush` only blocks when called from a thread other than the event loop's.
+
+    Args:
+        url (str): The URL to make the request to. This can be a webhook URL, a channel URL, a direct message URL, or any other URL that Discord supports.
+        level (int, optional): The level at which to log. Defaults to logging.NOTSET.
+        message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
+        http_headers (Mapping[str, Any], optional): A mapping of HTTP headers to send with the request. Defaults to an empty mapping.
+        rate_limiter (RateLimiter, optional): The rate limiter used to pace the requests according to the rate limits Discord reports. Defaults to the one shared by all handlers that aren't given one.
+        max_concurrency (int, optional): The maximum number of records whose messages are sent at the same time. The messages of each record are always sent in order, but the messages of different records may arrive out of order. Defaults to 4.
+        transport (Transport, optional): The HTTP client to make the requests with. Its requests are made in the shared thread pool. See `discord_lumberjack.transports`. Defaults to a `RequestsTransport` shared by the asyncio handlers that aren't given one.
+        request_timeout (float, optional): The maximum number of seconds to wait for Discord to accept the connection and for each part of its response. Defaults to 10.
+        max_retries (int, optional): The number of times to retry a message that failed due to a server error (a 5xx status), a connection error or a timeout. Requests rejected due to rate limits are always retried, and don't count towards this. Defaults to 3.
+        max_backoff (float, optional): The longest interval in seconds to wait before retrying a failed message, or a rate limited one if Discord doesn't say how long to wait. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        level: int = logging.NOTSET,
+        message_creator: MessageCreator = None,
+        http_headers: Mapping[str, Any] = None,
+        rate_limiter: RateLimiter = None,
+        max_concurrency: int = 4,
+        transport: Optional[Transport] = None,
+        request_timeout: float = 10.0,
+        max_retries: int = 3,
+        max_backoff: float = 30.0,
+    ) -> None:
+        super().__init__(level=level)
+        self.__url = url
+        self.__transport = transport or _shared_transport()
+        self.__headers = dict(http_headers or {})
+        self.__request_timeout = request_timeout
+        self.__max_retries = max_retries
+        self.__max_backoff = max_backoff
+        self.__message_creator = message_creator or _default_message_creator
+        self.__rate_limiter = rate_limiter or _default_rate_limiter
+        self.__identity = str((http_headers or {}).get("Authorization", ""))
+        self.__max_concurrency = max_concurrency
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__loop_thread: Optional[int] = None
+        self.__queue: Optional["asyncio.Queue[logging.LogRecord]"] = None
+        self.__consumer: Optional["asyncio.Task[None]"] = None
+        self.__tasks: Set["asyncio.Future[None]"] = set()
+        self.__pending: Deque[logging.LogRecord] = deque()
+        self.__pending_lock = threading.Lock()
+        self.__exception: Optional[Exception] = None
+        try:
+            self.start()
+        except RuntimeError:
+            logger.debug("No running event loop, the handler will start later.")
+
+    def start(self) -> None:
+        """Start sending records on the running event loop. This must be called from the event loop's thread, and does nothing if the handler was already started.
+
+        Raises:
+            RuntimeError: If there is no running event loop.
+        """
+        if self.__loop is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self.__queue = asyncio.Queue()
+        self.__consumer = loop.create_task(self.__consume())
+        with self.__pending_lock:
+            while self.__pending:
+                self.__queue.put_nowait(self.__pending.popleft())
+            self.__loop_thread = threading.get_ident()
+            self.__loop = loop
+
+    def filter(self, record: logging.LogRecord) -> Any:
+        """Reject records logged by this library or by the threads making the asyncio handlers' requests, which would otherwise be sent recursively, then apply the handler's filters.
+
+        Args:
+                record (logging.LogRecord): The log record to filter.
+
+        Returns:
+                Any: A false value if the record should be dropped.
+        """
+        if record.thread in _executor_threads or record.name.startswith(
+            _own_logger_prefix
+        ):
+            return False
+        return super().filter(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Log the messages to Discord.
+
+        This method is non-blocking. The message will be sent by a task on the event loop.
+
+        Args:
+                record (logging.LogRecord): The log record to send.
+        """
+        if self.__loop is None:
+            try:
+                self.start()
+            except RuntimeError:
+                with self.__pending_lock:
+                    if self.__loop is None:
+                        self.__pending.append(record)
+                        return
+        assert self.__loop and self.__queue
+        if threading.get_ident() == self.__loop_thread:
+            self.__queue.put_nowait(record)
+            return
+        try:
+            self.__loop.call_soon_threadsafe(self.__queue.put_nowait, record)
+        except RuntimeError:
+            self.handleError(record)
+
+    def message_rejected(self, response: Response) -> None:
+        """Called when Discord rejects a message, before the error is raised.
+
+        Subclasses may override this method to forget anything that led to the rejection, such as a channel that no longer exists. By default, it does nothing.
+
+        Args:
+                response (Response): The response rejecting the message.
+        """
+
+    def transform_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Transform a message before sending it to Discord.
+
+        This method may be overridden by subclasses to transform each message as desired by each handler. By default, it keeps the message as is.
+
+        Args:
+                message (Dict[str, Any]): The message to transform.
+
+        Returns:
+                Dict[str, Any]: The transformed message.
+        """
+        return message
+
+    def prepare_messages(self, record: logging.LogRecord) -> Iterable[Dict[str, Any]]:
+        """Given a log record, obtain all the message objects that will be sent to Discord.
+
+        Args:
+                record (logging.LogRecord): The log record to send.
+
+        Returns:
+                Iterable[Dict[str, Any]]: The messages to send to Discord.
+        """
+        return (
+            self.transform_message(msg)
+            for msg in self.__message_creator.messages(record, self.format)
+        )
+
+    @property
+    def transport(self) -> Transport:
+        """The HTTP client the handler makes its requests with."""
+        return self.__transport
+
+    async def resolve_url(self) -> str:
+        """Get the URL to send the messages to.
+
+        Subclasses may override this method to find the URL lazily, for example by making a request. It is awaited before each message is sent.
+
+        Returns:
+                str: The URL to make the requests to.
+        """
+        return self.__url
+
+    async def aflush(self, raise_exceptions: bool = True) -> None:
+        """Wait until all logged messages are sent to Discord.
+
+        Args:
+                raise_exceptions (bool, optional): Whether to re-raise any exceptions that were raised while sending messages. Defaults to True.
+
+        Raises:
+                Exception: If an exception was raised while sending a message, and `raise_exceptions` is True.
+        """
+        self.start()
+        assert self.__queue
+        await self.__queue.join()
+        if self.__exception and raise_exceptions:
+            raise self.__exception
+
+    async def aclose(self) -> None:
+        """Send all the logged messages, then stop the task sending them and close the handler."""
+        await self.aflush(raise_exceptions=False)
+        if self.__consumer:
+            self.__consumer.cancel()
+        self.close()
+
+    def flush(self, raise_exceptions=True):
+        """Block until all logged messages are sent to Discord, if called from a thread other than the event loop's. On the event loop's thread, use `aflush` instead, since blocking it would prevent the messages from being sent.
+
+        Args:
+                raise_exceptions (bool, optional): Whether to re-raise any exceptions that were raised while sending messages. Defaults to True.
+
+        Raises:
+                Exception: If an exception was raised while sending a message, and `raise_exceptions` is True.
+        """
+        loop = self.__loop
+        if loop is None or threading.get_ident() == self.__loop_thread:
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(
+                self.aflush(raise_exceptions=False), loop
+            ).result()
+        if self.__exception and raise_exceptions:
+            raise self.__exception
+
+    def close(self) -> None:
+        """Close the handler. Messages that haven't been sent yet are discarded, so call `aclose` instead to send them first. The shared thread pool and transport are left open for the other handlers."""
+        super().close()
+
+    async def _run_in_executor(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking function in the shared thread pool, so that any records it logs are ignored by the handler.
+
+        Args:
+                func (Callable[..., _T]): The function to run.
+                *args: The arguments to call it with.
+
+        Returns:
+                _T: The function's return value.
+        """
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+    async def __consume(self) -> None:
+        """In an infinite loop, take a log record from the queue and start a task to send its messages, keeping at most `max_concurrency` such tasks running."""
+        assert self.__queue
+        semaphore = asyncio.Semaphore(self.__max_concurrency)
+        while True:
+            record = await self.__queue.get()
+            await semaphore.acquire()
+            task = asyncio.ensure_future(self.__process(record, semaphore))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __process(
+        self, record: logging.LogRecord, semaphore: asyncio.Semaphore
+    ) -> None:
+        """Send the messages of a log record to Discord, in order."""
+        assert self.__queue
+        try:
+            for msg in self.prepare_messages(record):
+                await self.__send_message(msg)
+        except Exception as e:
+            logger.exception("Consumer: Exception while sending a record.")
+            self.__exception = e
+            self.handleError(record)
+        finally:
+            semaphore.release()
+            self.__queue.task_done()
+
+    async def __send_message(self, message: Mapping[str, Any]) -> None:
+        """Send a message to Discord.
+
+        Args:
+                message (Mapping[str, Any]): The message object to send.
+        """
+        response = await self.__retry_send(message)
+        if response.status_code >= 300:
+            self.message_rejected(response)
+            raise RuntimeError(f"Failed to send message to Discord: {response.text}")
+
+    async def __retry_send(
+        self,
+        message: Mapping[str, Any],
+        initial_interval=0.1,
+        initial_error_interval=0.5,
+    ) -> Response:
+        """Send a message to Discord, with the same retry policy as `DiscordHandler`.
+
+        The message is encoded once, and the same bytes are sent on every attempt. Before each attempt, wait for the rate limiter. If the message was rejected due to "too many requests", keep trying until it succeeds, waiting as long as Discord asked. If it failed due to a server error, a connection error or a timeout, retry up to `max_retries` times with a capped exponential backoff with jitter.
+
+        Args:
+                message (Mapping[str, Any]): The message object to send.
+                initial_interval (float, optional): The initial interval to wait before retrying a rate limited request if Discord doesn't say how long to wait. Defaults to 0.1.
+                initial_error_interval (float, optional): The initial interval to wait before retrying after a server error, a connection error or a timeout. Defaults to 0.5.
+
+        Returns:
+                Response: The response to the HTTP request, whose status is neither 429 nor 5xx.
+
+        Raises:
+                Exception: If the last attempt failed due to a server error, a connection error or a timeout.
+        """
+        url = await self.resolve_url()
+        content, content_type = _request_body(message)
+        headers = {**self.__headers, "Content-Type": content_type}
+        retry_interval = initial_interval
+        failures = 0
+        while True:
+            delay = self.__rate_limiter.reserve("POST", url, self.__identity)
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.__rate_limiter.reserve("POST", url, self.__identity)
+            response: Optional[Response] = None
+            try:
+                response = await self._run_in_executor(
+                    self.__transport.post,
+                    url,
+                    content,
+                    headers,
+                    self.__request_timeout,
+                )
+            except TransportError as e:
+                error: Exception = e
+            if response is not None:
+                retry_after = self.__rate_limiter.update(
+                    "POST", url, response.status_code, response.headers, self.__identity
+                )
+                if response.status_code < 500 and response.status_code != 429:
+                    return response
+                if response.status_code == 429:
+                    wait = (
+                        retry_after
+                        if retry_after is not None
+                        else _jitter(retry_interval)
+                    )
+                    logger.warning(
+                        "Message was rejected due to too many requests. Waiting"
+                        f" {wait} seconds..."
+                    )
+                    if retry_after is None:
+                        await asyncio.sleep(wait)
+                        retry_interval = min(retry_interval * 2, self.__max_backoff)
+                    continue
+                error = RuntimeError(
+                    f"Discord responded with status {response.status_code}:"
+                    f" {response.text}"
+                )
+            if failures >= self.__max_retries:
+                raise error
+            wait = _jitter(
+                min(initial_error_interval * 2**failures, self.__max_backoff)
+            )
+            failures += 1
+            logger.warning(
+                f"Failed to send message: {error}. Retrying in {wait} seconds..."
+            )
+            await asyncio.sleep(wait)
@@ -0,0 +1,88 @@
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+
+class CircuitState(Enum):
+    """The state of a `CircuitBreaker`."""
+
+    CLOSED = "closed"
+    """Requests are made as usual."""
+
+    OPEN = "open"
+    """Too many requests failed in a row, so no requests are made until `reset_timeout` has passed."""
+
+    HALF_OPEN = "half_open"
+    """A single request is being made to probe whether the endpoint has recovered."""
+
+
+class CircuitBreaker:
+    """Stops requests being made to an endpoint that keeps failing, such as during a Discord outage, and lets a single request through every so often to probe whether it has recovered.
+
+    After `failure_threshold` consecutive failures, the circuit opens and `allow` returns False. Once `reset_timeout` seconds have passed, `allow` returns True once, letting a probe through. If the probe succeeds, the circuit closes again, and if it fails, it stays open for another `reset_timeout` seconds.
+
+    Args:
+        failure_threshold (int, optional): The number of consecutive failures after which the circuit opens. Defaults to 5.
+        reset_timeout (float, optional): The number of seconds to wait after the circuit opens, or after a failed probe, before probing again. Defaults to 30.
+        clock (Callable[[], float], optional): A monotonic clock returning seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__state = CircuitState.CLOSED
+        self.__failures = 0
+        self.__opened_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state of the circuit."""
+        return self.__state
+
+    def allow(self) -> bool:
+        """Check whether a request may be made now. If this lets a probe through, the circuit becomes half open until the probe's outcome is recorded.
+
+        Returns:
+            bool: Whether a request may be made.
+        """
+        with self.__lock:
+            if self.__state is CircuitState.CLOSED:
+                return True
+            if (
+                self.__state is CircuitState.OPEN
+                and self.__clock() - self.__opened_at >= self.__reset_timeout
+            ):
+                self.__state = CircuitState.HALF_OPEN
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a probe that was let through by `allow` but didn't make a request, for example because there was nothing to send. The circuit opens again without restarting its timer, so the next call to `allow` lets another probe through."""
+        with self.__lock:
+            if self.__state is CircuitState.HALF_OPEN:
+                self.__state = CircuitState.OPEN
+
+    def record_success(self) -> None:
+        """Record that a request succeeded, closing the circuit."""
+        with self.__lock:
+            self.__failures = 0
+            self.__state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        """Record that a request failed, opening the circuit if it was a probe or if there have been `failure_threshold` failures in a row."""
+        with self.__lock:
+            self.__failures += 1
+            if (
+                self.__state is CircuitState.HALF_OPEN
+                or self.__failures >= self.__failure_threshold
+            ):
+                self.__state = CircuitState.OPEN
+                self.__opened_at = self.__clock()
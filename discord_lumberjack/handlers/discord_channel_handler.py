@@ -1,7 +1,8 @@
 import logging
+from typing import Any, Sequence, Tuple
 
 from discord_lumberjack.message_creators import MessageCreator
-from .discord_handler import DiscordHandler
+from .discord_handler import DiscordHandler, default_api_url
 
 
 class DiscordChannelHandler(DiscordHandler):
@@ -12,6 +13,9 @@ class DiscordChannelHandler(DiscordHandler):
         channel_id (int): The ID of the Channel to send the message to.
         level (int, optional): The level at which to log. Defaults to logging.NOTSET.
         message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
+        pool (Sequence[Tuple[str, int]], optional): More pairs of bot tokens and channel IDs leading to the same target channel. Each message is sent through whichever pair (including the one given by `bot_token` and `channel_id`) has the most rate limit budget left, which raises the rate at which messages can be sent. Defaults to no more pairs.
+        api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+        **kwargs: Any other keyword arguments are passed on to `DiscordHandler`.
     """
 
     def __init__(
@@ -20,10 +24,15 @@ class DiscordChannelHandler(DiscordHandler):
         channel_id: int,
         level: int = logging.NOTSET,
         message_creator: MessageCreator = None,
+        pool: Sequence[Tuple[str, int]] = (),
+        api_url: str = default_api_url,
+        **kwargs: Any,
     ) -> None:
+        members = [(bot_token, channel_id), *pool]
         super().__init__(
-            f"https://discord.com/api/channels/{channel_id}/messages",
+            [f"{api_url}/channels/{channel}/messages" for _, channel in members],
             level=level,
             message_creator=message_creator,
-            http_headers={"Authorization": f"Bot {bot_token}"},
+            http_headers=[{"Authorization": f"Bot {token}"} for token, _ in members],
+            **kwargs,
         )
@@ -1,13 +1,23 @@
+import json
 import logging
-import requests
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
 from discord_lumberjack.message_creators import MessageCreator
+from discord_lumberjack.transports import RequestsTransport, Response, Transport
 from .discord_channel_handler import DiscordChannelHandler
+from .discord_handler import default_api_url
+
+_dm_channels: Dict[Tuple[str, str, int], int] = {}
+"""The DM channels already created in this process, by API URL, bot token and user ID."""
+_dm_channels_lock = threading.Lock()
 
 
 class DiscordDMHandler(DiscordChannelHandler):
     """A logging handler that sends messages to a Discord  Direct Message Channel from a Bot.
 
-    Upon construction, this handler will attempt to create a DM channel with the user specified by the user_id argument. If this fails, the constructor will raise a ValueError.
+    The DM channel with the user specified by the user_id argument is created when the first message is sent, from the thread sending the messages, so creating the handler doesn't wait for a request. The channel is remembered for the rest of the process, so other handlers for the same bot and user don't create it again, and with `dm_cache_path` it is also remembered in a file for later processes. If the channel can't be created, sending the message fails with a ValueError, and creating it is tried again with the next message. If Discord says the channel doesn't exist, it is forgotten, and created again for the next message.
 
     Since a DM channel is a kind of channel, this handler is a subclass of DiscordChannelHandler.
 
@@ -16,6 +26,9 @@ class DiscordDMHandler(DiscordChannelHandler):
         user_id (int): The ID of the user to send the message to.
         level (int, optional): The level at which to log. Defaults to logging.NOTSET.
         message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
+        api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+        dm_cache_path (str, optional): The path of a JSON file in which to remember the IDs of DM channels between processes. Defaults to None, which only remembers them in memory.
+        **kwargs: Any other keyword arguments are passed on to `DiscordHandler`.
     """
 
     def __init__(
@@ -24,14 +37,64 @@ class DiscordDMHandler(DiscordChannelHandler):
         user_id: int,
         level: int = logging.NOTSET,
         message_creator: MessageCreator = None,
+        api_url: str = default_api_url,
+        dm_cache_path: Optional[str] = None,
+        **kwargs: Any,
     ) -> None:
+        self.__api_url = api_url
+        self.__bot_token = bot_token
+        self.__user_id = user_id
+        self.__dm_cache_path = dm_cache_path
+        self.__url: Optional[str] = None
         super().__init__(
             bot_token,
-            self.create_dm_channel(user_id, bot_token),
+            0,
             level=level,
             message_creator=message_creator,
+            api_url=api_url,
+            **kwargs,
         )
 
+    def resolve_url(self, url: str) -> str:
+        """Get the URL of the DM channel's messages, creating the channel if it isn't known yet.
+
+        Args:
+                url (str): A placeholder for the URL of the channel's messages, which is ignored.
+
+        Returns:
+                str: The URL of the DM channel's messages.
+
+        Raises:
+                ValueError: If the bot was unable to create a DM channel with the user.
+        """
+        if self.__url is None:
+            channel_id = cached_dm_channel(
+                self.__user_id, self.__bot_token, self.__api_url, self.__dm_cache_path
+            )
+            if channel_id is None:
+                channel_id = self.create_dm_channel(self.__user_id, self.__bot_token)
+                cache_dm_channel(
+                    self.__user_id,
+                    self.__bot_token,
+                    channel_id,
+                    self.__api_url,
+                    self.__dm_cache_path,
+                )
+            self.__url = f"{self.__api_url}/channels/{channel_id}/messages"
+        return self.__url
+
+    def message_rejected(self, response: Response) -> None:
+        """Forget the DM channel if Discord says it doesn't exist, so that it is created again for the next message.
+
+        Args:
+                response (Response): The response rejecting the message.
+        """
+        if response.status_code == 404 and self.__url is not None:
+            forget_dm_channel(
+                self.__user_id, self.__bot_token, self.__api_url, self.__dm_cache_path
+            )
+            self.__url = None
+
     def create_dm_channel(self, user_id: int, bot_token: str) -> int:
         """Create a DM channel through the discord API.
 
@@ -44,13 +107,149 @@ class DiscordDMHandler(DiscordChannelHandler):
         Raises:
                 ValueError: If the bot was unable to create a DM channel with the user.
         """
-        r = requests.post(
-            "https://discord.com/api/users/@me/channels",
-            json={"recipient_id": user_id},
-            headers={"Authorization": f"Bot {bot_token}"},
+        return create_dm_channel(
+            user_id, bot_token, self.__api_url, transport=self.transport
+        )
+
+
+def create_dm_channel(
+    user_id: int,
+    bot_token: str,
+    api_url: str = default_api_url,
+    timeout: float = 10.0,
+    transport: Optional[Transport] = None,
+) -> int:
+    """Create a DM channel through the discord API.
+
+    Args:
+            user_id (int): The ID of the user to create a DM channel with.
+            bot_token (str): The authentication token of the Bot to create the DM channel for.
+            api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+            timeout (float, optional): The maximum number of seconds to wait for Discord to accept the connection and for each part of its response. Defaults to 10.
+            transport (Transport, optional): The HTTP client to make the request with. Defaults to a new `RequestsTransport`, which is closed afterwards.
+
+    Returns:
+            int: The ID of the DM channel.
+
+    Raises:
+            ValueError: If the bot was unable to create a DM channel with the user.
+    """
+    client = transport or RequestsTransport()
+    try:
+        r = client.post(
+            f"{api_url}/users/@me/channels",
+            json.dumps({"recipient_id": user_id}).encode(),
+            {"Authorization": f"Bot {bot_token}", "Content-Type": "application/json"},
+            timeout,
         )
-        if r.status_code >= 300:
-            raise ValueError(
-                f"Could not create DM channel with user {user_id}. Response: {r.text}"
+    finally:
+        if transport is None:
+            client.close()
+    if r.status_code >= 300:
+        raise ValueError(
+            f"Could not create DM channel with user {user_id}. Response: {r.text}"
+        )
+    return r.json()["id"]
+
+
+def cached_dm_channel(
+    user_id: int,
+    bot_token: str,
+    api_url: str = default_api_url,
+    cache_path: Optional[str] = None,
+) -> Optional[int]:
+    """Look up a DM channel that was already created, in this process or, if a cache file is given, in an earlier one.
+
+    Args:
+            user_id (int): The ID of the user.
+            bot_token (str): The authentication token of the Bot.
+            api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+            cache_path (Optional[str], optional): The path of the cache file. Defaults to None, which only looks in memory.
+
+    Returns:
+            Optional[int]: The ID of the DM channel, or None if it isn't known.
+    """
+    with _dm_channels_lock:
+        channel_id = _dm_channels.get((api_url, bot_token, user_id))
+        if channel_id is None and cache_path:
+            channel_id = _read_cache(cache_path).get(
+                _cache_key(user_id, bot_token, api_url)
             )
-        return r.json()["id"]
+            if channel_id is not None:
+                _dm_channels[(api_url, bot_token, user_id)] = channel_id
+        return channel_id
+
+
+def cache_dm_channel(
+    user_id: int,
+    bot_token: str,
+    channel_id: int,
+    api_url: str = default_api_url,
+    cache_path: Optional[str] = None,
+) -> None:
+    """Remember a DM channel for the rest of the process and, if a cache file is given, for later ones.
+
+    Args:
+            user_id (int): The ID of the user.
+            bot_token (str): The authentication token of the Bot.
+            channel_id (int): The ID of the DM channel.
+            api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+            cache_path (Optional[str], optional): The path of the cache file. Defaults to None, which only remembers the channel in memory.
+    """
+    with _dm_channels_lock:
+        _dm_channels[(api_url, bot_token, user_id)] = channel_id
+        if not cache_path:
+            return
+        cache = _read_cache(cache_path)
+        cache[_cache_key(user_id, bot_token, api_url)] = channel_id
+        _write_cache(cache_path, cache)
+
+
+def forget_dm_channel(
+    user_id: int,
+    bot_token: str,
+    api_url: str = default_api_url,
+    cache_path: Optional[str] = None,
+) -> None:
+    """Forget a DM channel, in this process and, if a cache file is given, in the file, for example because it no longer exists.
+
+    Args:
+            user_id (int): The ID of the user.
+            bot_token (str): The authentication token of the Bot.
+            api_url (str, optional): The base URL of Discord's API. Defaults to "https://discord.com/api".
+            cache_path (Optional[str], optional): The path of the cache file. Defaults to None, which only forgets the channel in memory.
+    """
+    with _dm_channels_lock:
+        _dm_channels.pop((api_url, bot_token, user_id), None)
+        if not cache_path:
+            return
+        cache = _read_cache(cache_path)
+        if cache.pop(_cache_key(user_id, bot_token, api_url), None) is not None:
+            _write_cache(cache_path, cache)
+
+
+def _cache_key(user_id: int, bot_token: str, api_url: str) -> str:
+    """Identify an API host, a bot and a user in the cache file. Only the first part of the bot's token, which is its encoded ID, is kept, so that the token itself isn't written to the file."""
+    return f"{urlsplit(api_url).netloc}/{bot_token.split('.')[0]}:{user_id}"
+
+
+def _write_cache(cache_path: str, cache: Dict[str, int]) -> None:
+    """Replace the cache file atomically. The lock must be held by the caller."""
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "w") as file:
+            json.dump(cache, file)
+        os.replace(temporary, cache_path)
+    except OSError as e:
+        logging.getLogger(__name__).warning(
+            f"Could not write the DM channel cache {cache_path}: {e}"
+        )
+
+
+def _read_cache(cache_path: str) -> Dict[str, int]:
+    try:
+        with open(cache_path) as file:
+            cache = json.load(file)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
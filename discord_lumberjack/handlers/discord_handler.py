@@ -1,60 +1,331 @@
+import atexit
+import json
 import logging
+import os
+import random
 import threading
 import time
-from typing import Any, Dict, Iterable, Mapping, Optional
-import requests
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from discord_lumberjack.message_creators import BasicMessageCreator, MessageCreator
-from queue import Queue
+from discord_lumberjack.transports import (
+    RequestsTransport,
+    Response,
+    Transport,
+    TransportError,
+)
+from collections import Counter, deque
+from queue import Empty
+from .rate_limiter import RateLimiter
+from .record_queue import OverflowPolicy, RecordQueue
+from .record_spool import RecordSpool
+from .record_aggregator import RecordAggregator
+from .record_sampler import RecordSampler, annotate
+from .dispatch_engine import DispatchEngine
+from .handler_stats import HandlerStats
+from .circuit_breaker import CircuitBreaker, CircuitState
 
 logger = logging.getLogger(__name__)
 
+default_api_url = "https://discord.com/api"
 _default_message_creator = BasicMessageCreator()
+_default_rate_limiter = RateLimiter()
 
 
-def _record_str(record: logging.LogRecord) -> str:
-    msg = record.getMessage()
-    return f'"{msg[:50]}"{"..." if len(msg) > 50 else ""}'
+_own_logger_prefix = "discord_lumberjack."
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+_json_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+class _RecordStr:
+    """A short quoted preview of a record's message, for the library's own debug logs. The message is only formatted if the preview is actually logged."""
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: logging.LogRecord) -> None:
+        self.record = record
+
+    def __str__(self) -> str:
+        msg = self.record.getMessage()
+        return f'"{msg[:50]}"{"..." if len(msg) > 50 else ""}'
+
+
+class _Destination(NamedTuple):
+    """A URL to send messages to, with the headers to send with them."""
+
+    url: str
+    headers: Dict[str, Any]
+    identity: str
+    json_headers: Dict[str, Any]
+    """The headers to send with messages encoded as JSON, which are most of them."""
+
+
+class _LiveMessage(NamedTuple):
+    """The last message sent in tail mode, which later records are appended to by editing it."""
+
+    id: str
+    destination: _Destination
+    """The destination the message was sent to, which is the only one allowed to edit it."""
+    message: Dict[str, Any]
+    """The message as it was last sent, to which the messages of later records are added."""
+    sent_at: float
+    """The value of `time.monotonic()` when the message was sent."""
+
+
+class _Send(NamedTuple):
+    """A message of a batch that is waiting to be sent."""
+
+    message: Dict[str, Any]
+    live: Optional[_LiveMessage] = None
+    """In tail mode, the live message this message replaces, as it will be once the edit succeeds. None to send a new message."""
+    fallback: Sequence[Dict[str, Any]] = ()
+    """The messages to send instead if the live message no longer exists."""
+
+
+class _InFlight:
+    """A batch of records taken from the queue whose messages haven't all been sent yet, with the progress made sending them, so that sending can be resumed once the rate limit or the backoff allows it."""
+
+    __slots__ = (
+        "batch",
+        "records",
+        "stop",
+        "sends",
+        "sent",
+        "body",
+        "failures",
+        "retry_interval",
+        "ready_at",
+        "probe",
+    )
+
+    def __init__(
+        self,
+        batch: List[logging.LogRecord],
+        records: List[logging.LogRecord],
+        stop: bool,
+    ) -> None:
+        self.batch = batch
+        self.records = records
+        self.stop = stop
+        self.sends: Optional[Deque[_Send]] = None
+        self.sent: List[Tuple[Dict[str, Any], Response, _Destination]] = []
+        self.body: Optional[Tuple[bytes, str]] = None
+        self.failures = 0
+        self.retry_interval = 0.0
+        self.ready_at = 0.0
+        self.probe = False
+
+
+class _NotReady(Exception):
+    """Raised when the next request can't be made yet because of a rate limit or a backoff, so that the thread making it can do something else in the meantime."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(delay)
+        self.delay = delay
 
 
 class DiscordHandler(logging.Handler):
     """A base class for logging handlers that send messages to Discord.
 
     Args:
-        url (str): The URL to make the request to. This can be a webhook URL, a channel URL, a direct message URL, or any other URL that Discord supports.
+        url (str | Sequence[str]): The URL to make the request to. This can be a webhook URL, a channel URL, a direct message URL, or any other URL that Discord supports. If a sequence of URLs (all leading to the same place) is given, each message is sent to the one with the most rate limit budget left, which multiplies the rate at which messages can be sent.
         level (int, optional): The level at which to log. Defaults to logging.NOTSET.
         message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
-        http_headers (Mapping[str, Any], optional): A mapping of HTTP headers to send with the request. Defaults to an empty mapping.
+        http_headers (Mapping[str, Any] | Sequence[Mapping[str, Any]], optional): A mapping of HTTP headers to send with the request. If a sequence of URLs is given, this may also be a sequence of mappings, one for each URL. Defaults to an empty mapping.
+        flush_on_exit (bool, optional): Whether to close the handler when the program exits, sending the queued messages for up to `close_timeout` seconds. Defaults to True.
+        rate_limiter (RateLimiter, optional): The rate limiter used to pace the requests according to the rate limits Discord reports. Defaults to one shared by all handlers that aren't given one.
+        max_batch_size (int, optional): The maximum number of queued records to convert into messages together, which lets message creators pack several records into each message. Defaults to 1, which sends the messages of each record separately.
+        linger (float, optional): When batching, the number of seconds to wait for more records to arrive before sending a batch that isn't full yet. Defaults to 0, which only batches records that are already queued.
+        max_queue_size (int, optional): The maximum number of records waiting to be sent. Defaults to 0, which means there is no limit.
+        max_queue_bytes (int, optional): The maximum estimated size in bytes of the records waiting to be sent. Defaults to 0, which means there is no limit.
+        overflow_policy (OverflowPolicy, optional): Which record to drop when a new record doesn't fit in the queue. The number of dropped records is reported in a message sent after them. Defaults to `OverflowPolicy.DROP_LOWEST_LEVEL`.
+        block_timeout (float, optional): When `overflow_policy` is `OverflowPolicy.BLOCK`, the maximum number of seconds to block the logging thread for, or None to block until there is room. Defaults to None.
+        dedupe_window (float, optional): If positive, records logged by the same statement with the same level within this many seconds of the first one are not sent, and a copy of the last one noting how many times it was repeated is sent once the window is over instead. Defaults to 0, which sends every record.
+        dedupe_max_fingerprints (int, optional): The maximum number of distinct statements whose duplicates are tracked at once. The least recently logged ones are forgotten first. Defaults to 1024.
+        engine (DispatchEngine, optional): A dispatch engine whose sender threads and connection pool will be shared with other handlers. If given, the handler doesn't start any threads of its own, and `flush_on_exit` is left to the engine. Defaults to None, which gives the handler a thread of its own.
+        stats_callbacks (Sequence[Callable[[Dict[str, Any]], None]], optional): Functions to call with the handler's `stats` every `stats_interval` seconds, from the thread sending the messages. Defaults to no callbacks.
+        stats_interval (float, optional): The number of seconds between calls to the `stats_callbacks`. Defaults to 60.
+        spool_directory (str, optional): A directory in which to keep the queued records on disk instead of in memory, so that they are sent even if the process is killed or Discord can't be reached for a long time. Records that weren't sent are replayed when a handler is next created with the same directory. When given, `max_queue_size`, `max_queue_bytes`, `overflow_policy`, `block_timeout`, `priority_levels` and `starvation_limit` are ignored. See `RecordSpool`. Defaults to None, which keeps the records in memory.
+        spool_max_bytes (int, optional): The maximum size of the spool in bytes. Records that don't fit are dropped and reported. Defaults to 256 MiB.
+        spool_segment_bytes (int, optional): The size in bytes of each of the spool's segment files. Defaults to 4 MiB.
+        priority_levels (Sequence[int], optional): The lowest level of each priority lane of the queue above the first. Queued records of higher lanes are sent before any of lower lanes, so that an alert doesn't wait behind a backlog of less important records. Defaults to `(logging.ERROR,)`, which sends ERROR and CRITICAL records first.
+        starvation_limit (int, optional): The number of records in a row that may be sent from higher lanes while an older record waits in a lower lane. Defaults to 20.
+        sample_target_lag (float, optional): If positive, when more records are logged than can be sent and the queue holds more than this many seconds' worth of them, records below `sample_max_level` are sampled, the lowest levels the most, so that the lag stays bounded. Each record sent in place of others notes roughly how many it stands for. See `RecordSampler`. Defaults to 0, which never samples.
+        sample_max_level (int, optional): The lowest level whose records are never sampled. It is never above ERROR. Defaults to logging.WARNING.
+        close_timeout (Optional[float], optional): The maximum number of seconds that `close` spends sending the queued records when it isn't given a deadline, including when the program exits. Defaults to 10. None waits until every record is sent.
+        request_timeout (float, optional): The maximum number of seconds to wait for Discord to accept the connection and for each part of its response. Defaults to 10.
+        max_retries (int, optional): The number of times to retry a message that failed due to a server error (a 5xx status), a connection error or a timeout. The retries are spaced out by an exponential backoff with jitter. Requests rejected due to rate limits are always retried, and don't count towards this. Defaults to 3.
+        max_backoff (float, optional): The longest interval in seconds to wait before retrying a failed message, or a rate limited one if Discord doesn't say how long to wait. Defaults to 30.
+        circuit_breaker (CircuitBreaker, optional): The circuit breaker that stops messages being sent while Discord keeps failing, letting one through every so often to check whether it has recovered. Defaults to one that opens after 5 consecutive failed messages and probes every 30 seconds.
+        fallback_handler (logging.Handler, optional): A handler to pass records to while the circuit is open instead of sending them, such as a `logging.FileHandler`. Defaults to None, which counts those records as failed.
+        transport (Transport, optional): The HTTP client to make the requests with. See `discord_lumberjack.transports`. Defaults to the engine's if there is one, or otherwise to a `RequestsTransport` of the handler's own, which is closed with the handler.
+        tail (bool, optional): Whether to append records to the last message sent, by editing it, rather than sending new messages. A new message is only sent when the records don't fit in the last one any more, or when it is older than `tail_max_age`. The message creator must be able to combine messages (see `MessageCreator.combine_messages`), as `BasicMessageCreator` and `EmbedMessageCreator` do, so that the live message isn't created again for each edit. Messages with attachments are never edited. Defaults to False.
+        tail_max_age (float, optional): In tail mode, the number of seconds after which records are no longer appended to a message. Defaults to 300.
     """
 
     def __init__(
         self,
-        url: str,
+        url: Union[str, Sequence[str]],
         level: int = logging.NOTSET,
         message_creator: MessageCreator = None,
-        http_headers: Mapping[str, Any] = None,
+        http_headers: Union[Mapping[str, Any], Sequence[Mapping[str, Any]]] = None,
         flush_on_exit: bool = True,
+        rate_limiter: RateLimiter = None,
+        max_batch_size: int = 1,
+        linger: float = 0.0,
+        max_queue_size: int = 0,
+        max_queue_bytes: int = 0,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_LOWEST_LEVEL,
+        block_timeout: Optional[float] = None,
+        dedupe_window: float = 0.0,
+        dedupe_max_fingerprints: int = 1024,
+        engine: DispatchEngine = None,
+        stats_callbacks: Sequence[Callable[[Dict[str, Any]], None]] = (),
+        stats_interval: float = 60.0,
+        spool_directory: Optional[str] = None,
+        spool_max_bytes: int = 256 * 1024 * 1024,
+        spool_segment_bytes: int = 4 * 1024 * 1024,
+        priority_levels: Sequence[int] = (logging.ERROR,),
+        starvation_limit: int = 20,
+        sample_target_lag: float = 0.0,
+        sample_max_level: int = logging.WARNING,
+        close_timeout: Optional[float] = 10.0,
+        request_timeout: float = 10.0,
+        max_retries: int = 3,
+        max_backoff: float = 30.0,
+        circuit_breaker: CircuitBreaker = None,
+        fallback_handler: Optional[logging.Handler] = None,
+        transport: Optional[Transport] = None,
+        tail: bool = False,
+        tail_max_age: float = 300.0,
     ) -> None:
         super().__init__(level=level)
-        self.__url = url
-        self.__session = requests.Session()
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.__destinations = _destinations(url, http_headers)
+        self.__next_destination = 0
+        self.__engine = engine
+        self.__transport = transport or (
+            engine.transport if engine else RequestsTransport()
+        )
+        self.__owns_transport = transport is None and engine is None
+        self.__tail = tail
+        self.__tail_max_age = tail_max_age
+        self.__live: Optional[_LiveMessage] = None
+        self.__in_flight: Optional[_InFlight] = None
+        self.__in_flight_lock = threading.Lock()
+        self.__abandoned = False
         self.__message_creator = message_creator or _default_message_creator
-        self.__session.headers.update(http_headers or {})
-        self.__queue: Queue[logging.LogRecord] = Queue()
-        self.__consumer_thread = threading.Thread(
-            target=self.__consume, name="DiscordLumberjack", daemon=not flush_on_exit
+        self.__rate_limiter = rate_limiter or _default_rate_limiter
+        self.__max_batch_size = max_batch_size
+        self.__linger = linger
+        self.__request_timeout = request_timeout
+        self.__max_retries = max_retries
+        self.__max_backoff = max_backoff
+        self.__circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.__fallback_handler = fallback_handler
+        self.__queue: Union[RecordQueue, RecordSpool] = (
+            RecordSpool(spool_directory, spool_segment_bytes, spool_max_bytes)
+            if spool_directory
+            else RecordQueue(
+                max_queue_size,
+                max_queue_bytes,
+                overflow_policy,
+                block_timeout,
+                priority_levels,
+                starvation_limit,
+            )
+        )
+        self.__aggregator = (
+            RecordAggregator(dedupe_window, dedupe_max_fingerprints)
+            if dedupe_window > 0
+            else None
+        )
+        self.__sampler = (
+            RecordSampler(sample_target_lag, self.__queue.qsize, sample_max_level)
+            if sample_target_lag > 0
+            else None
         )
-        self.__consumer_thread.start()
+        self.__stats = HandlerStats()
+        self.__stats_callbacks = list(stats_callbacks)
+        self.__stats_interval = stats_interval
+        self.__next_stats_push = time.monotonic() + stats_interval
         self.__sentinel = logging.LogRecord("", 0, "", 0, None, None, None)
-        if flush_on_exit:
-            threading.Thread(
-                target=self.__cleanup, name="DiscordLumberjackCleanup"
-            ).start()
         self.__exception: Optional[Exception] = None
-        self.addFilter(
-            lambda r: not r.name.startswith("discord_lumberjack.")
-            and r.thread != self.__consumer_thread.ident
+        self.__close_timeout = close_timeout
+        self.__closed = False
+        self.__stopping = False
+        self.__consumer_thread: Optional[threading.Thread] = None
+        self.__own_threads: FrozenSet[Optional[int]] = frozenset()
+        if engine:
+            engine.register(self)
+        else:
+            self.__consumer_thread = threading.Thread(
+                target=self.__consume, name="DiscordLumberjack", daemon=True
+            )
+            self.__consumer_thread.start()
+            if flush_on_exit:
+                atexit.register(self.close)
+        self.__own_threads = (
+            engine.thread_idents
+            if engine
+            else (
+                frozenset((self.__consumer_thread.ident,))
+                if self.__consumer_thread
+                else frozenset()
+            )
         )
 
+    def handle(self, record: logging.LogRecord) -> bool:
+        """Filter the record and queue it to be sent if it passes the filters.
+
+        Unlike `logging.Handler.handle`, this doesn't take the handler's lock, since queuing a record is already thread safe. As in Python 3.12, if a filter returns a record, that record is queued in place of the original.
+
+        Args:
+                record (logging.LogRecord): The log record to handle.
+
+        Returns:
+                bool: Whether the record passed the filters.
+        """
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return bool(rv)
+
+    def filter(self, record: logging.LogRecord) -> Any:
+        """Reject records logged by this library or by the threads sending this handler's messages, which would otherwise be sent recursively, then apply the handler's filters.
+
+        Args:
+                record (logging.LogRecord): The log record to filter.
+
+        Returns:
+                Any: A false value if the record should be dropped. From Python 3.12, this may be a record to handle in place of the original.
+        """
+        if record.thread in self.__own_threads or record.name.startswith(
+            _own_logger_prefix
+        ):
+            return False
+        return super().filter(record) if self.filters else True
+
     def emit(self, record: logging.LogRecord) -> None:
         """Log the messages to Discord.
 
@@ -63,15 +334,70 @@ class DiscordHandler(logging.Handler):
         Args:
                 record (logging.LogRecord): The log record to send.
         """
-        logger.debug(f"Enqueuing message {_record_str(record)}")
-        self.__queue.put(record)
+        try:
+            if self.__closed or (
+                self.__aggregator and not self.__aggregator.add(record)
+            ):
+                return
+            if self.__sampler:
+                weight = self.__sampler.sample(record)
+                if not weight:
+                    return
+                if weight > 1:
+                    record = annotate(record, weight)
+            self.__queue.put(record)
+            if self.__engine:
+                self.__engine.schedule(self)
+        except Exception:
+            self.handleError(record)
+
+    @property
+    def transport(self) -> Transport:
+        """The HTTP client the handler makes its requests with."""
+        return self.__transport
+
+    def resolve_url(self, url: str) -> str:
+        """Get the URL to actually send a message to, given one of the URLs the handler was created with.
+
+        Subclasses may override this method to find the URL lazily, for example by making a request, so that creating the handler costs nothing. It is called from the thread sending the messages, before each message is sent. By default, it returns the URL as is.
+
+        Args:
+                url (str): One of the URLs the handler was created with.
+
+        Returns:
+                str: The URL to make the request to.
+        """
+        return url
+
+    def edit_url(self, url: str, message_id: str) -> str:
+        """Get the URL with which to edit a message, given the URL it was sent to. This is used in tail mode.
+
+        By default, the message's ID is appended to the URL, as for messages sent to a channel. Subclasses sending messages to other kinds of URLs should override this method.
+
+        Args:
+                url (str): The URL the message was sent to, as returned by `resolve_url`.
+                message_id (str): The ID of the message.
+
+        Returns:
+                str: The URL to make the request to.
+        """
+        return f"{url.split('?', 1)[0]}/{message_id}"
+
+    def message_rejected(self, response: Response) -> None:
+        """Called when Discord rejects a message, before the error is raised.
+
+        Subclasses may override this method to forget anything that led to the rejection, such as a channel that no longer exists. By default, it does nothing.
+
+        Args:
+                response (Response): The response rejecting the message.
+        """
 
     def transform_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Transform a message before sending it to Discord.
 
         This method is called for each message that is sent to Discord. It is called before any fields are filtered out.
 
-        This method may be overridden by subclasses to transform each message as desired by each handler. By default, it keeps the message as is.
+        This method may be overridden by subclasses to transform each message as desired by each handler. Since the message creator creates new messages every time, they may be modified in place. By default, it keeps the message as is.
 
         Args:
                 message (Dict[str, Any]): The message to transform.
@@ -97,8 +423,30 @@ class DiscordHandler(logging.Handler):
             for msg in self.__message_creator.messages(record, self.format)
         )
 
-    def flush(self, raise_exceptions=True):
-        """Block until all logged messages are sent to Discord.
+    def prepare_batch_messages(
+        self, records: Sequence[logging.LogRecord]
+    ) -> Iterable[Dict[str, Any]]:
+        """Given a batch of log records, obtain all the message objects that will be sent to Discord for them.
+
+        A batch of a single record is handled by `prepare_messages`. Otherwise, the message creator is given the chance to pack several records into each message, and transform_message is called on each of the resulting messages.
+
+        Args:
+                records (Sequence[logging.LogRecord]): The log records to send, in the order they were logged.
+
+        Returns:
+                Iterable[Dict[str, Any]]: The messages to send to Discord.
+        """
+        if len(records) == 1:
+            return self.prepare_messages(records[0])
+        return (
+            self.transform_message(msg)
+            for msg in self.__message_creator.batch_messages(records, self.format)
+        )
+
+    def flush(
+        self, raise_exceptions: bool = True, timeout: Optional[float] = None
+    ) -> bool:
+        """Block until all logged messages are sent to Discord, or until the timeout expires.
 
         If an exception was raised while sending a message, it will be re-raised if `raise_exceptions` is True.
 
@@ -106,78 +454,702 @@ class DiscordHandler(logging.Handler):
 
         Args:
                 raise_exceptions (bool, optional): Whether to re-raise any exceptions that were raised while sending messages. Defaults to True.
+                timeout (Optional[float], optional): The maximum number of seconds to wait, or None to wait until every message is sent. Defaults to None.
+
+        Returns:
+                bool: Whether every logged message was processed. This is always True once the handler is closed.
 
         Raises:
                 Exception: If an exception was raised while sending a message, and `raise_exceptions` is True.
         """
-        logger.debug(f"Flushing: Waiting for queue to empty...")
-        self.__queue.join()
-        logger.debug("Flushing: Queue has been emptied.")
+        logger.debug("Flushing: Waiting for queue to empty...")
+        flushed = self.__closed or self.__queue.join(timeout)
+        logger.debug(
+            "Flushing: Queue has been emptied."
+            if flushed
+            else "Flushing: Timed out with records still queued."
+        )
+        if self.__fallback_handler:
+            self.__fallback_handler.flush()
         if self.__exception and raise_exceptions:
             raise self.__exception
+        return flushed
 
-    def __consume(self) -> None:
-        """In an infinite loop, consume a log record from the queue, convert it to its message objects, and send them to Discord."""
+    def stats(self) -> Dict[str, Any]:
+        """Get statistics about the records this handler has processed, for monitoring the handler itself.
+
+        The statistics include:
+
+        - `queue_depth` and `queue_high_water`: The number of records waiting to be sent now, and the most there have been at once.
+        - `records_enqueued`, `records_sent`, `records_failed`, `records_diverted`, `records_dropped`, `records_suppressed`, `records_sampled_out` and `records_abandoned`: The number of records that were queued, fully sent, failed to send, passed to the fallback handler (while the circuit was open, or when closing), dropped because the queue was full, suppressed as duplicates, left out by sampling, and dropped because they were still queued when the handler was closed.
+        - `messages_sent`, `requests`, `messages_per_record` and `requests_per_record`: The number of messages sent and HTTP requests made (including retries), in total and per processed record.
+        - `messages_edited`: The number of times records were appended to a message by editing it, in tail mode.
+        - `rate_limited` and `rate_limit_sleep_seconds`: The number of requests Discord rejected due to rate limits, and the total time spent waiting for rate limits.
+        - `circuit_open`: 1 if the circuit breaker is open (or probing) and records aren't being sent, otherwise 0.
+        - `send_latency_seconds` and `end_to_end_latency_seconds`: Histograms of the time taken by each request, and of the time from the creation of each record until all its messages were sent. Each is a dictionary with the `count` and `sum` of the observations, and the cumulative count of observations in each of its `buckets`, by upper bound.
+
+        Use `discord_lumberjack.handlers.prometheus_text` to export them for Prometheus.
+
+        Returns:
+                Dict[str, Any]: The statistics, by name.
+        """
+        self.__stats.records_enqueued = self.__queue.enqueued_total
+        if self.__aggregator:
+            self.__stats.records_suppressed = self.__aggregator.suppressed_total
+        if self.__sampler:
+            self.__stats.records_sampled_out = self.__sampler.sampled_out_total
+        self.__stats.circuit_open = int(
+            self.__circuit_breaker.state is not CircuitState.CLOSED
+        )
+        return self.__stats.snapshot(
+            self.__queue.qsize(), self.__queue.high_water, self.__queue.dropped_total
+        )
+
+    def close(self, deadline: Optional[float] = None) -> None:
+        """Send the queued records, highest levels first, for up to `deadline` seconds, then stop sending and close the handler.
+
+        The records that are still queued when the deadline passes are passed to the fallback handler if there is one, or otherwise dropped, and the number of records that weren't sent is logged. If the handler has a spool, they are left in it instead, to be sent by the next handler created with the same directory.
+
+        If the handler is served by a dispatch engine, it stops being served by it. If it has a spool, the segments that are no longer needed are deleted and the spool's files are closed. Records logged after the handler is closed are ignored.
+
+        Args:
+                deadline (Optional[float], optional): The maximum number of seconds to spend sending queued records. Defaults to the `close_timeout` given to the constructor.
+        """
+        if self.__closed:
+            return
+        timeout = self.__close_timeout if deadline is None else deadline
+        end = None if timeout is None else time.monotonic() + timeout
+        self.__queue.join(timeout)
+        self.__closed = True
+        self.__stopping = True
+        atexit.unregister(self.close)
+        if self.__engine:
+            self.__engine.unregister(self)
+        elif self.__consumer_thread:
+            self.__queue.put(self.__sentinel, force=True)
+            self.__consumer_thread.join(
+                None if end is None else max(0.0, end - time.monotonic())
+            )
+        if isinstance(self.__queue, RecordSpool):
+            if self.__queue.qsize():
+                logger.warning(
+                    f"Closing: Left {self.__queue.qsize()} unsent records in the spool."
+                )
+            self.__queue.compact()
+            self.__queue.close()
+        else:
+            self.__abandon()
+        if self.__owns_transport:
+            self.__transport.close()
+        super().close()
+
+    def __abandon(self) -> None:
+        """Take the records that are still queued out of the queue, and pass them to the fallback handler, or drop them, logging how many there were of each level.
+
+        The consumer may still be sending a batch, if it didn't stop before the deadline. If that batch then has to wait, `_consume` abandons it itself instead of keeping it in flight.
+        """
+        abandoned: List[logging.LogRecord] = []
+        with self.__in_flight_lock:
+            self.__abandoned = True
+            in_flight, self.__in_flight = self.__in_flight, None
+        if in_flight:
+            for _ in in_flight.batch:
+                self.__queue.task_done()
+            abandoned.extend(in_flight.records)
         while True:
             try:
-                record = self.__queue.get()
-                if record is self.__sentinel:
-                    logger.debug("Consumer: Sentinel record received, exiting thread.")
-                    return
-                logger.debug(f"Consumer: Got message from queue: {_record_str(record)}")
-                for msg in self.prepare_messages(record):
-                    self.__send_message(msg)
-            except Exception as e:
-                logger.exception(
-                    f"Consumer: Exception while consuming: {_record_str(record)}."
+                record = self.__queue.get_nowait()
+            except Empty:
+                break
+            self.__queue.task_done()
+            if record is not self.__sentinel:
+                abandoned.append(record)
+        self.__give_up(abandoned)
+
+    def __give_up(self, abandoned: Sequence[logging.LogRecord]) -> None:
+        """Pass records that won't be sent because the handler was closed to the fallback handler, or drop them, logging how many there were of each level.
+
+        Args:
+                abandoned (Sequence[logging.LogRecord]): The records that weren't sent.
+        """
+        if not abandoned:
+            return
+        counts = Counter(record.levelname for record in abandoned)
+        summary = ", ".join(f"{n} {level}" for level, n in counts.items())
+        if self.__fallback_handler:
+            logger.warning(
+                f"Closing: Passing unsent records to the fallback handler: {summary}."
+            )
+            self.__divert(abandoned)
+        else:
+            logger.warning(f"Closing: Dropped unsent records: {summary}.")
+            self.__stats.records_abandoned += len(abandoned)
+
+    def _consume(self, timeout: Optional[float]) -> bool:
+        """Consume a batch of log records from the queue, convert them to their message objects, and send them to Discord.
+
+        This is called repeatedly by the handler's own thread, or by a `DispatchEngine`'s threads if it has one. It never waits for a rate limit or a backoff: if a request can't be made yet, it returns with the batch still in flight, and the next call resumes sending it. That call should be made no sooner than `_ready_at()`.
+
+        Args:
+                timeout (Optional[float]): The maximum number of seconds to wait for a record to arrive, or None to wait indefinitely.
+
+        Returns:
+                bool: False if the sentinel was reached, meaning no more records should be consumed, otherwise True.
+        """
+        with self.__in_flight_lock:
+            in_flight, self.__in_flight = self.__in_flight, None
+        if in_flight is None:
+            batch = self.__next_batch(timeout)
+            stop = bool(batch) and batch[-1] is self.__sentinel
+            in_flight = _InFlight(
+                batch,
+                [*self.__summaries(flush=stop), *(batch[:-1] if stop else batch)],
+                stop,
+            )
+        records = in_flight.records
+        try:
+            if records:
+                if in_flight.sends is None:
+                    logger.debug(
+                        "Consumer: Got %d record(s) from queue, the first being %s",
+                        len(records),
+                        _RecordStr(records[0]),
+                    )
+                    if self.__circuit_breaker.allow():
+                        in_flight.probe = (
+                            self.__circuit_breaker.state is CircuitState.HALF_OPEN
+                        )
+                        in_flight.sends = deque(self.__plan(records))
+                if in_flight.sends is None:
+                    self.__divert(records)
+                else:
+                    self.__send_all(in_flight)
+                    now = time.time()
+                    for record in records:
+                        self.__stats.end_to_end_latency.observe(now - record.created)
+                    self.__stats.records_sent += len(records)
+        except _NotReady as e:
+            in_flight.ready_at = time.monotonic() + e.delay
+            with self.__in_flight_lock:
+                if not self.__abandoned:
+                    self.__in_flight = in_flight
+                    return True
+            # The handler was closed while the batch was being sent, and the records left behind were already abandoned.
+            for _ in in_flight.batch:
+                self.__queue.task_done()
+            self.__give_up(records)
+            return False
+        except Exception as e:
+            logger.exception(
+                "Consumer: Exception while consuming: %s.", _RecordStr(records[0])
+            )
+            if self.__circuit_breaker.state is CircuitState.OPEN:
+                logger.warning(
+                    "Consumer: Circuit is open, so records won't be sent until Discord"
+                    " recovers."
                 )
+                self.__divert(records)
+            else:
+                self.__stats.records_failed += len(records)
                 self.__exception = e
-                self.handleError(record)
-            finally:
-                self.__queue.task_done()
-                logger.debug(
-                    f"Consumer: Finished processing message: {_record_str(record)}."
+                self.handleError(records[0])
+        if in_flight.probe:
+            # Whatever made the probe end without a request, let the next batch probe instead.
+            self.__circuit_breaker.release()
+        for _ in in_flight.batch:
+            self.__queue.task_done()
+        if self.__sampler:
+            self.__sampler.drained(len(in_flight.batch))
+        if records:
+            logger.debug("Consumer: Finished processing %d record(s).", len(records))
+        self.__push_stats()
+        return not in_flight.stop
+
+    def _ready_at(self) -> float:
+        """Get the time at which the batch in flight may be resumed.
+
+        Returns:
+                float: The value of `time.monotonic()` after which `_consume` can make progress, or 0 if there is no batch in flight.
+        """
+        in_flight = self.__in_flight
+        return in_flight.ready_at if in_flight else 0.0
+
+    def __divert(self, records: Sequence[logging.LogRecord]) -> None:
+        """Pass records that can't be sent while the circuit is open to the fallback handler, or count them as failed if there is none.
+
+        Args:
+                records (Sequence[logging.LogRecord]): The records that weren't sent.
+        """
+        if not self.__fallback_handler:
+            self.__stats.records_failed += len(records)
+            return
+        for record in records:
+            try:
+                self.__fallback_handler.handle(record)
+            except Exception:
+                logger.exception("Consumer: Exception in the fallback handler.")
+        self.__stats.records_diverted += len(records)
+
+    def _has_pending(self) -> bool:
+        """Check whether there are records waiting to be sent.
+
+        Returns:
+                bool: Whether the queue isn't empty or a batch is in flight.
+        """
+        return self.__queue.qsize() > 0 or self.__in_flight is not None
+
+    def __consume(self) -> None:
+        """In an infinite loop, consume batches of log records from the queue until the sentinel is reached, sleeping whenever a batch has to wait for a rate limit or a backoff.
+
+        When suppressing duplicates or pushing statistics, the wait for each batch is limited so that they are reported on time even if nothing else is logged.
+        """
+        timeouts = [
+            *([self.__aggregator.window / 2] if self.__aggregator else []),
+            *([self.__stats_interval] if self.__stats_callbacks else []),
+        ]
+        timeout = min(timeouts) if timeouts else None
+        while not self.__stopping and self._consume(timeout):
+            delay = self._ready_at() - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        logger.debug("Consumer: Sentinel record received, exiting thread.")
+
+    def __push_stats(self) -> None:
+        """Call the stats callbacks if it's time to."""
+        if not self.__stats_callbacks or time.monotonic() < self.__next_stats_push:
+            return
+        self.__next_stats_push = time.monotonic() + self.__stats_interval
+        stats = self.stats()
+        for callback in self.__stats_callbacks:
+            try:
+                callback(stats)
+            except Exception:
+                logger.exception("Consumer: Exception in a stats callback.")
+
+    def __next_batch(self, timeout: Optional[float]) -> List[logging.LogRecord]:
+        """Wait for a record to be available, then collect up to `max_batch_size` records, waiting up to `linger` seconds for more to arrive. A batch always ends at the sentinel if it is reached.
+
+        Args:
+                timeout (Optional[float]): The maximum number of seconds to wait for the first record, or None to wait indefinitely.
+
+        Returns:
+                List[logging.LogRecord]: The records, in the order they were enqueued. This is empty only if no record arrived in time.
+        """
+        try:
+            batch = [self.__queue.get(timeout=timeout)]
+        except Empty:
+            return []
+        deadline = time.monotonic() + self.__linger
+        while len(batch) < self.__max_batch_size and batch[-1] is not self.__sentinel:
+            try:
+                timeout = deadline - time.monotonic()
+                batch.append(
+                    self.__queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self.__queue.get_nowait()
                 )
+            except Empty:
+                break
+        return batch
 
-    def __send_message(self, message: Mapping[str, Any]) -> None:
-        """Send a message to Discord.
+    def __summaries(self, flush: bool) -> List[logging.LogRecord]:
+        """Collect the records summarising records that weren't sent: those that were dropped from the queue and duplicates that were suppressed.
+
+        Args:
+                flush (bool): Whether to report suppressed duplicates even if their window isn't over yet.
+
+        Returns:
+                List[logging.LogRecord]: The summary records to send before the next batch.
+        """
+        summaries = self.__aggregator.summaries(flush) if self.__aggregator else []
+        dropped_summary = self.__dropped_summary()
+        if dropped_summary:
+            summaries.insert(0, dropped_summary)
+        return summaries
+
+    def __dropped_summary(self) -> Optional[logging.LogRecord]:
+        """Create a record reporting how many records were dropped from the queue since the last report, if any were.
+
+        Returns:
+                Optional[logging.LogRecord]: The record to send, or None if no records were dropped.
+        """
+        dropped = self.__queue.take_dropped()
+        if not dropped:
+            return None
+        counts = ", ".join(f"{n} {level}" for level, n in dropped.items())
+        logger.warning(f"Dropped records because the queue was full: {counts}.")
+        return logging.LogRecord(
+            __name__,
+            logging.WARNING,
+            __file__,
+            0,
+            f"{sum(dropped.values())} log records were dropped because the queue was"
+            f" full ({counts}).",
+            None,
+            None,
+        )
+
+    def __plan(self, records: List[logging.LogRecord]) -> List[_Send]:
+        """Convert a batch of records into the messages to send for them. In tail mode, if the records fit in the live message, this is a single edit of it, made by combining the message as it was last sent with the new records' message, so that the records already in it aren't converted again.
+
+        Args:
+                records (List[logging.LogRecord]): The records to send.
+
+        Returns:
+                List[_Send]: The messages to send, in order.
+        """
+        messages = list(self.prepare_batch_messages(records))
+        live = self.__live
+        self.__live = None
+        if (
+            live
+            and time.monotonic() - live.sent_at < self.__tail_max_age
+            and len(messages) == 1
+            and not messages[0].get("files")
+        ):
+            combined = self.__message_creator.combine_messages(
+                live.message, messages[0]
+            )
+            if combined is not None:
+                return [_Send(combined, live._replace(message=combined), messages)]
+        return [_Send(msg) for msg in messages]
+
+    def __send_all(self, in_flight: _InFlight) -> None:
+        """Send the messages of the batch in flight that haven't been sent yet, in order.
+
+        In tail mode, an edit that succeeds keeps the edited message live, and if the batch was sent as a single new message, that message becomes the live message.
+
+        Args:
+                in_flight (_InFlight): The batch in flight.
+
+        Raises:
+                _NotReady: If the next request can't be made yet. The messages that weren't sent are kept in `in_flight`.
+        """
+        assert in_flight.sends is not None
+        while in_flight.sends:
+            send = in_flight.sends[0]
+            response, destination = self.__send_message(
+                send.message, in_flight, send.live
+            )
+            in_flight.sends.popleft()
+            in_flight.body = None
+            in_flight.failures = 0
+            in_flight.retry_interval = 0.0
+            if send.live is None:
+                in_flight.sent.append((send.message, response, destination))
+                self.__stats.messages_sent += 1
+            elif response.status_code < 300:
+                self.__live = send.live
+                self.__stats.messages_edited += 1
+            else:
+                logger.debug("Consumer: The live message is gone, sending a new one.")
+                in_flight.sends.extend(_Send(msg) for msg in send.fallback)
+        if self.__tail and len(in_flight.sent) == 1:
+            message, response, destination = in_flight.sent[0]
+            message_id = None if message.get("files") else _message_id(response)
+            if message_id:
+                self.__live = _LiveMessage(
+                    message_id, destination, message, time.monotonic()
+                )
+
+    def __send_message(
+        self,
+        message: Mapping[str, Any],
+        in_flight: _InFlight,
+        live: Optional[_LiveMessage] = None,
+    ) -> Tuple[Response, _Destination]:
+        """Send a message to Discord, or replace the live message with it.
 
         Args:
                 message (Mapping[str, Any]): The message object to send.
+                in_flight (_InFlight): The batch the message belongs to.
+                live (Optional[_LiveMessage], optional): The live message to edit, if any. Defaults to None, which sends a new message.
+
+        Returns:
+                Tuple[Response, _Destination]: The response, and the destination the message was sent to.
+
+        Raises:
+                _NotReady: If the next request can't be made yet.
+                RuntimeError: If Discord rejected the message, unless it rejected an edit because the live message no longer exists, in which case the response is returned.
         """
-        response = self.__retry_send(message)
-        if response.status_code >= 300:
+        try:
+            response, destination = self.__retry_send(
+                message,
+                (
+                    0
+                    if self.__circuit_breaker.state is CircuitState.HALF_OPEN
+                    else self.__max_retries
+                ),
+                in_flight,
+                live=live,
+            )
+        except _NotReady:
+            raise
+        except Exception:
+            self.__circuit_breaker.record_failure()
+            raise
+        self.__circuit_breaker.record_success()
+        if response.status_code >= 300 and not (live and response.status_code == 404):
+            self.message_rejected(response)
             raise RuntimeError(f"Failed to send message to Discord: {response.text}")
+        return response, destination
 
     def __retry_send(
-        self, message: Mapping[str, Any], initial_interval=0.1
-    ) -> requests.Response:
-        """Send a message to Discord.
+        self,
+        message: Mapping[str, Any],
+        max_retries: int,
+        in_flight: _InFlight,
+        initial_interval=0.1,
+        initial_error_interval=0.5,
+        live: Optional[_LiveMessage] = None,
+    ) -> Tuple[Response, _Destination]:
+        """Send a message to Discord, or replace the live message with it.
 
-        If it was rejected due to "too many requests", keep trying with increasing intervals until it succeeds. This method is blocking.
+        The message is encoded once, and the same bytes are sent on every attempt. Before each attempt, reserve the request from the rate limiter's budget. If it was rejected due to "too many requests" anyway, keep trying until it succeeds, waiting as long as Discord asked. If it failed due to a server error, a connection error or a timeout, retry up to `max_retries` times with a capped exponential backoff with jitter.
+
+        This method never blocks on a wait. When the next attempt has to wait, it raises `_NotReady` instead, and the attempts made so far are kept in `in_flight`, so that calling it again with the same message carries on where it left off.
 
         Args:
                 message (Mapping[str, Any]): The message object to send.
-                initial_interval (float, optional): The initial interval to wait before retrying. Defaults to 0.1.
+                max_retries (int): The number of times to retry after a server error, a connection error or a timeout.
+                in_flight (_InFlight): The batch the message belongs to, which keeps the encoded message and the attempts made to send it.
+                initial_interval (float, optional): The initial interval to wait before retrying a rate limited request if Discord doesn't say how long to wait. Defaults to 0.1.
+                initial_error_interval (float, optional): The initial interval to wait before retrying after a server error, a connection error or a timeout. Defaults to 0.5.
+                live (Optional[_LiveMessage], optional): The live message to edit, if any, in which case the request is made to the destination the live message was sent to. Defaults to None, which sends a new message.
 
         Returns:
-                requests.Response: The response to the HTTP request.
+                Tuple[Response, _Destination]: The response to the HTTP request, whose status is neither 429 nor 5xx, and the destination it was made to.
+
+        Raises:
+                _NotReady: If the next attempt can't be made yet.
+                Exception: If the last attempt failed due to a server error, a connection error or a timeout.
         """
-        retry_interval = initial_interval
-        response = self.__session.post(self.__url, json=message)
-        while response.status_code == 429:
+        if in_flight.body is None:
+            in_flight.body = _request_body(message)
+        content, content_type = in_flight.body
+        method = "PATCH" if live else "POST"
+        while True:
+            destination = live.destination if live else self.__choose_destination()
+            url = self.resolve_url(destination.url)
+            if live:
+                url = self.edit_url(url, live.id)
+            delay = self.__rate_limiter.reserve(method, url, destination.identity)
+            if delay > 0:
+                self.__stats.rate_limit_sleep += delay
+                raise _NotReady(delay)
+            sent_at = time.monotonic()
+            response: Optional[Response] = None
+            try:
+                response = self.__transport.request(
+                    method,
+                    url,
+                    content,
+                    (
+                        destination.json_headers
+                        if content_type == "application/json"
+                        else {**destination.headers, "Content-Type": content_type}
+                    ),
+                    self.__request_timeout,
+                )
+            except TransportError as e:
+                error: Exception = e
+            self.__stats.requests += 1
+            self.__stats.send_latency.observe(time.monotonic() - sent_at)
+            if response is not None:
+                retry_after = self.__rate_limiter.update(
+                    method,
+                    url,
+                    response.status_code,
+                    response.headers,
+                    destination.identity,
+                )
+                if response.status_code < 500 and response.status_code != 429:
+                    return response, destination
+                if response.status_code == 429:
+                    self.__stats.rate_limited += 1
+                    retry_interval = in_flight.retry_interval or initial_interval
+                    wait = (
+                        retry_after
+                        if retry_after is not None
+                        else _jitter(retry_interval)
+                    )
+                    logger.warning(
+                        "Message was rejected due to too many requests. Waiting"
+                        f" {wait} seconds..."
+                    )
+                    if retry_after is not None:
+                        continue
+                    in_flight.retry_interval = min(
+                        retry_interval * 2, self.__max_backoff
+                    )
+                    self.__stats.rate_limit_sleep += wait
+                    raise _NotReady(wait)
+                error = RuntimeError(
+                    f"Discord responded with status {response.status_code}:"
+                    f" {response.text}"
+                )
+            if in_flight.failures >= max_retries:
+                raise error
+            wait = _jitter(
+                min(initial_error_interval * 2**in_flight.failures, self.__max_backoff)
+            )
+            in_flight.failures += 1
             logger.warning(
-                "Message was rejected due to too many requests. Waiting"
-                f" {retry_interval} seconds..."
+                f"Failed to send message: {error}. Retrying in {wait} seconds..."
             )
-            time.sleep(retry_interval)
-            retry_interval *= 2
-            response = self.__session.post(self.__url, json=message)
-        return response
-
-    def __cleanup(self):
-        """Waits for main thread to exit, then enqueues a sentinel to indicate that all messages have been sent."""
-        logger.debug("Cleanup: Waiting for main thread to exit...")
-        threading.main_thread().join()
-        logger.debug("Cleanup: Main thread exited. Signaling consumer to exit.")
-        self.__queue.put(self.__sentinel)
+            raise _NotReady(wait)
+
+    def __choose_destination(self) -> _Destination:
+        """Choose the destination with the most rate limit budget left, or the one whose budget will be refilled the soonest. Ties are broken in a round-robin, so that the load is spread evenly.
+
+        Since the messages are sent one at a time, the order they are logged in is kept regardless of which destination each is sent to.
+
+        Returns:
+                _Destination: The destination to send the next message to.
+        """
+        if len(self.__destinations) == 1:
+            return self.__destinations[0]
+        n = len(self.__destinations)
+        order = [(self.__next_destination + i) % n for i in range(n)]
+        best = max(
+            order,
+            key=lambda i: self.__rate_limiter.remaining(
+                "POST", self.__destinations[i].url, self.__destinations[i].identity
+            ),
+        )
+        self.__next_destination = (best + 1) % n
+        return self.__destinations[best]
+
+
+def _request_body(message: Mapping[str, Any]) -> Tuple[bytes, str]:
+    """Encode a message as the body of a request.
+
+    Messages with `files` are sent as `multipart/form-data`, with each file referenced in the message's `attachments` and the rest of the message as the `payload_json` field. Other messages are sent as JSON.
+
+    Args:
+        message (Mapping[str, Any]): The message object to send.
+
+    Returns:
+        Tuple[bytes, str]: The body of the request and its content type.
+    """
+    files = message.get("files")
+    if not files:
+        return _encode_json(message), "application/json"
+    payload = {key: value for key, value in message.items() if key != "files"}
+    payload["attachments"] = [
+        {"id": i, "filename": file.filename} for i, file in enumerate(files)
+    ]
+    boundary = os.urandom(16).hex()
+    parts = [_form_part(boundary, "payload_json", _encode_json(payload))] + [
+        _form_part(
+            boundary, f"files[{i}]", file.content, file.filename, file.content_type
+        )
+        for i, file in enumerate(files)
+    ]
+    return (
+        b"".join(parts) + f"--{boundary}--\r\n".encode(),
+        f"multipart/form-data; boundary={boundary}",
+    )
+
+
+def _message_id(response: Response) -> Optional[str]:
+    """Get the ID of the message a response says was created, if it says so.
+
+    Args:
+        response (Response): The response to a request sending a message.
+
+    Returns:
+        Optional[str]: The ID of the message, or None if the response has no body, such as when a webhook is executed without `wait=true`.
+    """
+    if not response.content:
+        return None
+    try:
+        message_id = response.json().get("id")
+    except (ValueError, AttributeError):
+        return None
+    return str(message_id) if message_id is not None else None
+
+
+def _encode_json(value: Any) -> bytes:
+    """Encode a value as compact UTF-8 JSON, with `orjson` if it is installed, since it is several times faster than the standard library.
+
+    Args:
+        value (Any): The value to encode.
+
+    Returns:
+        bytes: The encoded value.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return _json_encoder.encode(value).encode()
+
+
+def _form_part(
+    boundary: str,
+    name: str,
+    content: bytes,
+    filename: Optional[str] = None,
+    content_type: str = "application/json",
+) -> bytes:
+    """Encode one part of a `multipart/form-data` body, including the boundary before it."""
+    disposition = f'form-data; name="{name}"'
+    if filename is not None:
+        quoted = filename.replace("\\", "\\\\").replace('"', '\\"')
+        disposition += f'; filename="{quoted}"'
+    return (
+        (
+            f"--{boundary}\r\nContent-Disposition: {disposition}\r\n"
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        + content
+        + b"\r\n"
+    )
+
+
+def _jitter(interval: float) -> float:
+    """Pick a random interval between half of the given interval and all of it, so that senders that failed at the same time don't all retry at the same time.
+
+    Args:
+        interval (float): The longest interval.
+
+    Returns:
+        float: The interval to wait.
+    """
+    return interval / 2 + random.uniform(0, interval / 2)
+
+
+def _destinations(
+    urls: Union[str, Sequence[str]],
+    http_headers: Union[Mapping[str, Any], Sequence[Mapping[str, Any]], None],
+) -> List[_Destination]:
+    """Pair up the URLs a handler sends messages to with the headers to send to each.
+
+    Args:
+        urls (Union[str, Sequence[str]]): A URL or a sequence of URLs.
+        http_headers (Union[Mapping[str, Any], Sequence[Mapping[str, Any]], None]): The headers to send to every URL, or a sequence of headers, one for each URL.
+
+    Returns:
+        List[_Destination]: The destinations.
+
+    Raises:
+        ValueError: If there are no URLs, or if the number of headers doesn't match the number of URLs.
+    """
+    urls = [urls] if isinstance(urls, str) else list(urls)
+    if http_headers is None or isinstance(http_headers, Mapping):
+        headers_list = [http_headers or {}] * len(urls)
+    else:
+        headers_list = list(http_headers)
+    if not urls or len(headers_list) != len(urls):
+        raise ValueError("There must be at least one URL, and one set of headers each.")
+    return [
+        _Destination(
+            url,
+            dict(headers),
+            str(headers.get("Authorization", "")),
+            {**headers, "Content-Type": "application/json"},
+        )
+        for url, headers in zip(urls, headers_list)
+    ]
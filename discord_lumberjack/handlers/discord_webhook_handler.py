@@ -1,5 +1,6 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Sequence, Union
+from urllib.parse import urlsplit, urlunsplit
 from discord_lumberjack.message_creators import MessageCreator
 from .discord_handler import DiscordHandler
 
@@ -9,28 +10,52 @@ class DiscordWebhookHandler(DiscordHandler):
 
     The username and avatar fields will override those provided by the message creator if provided here.
 
+    In tail mode, the webhooks are executed with `wait=true`, so that Discord responds with the ID of each message, which is needed to edit it.
+
     Args:
-        url (str): The URL to make the request to. This must be a webhook URL.
+        url (str | Sequence[str]): The URL to make the request to. This must be a webhook URL. To raise the rate at which messages can be sent, this may be a sequence of webhook URLs for the same channel, in which case each message is sent through the webhook with the most rate limit budget left.
         level (int, optional): The level at which to log. Defaults to logging.NOTSET.
         message_creator (MessageCreator, optional): An instance of MessageCreator or one of its subclasses that will be used to create the message to send from each log record. Defaults to one that sends messages in monospace.
         username (str, optional): The username to use when sending messages. Defaults to None.
         avatar_url (str, optional): The avatar URL to use when sending messages. Defaults to None.
+        **kwargs: Any other keyword arguments are passed on to `DiscordHandler`.
     """
 
     def __init__(
         self,
-        url: str,
+        url: Union[str, Sequence[str]],
         level: int = logging.NOTSET,
         message_creator: MessageCreator = None,
         username: str = None,
         avatar_url: str = None,
+        **kwargs: Any,
     ) -> None:
-        super().__init__(url, level=level, message_creator=message_creator)
+        if kwargs.get("tail"):
+            url = [_wait_url(u) for u in ([url] if isinstance(url, str) else url)]
+        super().__init__(url, level=level, message_creator=message_creator, **kwargs)
         self.__username = username
         self.__avatar_url = avatar_url
 
+    def edit_url(self, url: str, message_id: str) -> str:
+        """Get the URL with which to edit a message sent through a webhook, keeping any query parameters other than `wait`, such as `thread_id`.
+
+        Args:
+                url (str): The URL of the webhook the message was sent through.
+                message_id (str): The ID of the message.
+
+        Returns:
+                str: The URL to make the request to.
+        """
+        parts = urlsplit(url)
+        query = "&".join(
+            p for p in parts.query.split("&") if p and not p.startswith("wait=")
+        )
+        return urlunsplit(
+            parts._replace(path=f"{parts.path}/messages/{message_id}", query=query)
+        )
+
     def transform_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
-        """Replace the username and avatar fields set by the message creator (if any) with those provided to the handler (if any).
+        """Replace the username and avatar fields set by the message creator (if any) with those provided to the handler (if any). The message is modified in place, rather than copied.
 
         Args:
                 message (Dict[str, Any]): The message provided by the message creator.
@@ -38,9 +63,22 @@ class DiscordWebhookHandler(DiscordHandler):
         Returns:
                 Dict[str, Any]: The transformed message.
         """
-        message = message.copy()
         if self.__username:
             message["username"] = self.__username
         if self.__avatar_url:
             message["avatar_url"] = self.__avatar_url
         return message
+
+
+def _wait_url(url: str) -> str:
+    """Add `wait=true` to the query of a webhook URL, so that executing it responds with the message that was created.
+
+    Args:
+        url (str): The URL of the webhook.
+
+    Returns:
+        str: The URL with `wait=true`.
+    """
+    parts = urlsplit(url)
+    params = [p for p in parts.query.split("&") if p and not p.startswith("wait=")]
+    return urlunsplit(parts._replace(query="&".join([*params, "wait=true"])))
@@ -0,0 +1,228 @@
+import atexit
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, FrozenSet, List, Optional, Set, Tuple
+from discord_lumberjack.transports import RequestsTransport, Transport
+
+if TYPE_CHECKING:
+    from .discord_handler import DiscordHandler
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchEngine:
+    """A pool of sender threads shared by any number of `DiscordHandler`s, so that the number of threads and connections stays the same no matter how many handlers there are.
+
+    Each handler keeps its own queue, and the engine schedules the handlers that have records waiting in a round-robin, so that a busy handler can't starve the others. A handler is only ever served by one thread at a time, so the order of its messages is kept. The threads never wait for a handler's rate limit or backoff: a handler that has to wait is set aside until it is ready, and the threads serve the other handlers in the meantime.
+
+    All the handlers share one transport, whose connections to Discord are kept alive between requests.
+
+    When the program exits, or when `close` is called, the engine closes its handlers, sending the records queued in them for up to `close_timeout` seconds in total, stops its threads and closes its transport if it created it.
+
+    Args:
+        workers (int, optional): The number of sender threads. Defaults to 2.
+        pool_maxsize (int, optional): The maximum number of connections to keep alive per host, when the engine creates its own transport. Defaults to 10.
+        poll_interval (float, optional): The number of seconds between the times each handler is visited even if it has nothing queued, so that it can send summaries of records that weren't sent, such as suppressed duplicates. Defaults to 1.
+        close_timeout (Optional[float], optional): The maximum number of seconds to spend sending the queued records of all the handlers when the program exits, or None to leave it to the `close_timeout` of each handler. Defaults to 10.
+        transport (Transport, optional): The HTTP client shared by the handlers. Defaults to a `RequestsTransport` with a pool of `pool_maxsize` connections, which is closed with the engine.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        pool_maxsize: int = 10,
+        poll_interval: float = 1.0,
+        close_timeout: Optional[float] = 10.0,
+        transport: Optional[Transport] = None,
+    ) -> None:
+        self.__workers = workers
+        self.__poll_interval = poll_interval
+        self.__close_timeout = close_timeout
+        self.__transport = transport or RequestsTransport(pool_maxsize=pool_maxsize)
+        self.__owns_transport = transport is None
+        self.__lock = threading.Lock()
+        self.__ready = threading.Condition(self.__lock)
+        self.__handlers: List["DiscordHandler"] = []
+        self.__queue: Deque["DiscordHandler"] = deque()
+        self.__waiting: List[Tuple[float, int, "DiscordHandler"]] = []
+        self.__waiting_order = itertools.count()
+        self.__next_poll = time.monotonic() + poll_interval
+        self.__scheduled: Set[int] = set()
+        self.__threads: List[threading.Thread] = []
+        self.__thread_idents: FrozenSet[int] = frozenset()
+        self.__stopped = False
+
+    @property
+    def transport(self) -> Transport:
+        """The HTTP client shared by the handlers."""
+        return self.__transport
+
+    @property
+    def thread_idents(self) -> FrozenSet[int]:
+        """The identifiers of the engine's sender threads."""
+        return self.__thread_idents
+
+    def owns_thread(self, ident: int) -> bool:
+        """Check whether a thread is one of the engine's sender threads.
+
+        Args:
+            ident (int): The identifier of the thread.
+
+        Returns:
+            bool: Whether the thread belongs to the engine.
+        """
+        return ident in self.__thread_idents
+
+    def register(self, handler: "DiscordHandler") -> None:
+        """Start serving a handler. This is called by the handler when it is created with this engine.
+
+        Args:
+            handler (DiscordHandler): The handler to serve.
+
+        Raises:
+            RuntimeError: If the engine was closed.
+        """
+        with self.__lock:
+            if self.__stopped:
+                raise RuntimeError("The dispatch engine is closed.")
+            self.__handlers.append(handler)
+            if not self.__threads:
+                self.__start()
+
+    def unregister(self, handler: "DiscordHandler") -> None:
+        """Stop serving a handler. This is called by the handler when it is closed.
+
+        Args:
+            handler (DiscordHandler): The handler to stop serving.
+        """
+        with self.__lock:
+            if handler in self.__handlers:
+                self.__handlers.remove(handler)
+
+    def schedule(self, handler: "DiscordHandler") -> None:
+        """Let the engine know that a handler has records waiting to be sent. This is called by the handler whenever it queues a record.
+
+        Args:
+            handler (DiscordHandler): The handler with records waiting.
+        """
+        with self.__lock:
+            if id(handler) not in self.__scheduled:
+                self.__scheduled.add(id(handler))
+                self.__queue.append(handler)
+                self.__ready.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until all the records queued in every handler have been sent, or until the timeout expires.
+
+        Args:
+            timeout (Optional[float], optional): The maximum number of seconds to wait for all the handlers, or None to wait until every record is sent. Defaults to None.
+
+        Returns:
+            bool: Whether every handler's records were all processed.
+        """
+        with self.__lock:
+            handlers = list(self.__handlers)
+        end = None if timeout is None else time.monotonic() + timeout
+        return all(
+            [
+                handler.flush(
+                    raise_exceptions=False,
+                    timeout=None if end is None else max(0.0, end - time.monotonic()),
+                )
+                for handler in handlers
+            ]
+        )
+
+    def __start(self) -> None:
+        """Start the sender threads. The lock must be held by the caller."""
+        self.__threads = [
+            threading.Thread(
+                target=self.__work, name=f"DiscordLumberjack-{i}", daemon=True
+            )
+            for i in range(self.__workers)
+        ]
+        for thread in self.__threads:
+            thread.start()
+        self.__thread_idents = frozenset(t.ident for t in self.__threads if t.ident)
+        atexit.register(self.close)
+
+    def __work(self) -> None:
+        """Repeatedly take the next scheduled handler and let it send a batch of records, scheduling it again if it has more, or setting it aside until it is ready if it has to wait."""
+        while True:
+            with self.__lock:
+                handler = self.__next_handler()
+                if handler is None:
+                    return
+            try:
+                handler._consume(timeout=0)
+            except Exception:
+                logger.exception("Engine: Exception while consuming.")
+            with self.__lock:
+                ready_at = handler._ready_at()
+                if handler not in self.__handlers:
+                    self.__scheduled.discard(id(handler))
+                elif ready_at > time.monotonic():
+                    heapq.heappush(
+                        self.__waiting, (ready_at, next(self.__waiting_order), handler)
+                    )
+                    self.__ready.notify()
+                elif handler._has_pending():
+                    self.__queue.append(handler)
+                    self.__ready.notify()
+                else:
+                    self.__scheduled.discard(id(handler))
+
+    def __next_handler(self) -> Optional["DiscordHandler"]:
+        """Wait for a handler to be ready to be served. Every `poll_interval` seconds, the handlers with nothing queued are scheduled too. The lock must be held by the caller.
+
+        Returns:
+            Optional[DiscordHandler]: The handler to serve, or None if the engine was stopped.
+        """
+        while True:
+            now = time.monotonic()
+            if now >= self.__next_poll:
+                self.__next_poll = now + self.__poll_interval
+                idle = [h for h in self.__handlers if id(h) not in self.__scheduled]
+                self.__queue.extend(idle)
+                self.__scheduled.update(id(h) for h in idle)
+            while self.__waiting and self.__waiting[0][0] <= now:
+                self.__queue.append(heapq.heappop(self.__waiting)[2])
+            if self.__queue:
+                return self.__queue.popleft()
+            if self.__stopped:
+                return None
+            wake_at = self.__next_poll
+            if self.__waiting:
+                wake_at = min(wake_at, self.__waiting[0][0])
+            self.__ready.wait(wake_at - now)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Close every handler, sending their queued records until the timeout has passed, then stop the sender threads and close the transport if the engine created it. This is called when the program exits, and does nothing if the engine was already closed.
+
+        Args:
+            timeout (Optional[float], optional): The maximum number of seconds to spend sending the queued records of all the handlers. Defaults to the `close_timeout` given to the constructor.
+        """
+        with self.__lock:
+            if self.__stopped:
+                return
+            handlers = list(self.__handlers)
+        logger.debug("Engine: Closing all handlers...")
+        timeout = self.__close_timeout if timeout is None else timeout
+        end = None if timeout is None else time.monotonic() + timeout
+        for handler in handlers:
+            handler.close(
+                deadline=None if end is None else max(0.0, end - time.monotonic())
+            )
+        with self.__lock:
+            self.__stopped = True
+            self.__ready.notify_all()
+        atexit.unregister(self.close)
+        for thread in self.__threads:
+            if thread is not threading.current_thread():
+                thread.join(None if end is None else max(0.0, end - time.monotonic()))
+        if self.__owns_transport:
+            self.__transport.close()
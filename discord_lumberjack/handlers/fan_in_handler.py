@@ -0,0 +1,187 @@
+import logging
+import os
+import socket
+import time
+from typing import IO, Callable, Optional
+from .discord_handler import _own_logger_prefix
+from .fan_in_server import FanInServer, frame_header
+from .record_spool import serialize_record
+
+logger = logging.getLogger(__name__)
+
+
+class FanInHandler(logging.Handler):
+    """A logging handler for applications with several worker processes on one host (such as gunicorn or uwsgi workers), which funnels the records of every process into a single handler in one of them.
+
+    Without it, each process has its own `DiscordHandler`, and they compete for the same rate limits, causing requests to be rejected and retried. Instead, the first process to log a record is elected to run the real handler, created by `handler_factory`, along with a `FanInServer` listening on a Unix socket. Every other process sends its records to it over the socket, in a compact serialized form. If the elected process exits, the next process to log a record is elected in its place.
+
+    The election uses an exclusive lock on a file next to the socket, so this handler only works on Unix. To run the real handler in a helper process instead, start a `FanInServer` there, and give the workers a `handler_factory` that raises an exception, so that they never get elected.
+
+    Records received from other processes have their messages already formatted, and any exception information is in `exc_text`. The connection or election happens when each process logs its first record, so the handler can be created before forking.
+
+    Records are sent over the socket from the thread that logs them. If the elected process stops reading them, so that a record can't be sent within `send_timeout` seconds, the connection is dropped and the record is passed to a handler of this process's own instead, created by `handler_factory` the first time this happens. The next record tries to connect again.
+
+    Args:
+        path (str): The path of the Unix socket. Every process must use the same path.
+        handler_factory (Callable[[], logging.Handler]): A function creating the handler that will send the records of every process, such as a `DiscordWebhookHandler`. It is only called in the elected process.
+        level (int, optional): The level at which to log. Defaults to logging.NOTSET.
+        connect_timeout (float, optional): The maximum number of seconds to spend connecting to the elected process or being elected, before the record is given up on. Defaults to 1.
+        send_timeout (float, optional): The maximum number of seconds to spend sending a record to the elected process before sending it from this process instead. Defaults to 0.1.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        handler_factory: Callable[[], logging.Handler],
+        level: int = logging.NOTSET,
+        connect_timeout: float = 1.0,
+        send_timeout: float = 0.1,
+    ) -> None:
+        super().__init__(level=level)
+        self.__path = path
+        self.__handler_factory = handler_factory
+        self.__connect_timeout = connect_timeout
+        self.__send_timeout = send_timeout
+        self.__pid: Optional[int] = None
+        self.__socket: Optional[socket.socket] = None
+        self.__lock_file: Optional[IO[bytes]] = None
+        self.__server: Optional[FanInServer] = None
+        self.__fallback_handler: Optional[logging.Handler] = None
+        self.addFilter(lambda r: not r.name.startswith(_own_logger_prefix))
+
+    @property
+    def is_elected(self) -> bool:
+        """Whether this process was elected to send the records of every process."""
+        return self.__server is not None and self.__pid == os.getpid()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Pass the record to the handler in the elected process, electing this process if there is none.
+
+        Args:
+                record (logging.LogRecord): The log record to send.
+        """
+        try:
+            if self.__pid != os.getpid():
+                self.__reset()
+            if self.__server:
+                self.__handle_locally(record)
+                return
+            data = serialize_record(record)
+            frame = frame_header.pack(len(data)) + data
+            for attempt in range(2):
+                try:
+                    if not self.__socket and not self.__connect():
+                        self.__handle_locally(record)
+                        return
+                    self.__socket.sendall(frame)  # type: ignore
+                    return
+                except socket.timeout:
+                    # Part of the frame may have been sent, so the connection can't be used any more.
+                    self.__disconnect()
+                    self.__handle_as_fallback(record)
+                    return
+                except OSError:
+                    self.__disconnect()
+                    if attempt:
+                        raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """If this process was elected, flush its handler."""
+        if self.is_elected:
+            self.__server.handler.flush()  # type: ignore
+
+    def close(self) -> None:
+        """Disconnect from the elected process, or if this process was elected, stop receiving records from the others, then flush and close its handler. Any handler created because the elected process stopped reading records is closed too."""
+        if self.is_elected:
+            self.__server.stop()  # type: ignore
+            self.__server.handler.flush()  # type: ignore
+            self.__server.handler.close()  # type: ignore
+        if self.__fallback_handler and self.__pid == os.getpid():
+            self.__fallback_handler.flush()
+            self.__fallback_handler.close()
+        self.__reset()
+        super().close()
+
+    def __handle_locally(self, record: logging.LogRecord) -> None:
+        """Pass a record logged in this process, which was elected, to its handler, through the handler's `handle` so that it applies all its checks, including those against records logged by its own threads."""
+        handler = self.__server.handler  # type: ignore
+        if record.levelno >= handler.level:
+            handler.handle(record)
+
+    def __handle_as_fallback(self, record: logging.LogRecord) -> None:
+        """Pass a record that the elected process didn't take in time to a handler of this process's own, creating it the first time."""
+        if self.__fallback_handler is None:
+            logger.warning(
+                f"Fan-in: The process elected to send the records isn't taking them, so process {os.getpid()} is sending its own."
+            )
+            self.__fallback_handler = self.__handler_factory()
+        if record.levelno >= self.__fallback_handler.level:
+            self.__fallback_handler.handle(record)
+
+    def __reset(self) -> None:
+        """Forget any connection or election, which may have been inherited from the parent process."""
+        self.__disconnect()
+        self.__fallback_handler = None
+        if self.__lock_file:
+            self.__lock_file.close()
+            self.__lock_file = None
+        self.__server = None
+        self.__pid = os.getpid()
+
+    def __disconnect(self) -> None:
+        if self.__socket:
+            self.__socket.close()
+            self.__socket = None
+
+    def __connect(self) -> bool:
+        """Connect to the elected process, or get this process elected if there is none.
+
+        Returns:
+            bool: True if connected to another process, or False if this process was elected.
+
+        Raises:
+            TimeoutError: If neither happened within `connect_timeout` seconds.
+        """
+        deadline = time.monotonic() + self.__connect_timeout
+        while True:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                connection.connect(self.__path)
+                connection.settimeout(self.__send_timeout)
+                self.__socket = connection
+                return True
+            except OSError:
+                connection.close()
+            if self.__elect():
+                return False
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Could not connect to {self.__path}.")
+            time.sleep(0.05)
+
+    def __elect(self) -> bool:
+        """Try to take the election lock, and if it was taken, start the real handler and a server for the other processes.
+
+        Returns:
+            bool: Whether this process was elected.
+        """
+        import fcntl
+
+        lock_file = open(f"{self.__path}.lock", "wb")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self.__lock_file = lock_file
+        try:
+            server = FanInServer(self.__path, self.__handler_factory())
+            server.start()
+        except Exception:
+            self.__lock_file = None
+            lock_file.close()
+            raise
+        self.__server = server
+        logger.info(f"Fan-in: Process {os.getpid()} was elected to send the records.")
+        return True
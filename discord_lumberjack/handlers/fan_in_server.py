@@ -0,0 +1,136 @@
+import logging
+import os
+import selectors
+import socket
+import struct
+import threading
+from typing import Dict, Optional
+from .discord_handler import _own_logger_prefix
+from .record_spool import deserialize_record
+
+logger = logging.getLogger(__name__)
+
+frame_header = struct.Struct("<I")
+"""Each record sent to a `FanInServer` is prefixed with the length of its serialized form."""
+
+
+def deliver(handler: logging.Handler, record: logging.LogRecord) -> None:
+    """Pass a record received from another process to a handler.
+
+    The handler's level and filters are applied, and records of this library are dropped as a `DiscordHandler` would drop them. Unlike `DiscordHandler.filter`, the thread that logged the record isn't checked, since the thread identifiers of other processes mean nothing in this one.
+
+    Args:
+        handler (logging.Handler): The handler to pass the record to.
+        record (logging.LogRecord): The record.
+    """
+    if record.levelno < handler.level or record.name.startswith(_own_logger_prefix):
+        return
+    rv = logging.Filterer.filter(handler, record)
+    if isinstance(rv, logging.LogRecord):
+        record = rv
+    if not rv:
+        return
+    handler.acquire()
+    try:
+        handler.emit(record)
+    finally:
+        handler.release()
+
+
+class FanInServer:
+    """Receives log records from other processes over a Unix socket and passes them to a single handler, so that every process on a host shares one handler's queue, rate limiter, batching and connections.
+
+    Each record is sent as its length followed by its serialized form (see `serialize_record`). `FanInHandler` sends records this way, and runs a server itself in whichever process is elected, but a server may also be run in a helper process, for example:
+
+    ```py
+    server = FanInServer("/run/my-app/discord.sock", DiscordWebhookHandler(webhook_url))
+    server.start()
+    ```
+
+    Args:
+        path (str): The path of the Unix socket to listen on. Any file already at this path is replaced.
+        handler (logging.Handler): The handler to pass the received records to.
+    """
+
+    def __init__(self, path: str, handler: logging.Handler) -> None:
+        self.__path = path
+        self.__handler = handler
+        self.__listener: Optional[socket.socket] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__buffers: Dict[socket.socket, bytearray] = {}
+        self.__stopped = threading.Event()
+
+    @property
+    def handler(self) -> logging.Handler:
+        """The handler that the received records are passed to."""
+        return self.__handler
+
+    def start(self) -> None:
+        """Start listening, and receive records in a background thread."""
+        if os.path.exists(self.__path):
+            os.unlink(self.__path)
+        self.__listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__listener.bind(self.__path)
+        self.__listener.listen()
+        self.__listener.setblocking(False)
+        self.__thread = threading.Thread(
+            target=self.__serve, name="DiscordLumberjackFanIn", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop receiving records, and remove the socket."""
+        self.__stopped.set()
+        if self.__thread:
+            self.__thread.join()
+        if self.__listener:
+            self.__listener.close()
+        for connection in self.__buffers:
+            connection.close()
+        self.__buffers.clear()
+        if os.path.exists(self.__path):
+            os.unlink(self.__path)
+
+    def __serve(self) -> None:
+        """Accept connections and read records from them until stopped."""
+        assert self.__listener
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.__listener, selectors.EVENT_READ)
+            while not self.__stopped.is_set():
+                for key, _ in selector.select(timeout=0.5):
+                    if key.fileobj is self.__listener:
+                        connection, _ = self.__listener.accept()
+                        connection.setblocking(False)
+                        self.__buffers[connection] = bytearray()
+                        selector.register(connection, selectors.EVENT_READ)
+                        continue
+                    connection = key.fileobj  # type: ignore
+                    try:
+                        data = connection.recv(65536)
+                    except OSError:
+                        data = b""
+                    if not data:
+                        selector.unregister(connection)
+                        self.__buffers.pop(connection, None)
+                        connection.close()
+                        continue
+                    self.__receive(self.__buffers[connection], data)
+
+    def __receive(self, buffer: bytearray, data: bytes) -> None:
+        """Add data received from a connection to its buffer, and deliver every complete record in the buffer."""
+        buffer += data
+        start = 0
+        while len(buffer) - start >= frame_header.size:
+            (length,) = frame_header.unpack_from(buffer, start)
+            end = start + frame_header.size + length
+            if len(buffer) < end:
+                break
+            try:
+                record = deserialize_record(
+                    bytes(buffer[start + frame_header.size : end])
+                )
+                deliver(self.__handler, record)
+            except Exception:
+                logger.exception("Fan-in: Exception while receiving a record.")
+            start = end
+        del buffer[:start]
@@ -0,0 +1,181 @@
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Sequence
+
+if TYPE_CHECKING:
+    from .discord_handler import DiscordHandler
+
+send_latency_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+end_to_end_latency_buckets = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+class Histogram:
+    """A histogram with fixed buckets, like Prometheus histograms.
+
+    Args:
+        buckets (Sequence[float]): The upper bounds of the buckets, in increasing order. A last bucket with no upper bound is added implicitly.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.__bounds = tuple(buckets)
+        self.__counts = [0] * (len(self.__bounds) + 1)
+        self.__sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value in the histogram.
+
+        Args:
+            value (float): The value to record.
+        """
+        self.__counts[bisect_left(self.__bounds, value)] += 1
+        self.__sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the state of the histogram.
+
+        Returns:
+            Dict[str, Any]: A dictionary with the `count` and `sum` of the recorded values, and `buckets`, which maps the upper bound of each bucket (`float("inf")` for the last) to the number of values recorded in it or any bucket before it.
+        """
+        cumulative: List[int] = []
+        total = 0
+        for count in self.__counts:
+            total += count
+            cumulative.append(total)
+        return {
+            "count": total,
+            "sum": self.__sum,
+            "buckets": dict(zip((*self.__bounds, float("inf")), cumulative)),
+        }
+
+
+class HandlerStats:
+    """Counters and histograms describing the work done by a `DiscordHandler`.
+
+    Each counter is only ever updated by the thread sending the handler's messages, so updating them needs no locking and costs the logging threads nothing. The counts of records enqueued, suppressed and sampled out are kept by the handler's queue, aggregator and sampler, and copied here when a snapshot is taken. Reading the counters from another thread may observe a snapshot that is slightly out of date, which is fine for monitoring.
+    """
+
+    def __init__(self) -> None:
+        self.records_enqueued = 0
+        self.records_sent = 0
+        self.records_failed = 0
+        self.records_diverted = 0
+        self.records_suppressed = 0
+        self.records_sampled_out = 0
+        self.records_abandoned = 0
+        self.messages_sent = 0
+        self.messages_edited = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.rate_limit_sleep = 0.0
+        self.circuit_open = 0
+        self.send_latency = Histogram(send_latency_buckets)
+        self.end_to_end_latency = Histogram(end_to_end_latency_buckets)
+
+    def snapshot(
+        self, queue_depth: int, queue_high_water: int, records_dropped: int
+    ) -> Dict[str, Any]:
+        """Get the current values of all the statistics.
+
+        Args:
+            queue_depth (int): The number of records currently queued.
+            queue_high_water (int): The largest number of records that have been queued at once.
+            records_dropped (int): The number of records dropped because the queue was full.
+
+        Returns:
+            Dict[str, Any]: The statistics, by name.
+        """
+        processed = self.records_sent + self.records_failed + self.records_diverted
+        return {
+            "queue_depth": queue_depth,
+            "queue_high_water": queue_high_water,
+            "records_enqueued": self.records_enqueued,
+            "records_sent": self.records_sent,
+            "records_failed": self.records_failed,
+            "records_diverted": self.records_diverted,
+            "records_dropped": records_dropped,
+            "records_suppressed": self.records_suppressed,
+            "records_sampled_out": self.records_sampled_out,
+            "records_abandoned": self.records_abandoned,
+            "messages_sent": self.messages_sent,
+            "messages_edited": self.messages_edited,
+            "requests": self.requests,
+            "messages_per_record": self.messages_sent / processed if processed else 0.0,
+            "requests_per_record": self.requests / processed if processed else 0.0,
+            "rate_limited": self.rate_limited,
+            "rate_limit_sleep_seconds": self.rate_limit_sleep,
+            "circuit_open": self.circuit_open,
+            "send_latency_seconds": self.send_latency.snapshot(),
+            "end_to_end_latency_seconds": self.end_to_end_latency.snapshot(),
+        }
+
+
+_counters = {
+    "records_enqueued": "Records queued to be sent.",
+    "records_sent": "Records whose messages were all sent.",
+    "records_failed": "Records whose messages could not be sent.",
+    "records_diverted": "Records passed to the fallback handler instead of being sent.",
+    "records_dropped": "Records dropped because the queue was full.",
+    "records_suppressed": "Duplicate records that were counted instead of sent.",
+    "records_sampled_out": "Low level records left out by sampling under load.",
+    "records_abandoned": "Records dropped because they were still queued when the handler was closed.",
+    "messages_sent": "Messages sent to Discord.",
+    "messages_edited": "Messages edited to append records to them in tail mode.",
+    "requests": "HTTP requests made to Discord, including retries.",
+    "rate_limited": "Requests rejected by Discord due to rate limits.",
+    "rate_limit_sleep_seconds": "Time spent waiting for rate limits.",
+}
+_gauges = {
+    "queue_depth": "Records currently waiting to be sent.",
+    "queue_high_water": "The most records that have waited to be sent at once.",
+    "messages_per_record": "Average number of messages sent per record.",
+    "requests_per_record": "Average number of requests made per record.",
+    "circuit_open": "Whether records aren't being sent because Discord keeps failing.",
+}
+_histograms = {
+    "send_latency_seconds": "Time taken by each request to Discord.",
+    "end_to_end_latency_seconds": "Time from the creation of each record until it was sent.",
+}
+
+
+def prometheus_text(
+    handlers: Iterable["DiscordHandler"], prefix: str = "discord_lumberjack"
+) -> str:
+    """Export the statistics of some handlers in the Prometheus text exposition format.
+
+    Each handler's metrics are labelled with the handler's name (see `logging.Handler.set_name`), or with its class name and ID if it has none.
+
+    Args:
+        handlers (Iterable[DiscordHandler]): The handlers whose statistics to export.
+        prefix (str, optional): The prefix of every metric name. Defaults to "discord_lumberjack".
+
+    Returns:
+        str: The metrics, ready to be served to Prometheus.
+    """
+    snapshots = [
+        (handler.get_name() or f"{type(handler).__name__}-{id(handler):x}", stats)
+        for handler in handlers
+        for stats in (handler.stats(),)
+    ]
+    lines: List[str] = []
+    for kind, metrics in (("counter", _counters), ("gauge", _gauges)):
+        for name, help_text in metrics.items():
+            suffix = "_total" if kind == "counter" else ""
+            metric = f"{prefix}_{name}{suffix}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            for label, stats in snapshots:
+                lines.append(f'{metric}{{handler="{_escape(label)}"}} {stats[name]}')
+    for name, help_text in _histograms.items():
+        metric = f"{prefix}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for label, stats in snapshots:
+            histogram = stats[name]
+            handler_label = f'handler="{_escape(label)}"'
+            for bound, count in histogram["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{{handler_label},le="{le}"}} {count}')
+            lines.append(f"{metric}_sum{{{handler_label}}} {histogram['sum']}")
+            lines.append(f"{metric}_count{{{handler_label}}} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+_major_parameter_pattern = re.compile(r"/(channels|guilds|webhooks)/(\d+)")
+_snowflake_pattern = re.compile(r"/\d{15,}")
+
+
+def _split_route(method: str, url: str) -> Tuple[str, str]:
+    """Split a request into the route it belongs to and its major parameter.
+
+    Discord keeps separate rate limits for each value of a route's major parameter (the ID of the channel, guild or webhook), so two requests share a bucket only if they share both the bucket hash and the major parameter.
+
+    Args:
+        method (str): The HTTP method of the request.
+        url (str): The URL of the request.
+
+    Returns:
+        Tuple[str, str]: The route (with any IDs other than the major parameter replaced by a placeholder) and the major parameter.
+    """
+    url = url.split("?", 1)[0]
+    match = _major_parameter_pattern.search(url)
+    if not match:
+        return f"{method} {_snowflake_pattern.sub('/:id', url)}", ""
+    route = (
+        f"{url[: match.start()]}/{match.group(1)}/:major"
+        f"{_snowflake_pattern.sub('/:id', url[match.end():])}"
+    )
+    return f"{method} {route}", match.group(0)
+
+
+class _Bucket:
+    """The state of a single rate limit bucket."""
+
+    __slots__ = ("limit", "remaining", "reset_at", "window")
+
+    def __init__(self) -> None:
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.window = 1.0
+
+    def refill(self, now: float) -> None:
+        """If the bucket's reset time has passed, assume it was refilled and expect the next reset one window later, until a response says otherwise."""
+        if self.reset_at <= now:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+
+
+class RateLimiter:
+    """Paces requests to Discord according to the rate limits it reports in the headers of its responses.
+
+    Before each request, `acquire` should be called, which blocks until the request's bucket has budget left. After each response, `update` should be called with the response's status code and headers, from which the limiter learns the bucket the route belongs to (`X-RateLimit-Bucket`), how many requests it has left (`X-RateLimit-Remaining`) and when it resets (`X-RateLimit-Reset-After`). If a request is rejected anyway, `Retry-After` and `X-RateLimit-Global` are used to wait exactly as long as Discord asked, either for the bucket or for every request made with the same credentials.
+
+    A single instance is thread safe and may be shared between handlers, which is what the handlers do by default so that handlers posting to the same destination don't compete with each other.
+
+    Args:
+        clock (Callable[[], float], optional): A monotonic clock returning seconds. Defaults to `time.monotonic`.
+        sleep (Callable[[float], None], optional): A function that blocks for the given number of seconds. Defaults to `time.sleep`.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__lock = threading.Lock()
+        self.__route_buckets: Dict[Tuple[str, str], str] = {}
+        self.__buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        self.__global_reset_at: Dict[str, float] = {}
+
+    def acquire(self, method: str, url: str, identity: str = "") -> float:
+        """Block until a request may be made without exceeding its rate limit, and reserve that request from the bucket's budget.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL of the request.
+            identity (str, optional): Identifies the credentials the request is made with (for example the bot's authorization header), since global rate limits apply per bot. Defaults to the empty string.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.reserve(method, url, identity)
+            if delay <= 0:
+                return waited
+            self.__sleep(delay)
+            waited += delay
+
+    def reserve(self, method: str, url: str, identity: str = "") -> float:
+        """Try to reserve a request from its bucket's budget without blocking.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL of the request.
+            identity (str, optional): Identifies the credentials the request is made with. Defaults to the empty string.
+
+        Returns:
+            float: Zero if the request was reserved and may be made right away, otherwise the number of seconds to wait before trying again.
+        """
+        with self.__lock:
+            now = self.__clock()
+            global_delay = self.__global_reset_at.get(identity, 0.0) - now
+            if global_delay > 0:
+                return global_delay
+            bucket = self.__bucket(method, url, identity)
+            bucket.refill(now)
+            if bucket.remaining is not None and bucket.remaining <= 0:
+                return bucket.reset_at - now
+            if bucket.remaining is not None:
+                bucket.remaining -= 1
+            return 0.0
+
+    def remaining(self, method: str, url: str, identity: str = "") -> float:
+        """Get how much budget a route has left right now.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL of the request.
+            identity (str, optional): Identifies the credentials the request is made with. Defaults to the empty string.
+
+        Returns:
+            float: The number of requests left before the bucket is exhausted, which is infinite if the limit hasn't been learned yet. Negative values indicate how many seconds remain until an exhausted bucket resets.
+        """
+        with self.__lock:
+            now = self.__clock()
+            global_delay = self.__global_reset_at.get(identity, 0.0) - now
+            if global_delay > 0:
+                return -global_delay
+            bucket = self.__bucket(method, url, identity)
+            bucket.refill(now)
+            if bucket.remaining is None:
+                return float("inf")
+            if bucket.remaining <= 0:
+                return now - bucket.reset_at
+            return float(bucket.remaining)
+
+    def update(
+        self,
+        method: str,
+        url: str,
+        status_code: int,
+        headers: Mapping[str, str],
+        identity: str = "",
+    ) -> Optional[float]:
+        """Learn the state of a route's bucket from the headers of a response.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL of the request.
+            status_code (int): The status code of the response.
+            headers (Mapping[str, str]): The headers of the response. Lookups should be case insensitive, as they are for `requests.Response.headers`.
+            identity (str, optional): Identifies the credentials the request was made with. Defaults to the empty string.
+
+        Returns:
+            Optional[float]: If the request was rejected with a 429 status code, the number of seconds Discord asked to wait, or None if it didn't say. Otherwise None.
+        """
+        route, major = _split_route(method, url)
+        with self.__lock:
+            now = self.__clock()
+            bucket_hash = headers.get("X-RateLimit-Bucket")
+            if (
+                bucket_hash
+                and self.__route_buckets.get((identity, route)) != bucket_hash
+            ):
+                self.__route_buckets[(identity, route)] = bucket_hash
+                old = self.__buckets.pop((identity, route, major), None)
+                self.__buckets.setdefault(
+                    (identity, bucket_hash, major), old or _Bucket()
+                )
+            bucket = self.__bucket(method, url, identity)
+            limit = _to_number(headers.get("X-RateLimit-Limit"))
+            remaining = _to_number(headers.get("X-RateLimit-Remaining"))
+            reset_after = _to_number(headers.get("X-RateLimit-Reset-After"))
+            if limit is not None:
+                bucket.limit = int(limit)
+            if remaining is not None:
+                bucket.remaining = int(remaining)
+            if reset_after is not None:
+                bucket.reset_at = now + reset_after
+                if bucket.remaining == (bucket.limit or 1) - 1:
+                    bucket.window = max(reset_after, 0.001)
+            if status_code != 429:
+                return None
+            retry_after = _to_number(headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = reset_after
+            if retry_after is None:
+                return None
+            if (
+                headers.get("X-RateLimit-Global", "").lower() == "true"
+                or headers.get("X-RateLimit-Scope") == "global"
+            ):
+                self.__global_reset_at[identity] = now + retry_after
+            else:
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+            return retry_after
+
+    def __bucket(self, method: str, url: str, identity: str) -> _Bucket:
+        """Get the bucket that a request belongs to, creating it if it doesn't exist. The lock must be held by the caller."""
+        route, major = _split_route(method, url)
+        key = self.__route_buckets.get((identity, route), route)
+        bucket = self.__buckets.get((identity, key, major))
+        if bucket is None:
+            bucket = self.__buckets[(identity, key, major)] = _Bucket()
+        return bucket
+
+
+def _to_number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Tuple
+
+
+def fingerprint(record: logging.LogRecord) -> Tuple[Hashable, ...]:
+    """Identify the statement that logged a record, so that records logged repeatedly by the same statement can be recognised as duplicates.
+
+    Args:
+        record (logging.LogRecord): The record to fingerprint.
+
+    Returns:
+        Tuple[Hashable, ...]: The logger name, level, message template (before the arguments are merged in), path and line number of the record.
+    """
+    msg = record.msg if isinstance(record.msg, str) else str(record.msg)
+    return (record.name, record.levelno, msg, record.pathname, record.lineno)
+
+
+class _Occurrences:
+    """The occurrences of a fingerprint within the current window."""
+
+    __slots__ = ("started", "repeats", "last")
+
+    def __init__(self, started: float, record: logging.LogRecord) -> None:
+        self.started = started
+        self.repeats = 0
+        self.last = record
+
+
+class RecordAggregator:
+    """Suppresses duplicate records, reporting how many times they were repeated instead.
+
+    The first record with a given `fingerprint` is let through right away. Any more records with the same fingerprint within `window` seconds of it are only counted, and once the window is over, a single record reporting how many times it was repeated is produced in their place. The next duplicate after that starts a new window.
+
+    Only the `max_fingerprints` most recently seen fingerprints are remembered. When one is forgotten, its repeats are reported straight away.
+
+    Args:
+        window (float): The number of seconds after a record is let through during which its duplicates are suppressed.
+        max_fingerprints (int, optional): The maximum number of fingerprints to remember. Defaults to 1024.
+        clock (Callable[[], float], optional): A monotonic clock returning seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_fingerprints: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__window = window
+        self.__max_fingerprints = max_fingerprints
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__occurrences: "OrderedDict[Tuple[Hashable, ...], _Occurrences]" = (
+            OrderedDict()
+        )
+        self.__evicted: List[logging.LogRecord] = []
+        self.__suppressed_total = 0
+
+    @property
+    def window(self) -> float:
+        """The number of seconds during which duplicates of a record are suppressed."""
+        return self.__window
+
+    @property
+    def suppressed_total(self) -> int:
+        """The total number of records that have been suppressed as duplicates."""
+        return self.__suppressed_total
+
+    def add(self, record: logging.LogRecord) -> bool:
+        """Register a record and decide whether it should be sent.
+
+        Args:
+            record (logging.LogRecord): The record that was logged.
+
+        Returns:
+            bool: True if the record should be sent, or False if it is a duplicate which has been counted instead.
+        """
+        key = fingerprint(record)
+        with self.__lock:
+            now = self.__clock()
+            occurrences = self.__occurrences.get(key)
+            if occurrences and now - occurrences.started < self.__window:
+                occurrences.repeats += 1
+                self.__suppressed_total += 1
+                occurrences.last = record
+                self.__occurrences.move_to_end(key)
+                return False
+            if occurrences and occurrences.repeats:
+                self.__evicted.append(self.__summary(occurrences, now))
+            self.__occurrences[key] = _Occurrences(now, record)
+            self.__occurrences.move_to_end(key)
+            if len(self.__occurrences) > self.__max_fingerprints:
+                _, oldest = self.__occurrences.popitem(last=False)
+                if oldest.repeats:
+                    self.__evicted.append(self.__summary(oldest, now))
+            return True
+
+    def summaries(self, flush: bool = False) -> List[logging.LogRecord]:
+        """Get the records reporting the repeats of every fingerprint whose window is over.
+
+        Args:
+            flush (bool, optional): Whether to report the repeats of every fingerprint, even if its window isn't over yet. Defaults to False.
+
+        Returns:
+            List[logging.LogRecord]: The records to send, each a copy of the last repeated record with a note of how many times it was repeated.
+        """
+        with self.__lock:
+            now = self.__clock()
+            summaries, self.__evicted = self.__evicted, []
+            for key, occurrences in list(self.__occurrences.items()):
+                expired = now - occurrences.started >= self.__window
+                if occurrences.repeats and (expired or flush):
+                    summaries.append(self.__summary(occurrences, now))
+                    occurrences.repeats = 0
+                if expired:
+                    del self.__occurrences[key]
+            return summaries
+
+    @staticmethod
+    def __summary(occurrences: _Occurrences, now: float) -> logging.LogRecord:
+        """Create a record reporting how many times a record was repeated."""
+        summary = logging.makeLogRecord(occurrences.last.__dict__)
+        summary.msg = (
+            f"{occurrences.last.getMessage()} (repeated {occurrences.repeats} more"
+            f" time{'s' if occurrences.repeats != 1 else ''} in"
+            f" {now - occurrences.started:.1f} seconds)"
+        )
+        summary.args = None
+        summary.exc_info = None
+        summary.exc_text = None
+        return summary
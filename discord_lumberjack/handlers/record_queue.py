@@ -0,0 +1,346 @@
+import itertools
+import logging
+import threading
+from bisect import bisect_right
+from collections import Counter, deque
+from enum import Enum
+from queue import Empty
+from typing import Deque, Dict, List, Optional, Sequence
+
+_record_overhead = 512
+
+
+def estimate_size(record: logging.LogRecord) -> int:
+    """Cheaply estimate how many bytes of memory a queued log record keeps alive.
+
+    This is only an estimate, based on the length of the message and the number of arguments, plus a generous allowance for exception information, since computing the real size would cost much more than the estimate is worth.
+
+    Args:
+        record (logging.LogRecord): The record to estimate the size of.
+
+    Returns:
+        int: The estimated size of the record in bytes.
+    """
+    size = _record_overhead + 64 * len(record.args or ())
+    if isinstance(record.msg, str):
+        size += len(record.msg)
+    if record.exc_info or record.exc_text:
+        size += 4096
+    return size
+
+
+class OverflowPolicy(Enum):
+    """What a `RecordQueue` does with a record that doesn't fit."""
+
+    BLOCK = "block"
+    """Block the logging thread until there is room, or until the queue's `block_timeout` expires, in which case the new record is dropped."""
+
+    DROP_NEWEST = "drop_newest"
+    """Drop the new record."""
+
+    DROP_OLDEST = "drop_oldest"
+    """Drop the oldest queued records until the new one fits."""
+
+    DROP_LOWEST_LEVEL = "drop_lowest_level"
+    """Drop the oldest queued records of the lowest level until the new one fits, as long as their level is no higher than the new record's. Otherwise drop the new record."""
+
+
+class _Entry:
+    """A queued record, with its estimated size, whether it may be dropped, and its position in the order records were added."""
+
+    __slots__ = ("record", "size", "droppable", "position")
+
+    def __init__(
+        self, record: logging.LogRecord, size: int, droppable: bool, position: int
+    ) -> None:
+        self.record: Optional[logging.LogRecord] = record
+        """The record, or None once it was dropped, in which case the entry is skipped when it reaches the front of its lane."""
+        self.size = size
+        self.droppable = droppable
+        self.position = position
+
+
+class RecordQueue:
+    """A FIFO queue of log records which may be bounded both by the number of records and by their estimated size in bytes.
+
+    The queue may be divided into priority lanes by level, so that records of higher levels are taken before any records of lower levels, however many of them are waiting. Within each lane, records are taken in the order they were added. So that lower lanes aren't starved forever, once `starvation_limit` records in a row have been taken ahead of an older record, the oldest record is taken next.
+
+    When a record doesn't fit, the queue's `OverflowPolicy` decides which record is dropped. The records that may be dropped are also kept in a deque per level, so the next one to drop is found without looking through the queue. Dropped records are counted by level so that the consumer can report them.
+
+    Like `queue.Queue`, the queue keeps track of unfinished tasks, so that `join` can wait until every record put into it has been processed.
+
+    Threads waiting for records or for room are only woken when some are actually waiting, so adding a record to a queue with no bounds costs little more than appending it to a deque under a lock.
+
+    Args:
+        max_records (int, optional): The maximum number of records in the queue. Defaults to 0, which means there is no limit.
+        max_bytes (int, optional): The maximum total estimated size of the records in the queue, in bytes. Defaults to 0, which means there is no limit.
+        policy (OverflowPolicy, optional): What to do when a record doesn't fit. Defaults to `OverflowPolicy.DROP_LOWEST_LEVEL`.
+        block_timeout (float, optional): When the policy is `OverflowPolicy.BLOCK`, the maximum number of seconds to wait for room, or None to wait indefinitely. Defaults to None.
+        priority_levels (Sequence[int], optional): The lowest level of each priority lane above the first. For example, `(logging.WARNING, logging.ERROR)` makes three lanes: one for records below WARNING, one for WARNING and one for ERROR and above. Defaults to no levels, which keeps all the records in a single lane.
+        starvation_limit (int, optional): The number of records in a row that may be taken from higher lanes while an older record waits in a lower lane. Defaults to 0, which means there is no limit.
+    """
+
+    def __init__(
+        self,
+        max_records: int = 0,
+        max_bytes: int = 0,
+        policy: OverflowPolicy = OverflowPolicy.DROP_LOWEST_LEVEL,
+        block_timeout: Optional[float] = None,
+        priority_levels: Sequence[int] = (),
+        starvation_limit: int = 0,
+    ) -> None:
+        self.__max_records = max_records
+        self.__max_bytes = max_bytes
+        self.__policy = policy
+        self.__block_timeout = block_timeout
+        self.__priority_levels = sorted(priority_levels)
+        self.__starvation_limit = starvation_limit
+        self.__lanes: List[Deque[_Entry]] = [
+            deque() for _ in range(len(self.__priority_levels) + 1)
+        ]
+        self.__victims: Dict[int, Deque[_Entry]] = {}
+        self.__tracks_victims = bool(max_records or max_bytes) and policy in (
+            OverflowPolicy.DROP_OLDEST,
+            OverflowPolicy.DROP_LOWEST_LEVEL,
+        )
+        self.__dead = 0
+        self.__count = 0
+        self.__positions = itertools.count()
+        self.__streak = 0
+        self.__bytes = 0
+        self.__unfinished = 0
+        self.__dropped: Dict[str, int] = Counter()
+        self.__dropped_total = 0
+        self.__high_water = 0
+        self.__enqueued_total = 0
+        self.__waiting_getters = 0
+        self.__waiting_putters = 0
+        self.__lock = threading.Lock()
+        self.__not_empty = threading.Condition(self.__lock)
+        self.__not_full = threading.Condition(self.__lock)
+        self.__all_tasks_done = threading.Condition(self.__lock)
+
+    def put(self, record: logging.LogRecord, force: bool = False) -> bool:
+        """Add a record to the end of the queue, applying the overflow policy if it doesn't fit.
+
+        Args:
+            record (logging.LogRecord): The record to add.
+            force (bool, optional): Whether to add the record even if the queue is full, without dropping anything. A record added this way is never dropped to make room for others. Defaults to False.
+
+        Returns:
+            bool: Whether the record was added. If not, it was dropped and counted as such.
+        """
+        size = estimate_size(record) if self.__max_bytes else 0
+        with self.__lock:
+            if (
+                not force
+                and (self.__max_records or self.__max_bytes)
+                and not self.__make_room(record, size)
+            ):
+                self.__dropped[record.levelname] += 1
+                self.__dropped_total += 1
+                return False
+            lanes = self.__lanes
+            lane = (
+                lanes[bisect_right(self.__priority_levels, record.levelno)]
+                if len(lanes) > 1
+                else lanes[0]
+            )
+            entry = _Entry(record, size, not force, next(self.__positions))
+            lane.append(entry)
+            if self.__tracks_victims and not force:
+                victims = self.__victims.get(record.levelno)
+                if victims is None:
+                    victims = self.__victims[record.levelno] = deque()
+                victims.append(entry)
+            self.__count += 1
+            self.__bytes += size
+            self.__unfinished += 1
+            self.__enqueued_total += not force
+            if self.__count > self.__high_water:
+                self.__high_water = self.__count
+            if self.__waiting_getters:
+                self.__not_empty.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> logging.LogRecord:
+        """Remove and return the record at the front of the highest non-empty lane, waiting for one to be added if necessary.
+
+        Args:
+            timeout (Optional[float], optional): The maximum number of seconds to wait, or None to wait indefinitely. Defaults to None.
+
+        Returns:
+            logging.LogRecord: The next record in the queue.
+
+        Raises:
+            queue.Empty: If no record was available within the timeout.
+        """
+        with self.__not_empty:
+            if not self.__count:
+                self.__waiting_getters += 1
+                try:
+                    if not self.__not_empty.wait_for(lambda: self.__count, timeout):
+                        raise Empty
+                finally:
+                    self.__waiting_getters -= 1
+            return self.__pop()
+
+    def get_nowait(self) -> logging.LogRecord:
+        """Remove and return the record at the front of the highest non-empty lane without waiting.
+
+        Returns:
+            logging.LogRecord: The next record in the queue.
+
+        Raises:
+            queue.Empty: If the queue is empty.
+        """
+        with self.__lock:
+            if not self.__count:
+                raise Empty
+            return self.__pop()
+
+    def task_done(self) -> None:
+        """Indicate that a record obtained from the queue has been processed."""
+        with self.__lock:
+            self.__unfinished -= 1
+            if self.__unfinished <= 0:
+                self.__all_tasks_done.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record that was added to the queue has been processed.
+
+        Args:
+            timeout (Optional[float], optional): The maximum number of seconds to wait, or None to wait indefinitely. Defaults to None.
+
+        Returns:
+            bool: Whether all the records have been processed.
+        """
+        with self.__all_tasks_done:
+            return self.__all_tasks_done.wait_for(
+                lambda: self.__unfinished <= 0, timeout
+            )
+
+    def qsize(self) -> int:
+        """Get the number of records in the queue."""
+        return self.__count
+
+    @property
+    def high_water(self) -> int:
+        """The largest number of records that have been in the queue at once."""
+        return self.__high_water
+
+    @property
+    def enqueued_total(self) -> int:
+        """The total number of records that have been added to the queue."""
+        return self.__enqueued_total
+
+    @property
+    def dropped_total(self) -> int:
+        """The total number of records that have been dropped."""
+        return self.__dropped_total
+
+    def take_dropped(self) -> Dict[str, int]:
+        """Get the number of records dropped since the last call, by level name, and reset the count.
+
+        Returns:
+            Dict[str, int]: The number of dropped records of each level that had any.
+        """
+        with self.__lock:
+            dropped, self.__dropped = self.__dropped, Counter()
+            return dict(dropped)
+
+    def __full(self, size: int) -> bool:
+        return bool(
+            self.__max_records
+            and self.__count >= self.__max_records
+            or self.__max_bytes
+            and self.__count
+            and self.__bytes + size > self.__max_bytes
+        )
+
+    def __make_room(self, record: logging.LogRecord, size: int) -> bool:
+        """Apply the overflow policy until the record fits. The lock must be held by the caller.
+
+        Returns:
+            bool: Whether the record now fits.
+        """
+        if not self.__full(size):
+            return True
+        if self.__policy is OverflowPolicy.BLOCK:
+            self.__waiting_putters += 1
+            try:
+                return self.__not_full.wait_for(
+                    lambda: not self.__full(size), self.__block_timeout
+                )
+            finally:
+                self.__waiting_putters -= 1
+        if self.__policy is OverflowPolicy.DROP_NEWEST:
+            return False
+        while self.__full(size):
+            if not self.__victims:
+                return False
+            if self.__policy is OverflowPolicy.DROP_LOWEST_LEVEL:
+                level = min(self.__victims)
+                if level > record.levelno:
+                    return False
+            else:
+                level = min(self.__victims, key=lambda l: self.__victims[l][0].position)
+            self.__drop(level)
+        return True
+
+    def __drop(self, level: int) -> None:
+        """Drop the oldest droppable record of a level. It is left in its lane, marked as dropped, until it reaches the front or until there are more dropped entries than records, when the lanes are compacted. The lock must be held by the caller."""
+        victims = self.__victims[level]
+        entry = victims.popleft()
+        if not victims:
+            del self.__victims[level]
+        dropped, entry.record = entry.record, None
+        assert dropped
+        self.__dead += 1
+        self.__count -= 1
+        self.__bytes -= entry.size
+        if self.__dead > self.__count:
+            for i, lane in enumerate(self.__lanes):
+                self.__lanes[i] = deque(e for e in lane if e.record is not None)
+            self.__dead = 0
+        self.__unfinished -= 1
+        self.__dropped[dropped.levelname] += 1
+        self.__dropped_total += 1
+        if self.__unfinished <= 0:
+            self.__all_tasks_done.notify_all()
+
+    def __pop(self) -> logging.LogRecord:
+        """Remove the next record: the first of the highest non-empty lane, unless the oldest record has been passed over `starvation_limit` times in a row. The lock must be held by the caller."""
+        lanes = self.__lanes
+        if self.__dead:
+            for candidate in lanes:
+                while candidate and candidate[0].record is None:
+                    candidate.popleft()
+                    self.__dead -= 1
+        if len(lanes) == 1:
+            lane = lanes[0]
+        else:
+            lane = oldest = lanes[0]
+            for candidate in lanes:
+                if candidate:
+                    lane = candidate
+                    if not oldest or candidate[0].position < oldest[0].position:
+                        oldest = candidate
+            if oldest is lane:
+                self.__streak = 0
+            elif self.__starvation_limit and self.__streak >= self.__starvation_limit:
+                lane = oldest
+                self.__streak = 0
+            else:
+                self.__streak += 1
+        entry = lane.popleft()
+        if self.__tracks_victims and entry.droppable:
+            victims = self.__victims[entry.record.levelno]  # type: ignore
+            victims.popleft()
+            if not victims:
+                del self.__victims[entry.record.levelno]  # type: ignore
+        self.__count -= 1
+        self.__bytes -= entry.size
+        if self.__waiting_putters:
+            self.__not_full.notify()
+        return entry.record  # type: ignore
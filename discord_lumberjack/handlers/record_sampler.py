@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+
+class RecordSampler:
+    """Samples records of low levels when more records are logged than can be sent, so that the queue's lag stays bounded instead of growing for as long as the load lasts.
+
+    The rate at which records arrive at each level and the rate at which they are sent are measured every `interval` seconds. When the queue holds more than `target_lag` seconds' worth of records, each level below `max_level` is given a probability with which its records are kept, such that the records kept fit in what can be sent, with room left to drain the backlog. The levels are considered from the highest, so the lowest levels are sampled the most. When the lag falls below half the target, the probabilities are relaxed, doubling with each interval. Records of `max_level` or above are always kept. Nothing is sampled until some records have been sent, since until then there is no telling how fast they can be.
+
+    Rather than at random, the records of each level are kept evenly: with a probability of 1/4, every fourth record is kept.
+
+    Args:
+        target_lag (float): The number of seconds' worth of records above which the queue is considered backlogged.
+        depth (Callable[[], int]): A function returning the number of records currently queued.
+        max_level (int, optional): The lowest level whose records are always kept. It is never above ERROR. Defaults to WARNING.
+        min_probability (float, optional): The lowest probability with which records are kept. Defaults to 0.01.
+        interval (float, optional): The number of seconds between updates of the probabilities. Defaults to 1.
+        clock (Callable[[], float], optional): A monotonic clock returning seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(
+        self,
+        target_lag: float,
+        depth: Callable[[], int],
+        max_level: int = logging.WARNING,
+        min_probability: float = 0.01,
+        interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__target_lag = target_lag
+        self.__depth = depth
+        self.__max_level = min(max_level, logging.ERROR)
+        self.__min_probability = min_probability
+        self.__interval = interval
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__arrivals: Dict[int, int] = Counter()
+        self.__drained = 0
+        self.__drain_rate: Optional[float] = None
+        self.__probabilities: Dict[int, float] = {}
+        self.__credits: Dict[int, float] = Counter()
+        self.__last_update = clock()
+        self.__sampled_out_total = 0
+
+    @property
+    def sampled_out_total(self) -> int:
+        """The total number of records that were not kept."""
+        return self.__sampled_out_total
+
+    @property
+    def probabilities(self) -> Dict[int, float]:
+        """The probability with which the records of each sampled level are currently kept, by level. Levels that are not listed are always kept."""
+        return {level: p for level, p in self.__probabilities.items() if p < 1}
+
+    def sample(self, record: logging.LogRecord) -> int:
+        """Count a record that was logged and decide whether it should be kept.
+
+        Args:
+            record (logging.LogRecord): The record that was logged.
+
+        Returns:
+            int: 0 if the record should not be kept, otherwise roughly how many records it stands for, which is 1 unless its level is being sampled.
+        """
+        level = record.levelno
+        with self.__lock:
+            self.__arrivals[level] += 1
+            if self.__clock() - self.__last_update >= self.__interval:
+                self.__update()
+            if level >= self.__max_level:
+                return 1
+            probability = self.__probabilities.get(level, 1.0)
+            if probability >= 1:
+                return 1
+            credit = self.__credits[level] + probability
+            if credit < 1:
+                self.__credits[level] = credit
+                self.__sampled_out_total += 1
+                return 0
+            self.__credits[level] = credit - 1
+            return round(1 / probability)
+
+    def drained(self, count: int) -> None:
+        """Count records that were taken from the queue.
+
+        Args:
+            count (int): The number of records.
+        """
+        with self.__lock:
+            self.__drained += count
+
+    def __update(self) -> None:
+        """Measure the rates since the last update and adjust the probabilities. The lock must be held by the caller."""
+        now = self.__clock()
+        elapsed = now - self.__last_update
+        self.__last_update = now
+        rates = {level: n / elapsed for level, n in self.__arrivals.items()}
+        self.__arrivals.clear()
+        drain_rate = self.__drained / elapsed
+        self.__drained = 0
+        if self.__drain_rate is None:
+            if not drain_rate:
+                return
+            self.__drain_rate = drain_rate
+        else:
+            self.__drain_rate = (self.__drain_rate + drain_rate) / 2
+        depth = self.__depth()
+        target_depth = self.__target_lag * self.__drain_rate
+        if depth <= target_depth / 2:
+            self.__probabilities = {
+                level: min(1.0, p * 2) for level, p in self.__probabilities.items()
+            }
+            return
+        if depth <= target_depth:
+            return
+        budget = self.__drain_rate * target_depth / depth - sum(
+            rate for level, rate in rates.items() if level >= self.__max_level
+        )
+        probabilities: Dict[int, float] = {}
+        for level in sorted(
+            (level for level in rates if level < self.__max_level), reverse=True
+        ):
+            probability = max(
+                self.__min_probability, min(1.0, max(budget, 0) / rates[level])
+            )
+            probabilities[level] = min(
+                probability, self.__probabilities.get(level, 1.0)
+            )
+            budget -= rates[level] * probability
+        self.__probabilities = probabilities
+
+
+def annotate(record: logging.LogRecord, weight: int) -> logging.LogRecord:
+    """Create a copy of a sampled record noting how many records it stands for.
+
+    Args:
+        record (logging.LogRecord): The record that was kept.
+        weight (int): Roughly how many records it stands for.
+
+    Returns:
+        logging.LogRecord: The annotated copy.
+    """
+    annotated = logging.makeLogRecord(record.__dict__)
+    annotated.msg = f"{record.getMessage()} (1 of ~{weight} similar records shown)"
+    annotated.args = None
+    return annotated
@@ -0,0 +1,387 @@
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_right
+from collections import Counter, deque
+from queue import Empty
+from typing import IO, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_header = struct.Struct("<II")
+"""Each entry in a segment is the length and CRC-32 of the serialized record, followed by the record itself."""
+_segment_suffix = ".spool"
+_ack_file_name = "ack"
+_acks_per_persist = 100
+_formatter = logging.Formatter()
+
+
+def serialize_record(record: logging.LogRecord) -> bytes:
+    """Serialize a log record so that it can be written to a spool.
+
+    The message is merged with its arguments and exception information is formatted into `exc_text`, since neither the arguments nor the exception can be serialized in general. Any other attributes that aren't strings, numbers, booleans or None are left out.
+
+    Args:
+        record (logging.LogRecord): The record to serialize.
+
+    Returns:
+        bytes: The serialized record.
+    """
+    attributes = {
+        key: value
+        for key, value in record.__dict__.items()
+        if value is None or isinstance(value, (str, int, float, bool))
+    }
+    attributes["msg"] = record.getMessage()
+    attributes["args"] = None
+    attributes["exc_info"] = None
+    if record.exc_info and not record.exc_text:
+        attributes["exc_text"] = _formatter.formatException(record.exc_info)
+    return json.dumps(attributes, separators=(",", ":"), default=str).encode()
+
+
+def deserialize_record(data: bytes) -> logging.LogRecord:
+    """Recreate a log record serialized by `serialize_record`.
+
+    Args:
+        data (bytes): The serialized record.
+
+    Returns:
+        logging.LogRecord: The record.
+    """
+    return logging.makeLogRecord(json.loads(data))
+
+
+class RecordSpool:
+    """A queue of log records kept on disk, so that records survive the process being killed and don't take up memory while Discord can't be reached.
+
+    It has the same interface as `RecordQueue`, so a `DiscordHandler` can use either. Records are appended to segment files in a directory, each named after the offset of its first byte in the spool as a whole. When a segment grows beyond `segment_bytes`, a new one is started. Every record is handed to the operating system as soon as it is written, so it survives the process crashing, and with `fsync` it also survives the machine crashing.
+
+    The consumer reads the records in order, and acknowledges each one by calling `task_done`, which records the offset up to which every record has been processed. This offset is saved in an "ack" file every so often and when the queue empties, so when a spool is opened again, the records after it are replayed. Records may therefore be sent twice if the process is killed, but never lost.
+
+    Segments whose records have all been acknowledged are deleted by `compact`, which is called whenever a segment is full. If the spool would grow beyond `max_bytes` even after compacting, new records are dropped and counted like in a `RecordQueue` with `OverflowPolicy.DROP_NEWEST`.
+
+    Records are serialized with `serialize_record`, so the records read back are copies with their messages already formatted and any exception information in `exc_text`. Records put with `force=True` (such as a handler's sentinel) are kept in memory instead, and returned once every record written before them has been read.
+
+    Only one spool may use a directory at a time.
+
+    Args:
+        directory (str): The directory to keep the segment files in. It is created if it doesn't exist.
+        segment_bytes (int, optional): The size in bytes after which a new segment is started. Defaults to 4 MiB.
+        max_bytes (int, optional): The maximum total size in bytes of the segments, or 0 for no limit. Defaults to 256 MiB.
+        fsync (bool, optional): Whether to force every record onto the disk before `put` returns. This protects against power loss, but makes logging much slower. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 4 * 1024 * 1024,
+        max_bytes: int = 256 * 1024 * 1024,
+        fsync: bool = False,
+    ) -> None:
+        self.__directory = directory
+        self.__segment_bytes = segment_bytes
+        self.__max_bytes = max_bytes
+        self.__fsync = fsync
+        self.__lock = threading.Lock()
+        self.__not_empty = threading.Condition(self.__lock)
+        self.__all_tasks_done = threading.Condition(self.__lock)
+        self.__waiting_getters = 0
+        self.__forced: Deque[Tuple[int, logging.LogRecord]] = deque()
+        self.__outstanding: Deque[Optional[int]] = deque()
+        self.__dropped: Dict[str, int] = Counter()
+        self.__dropped_total = 0
+        self.__enqueued_total = 0
+        self.__high_water = 0
+        self.__acks_since_persist = 0
+        self.__reader: Optional[IO[bytes]] = None
+        self.__reader_segment = -1
+        self.__reader_offset = -1
+        os.makedirs(directory, exist_ok=True)
+        self.__segments = sorted(
+            int(name[: -len(_segment_suffix)])
+            for name in os.listdir(directory)
+            if name.endswith(_segment_suffix)
+        )
+        self.__acked = self.__read_ack()
+        if not self.__segments:
+            self.__segments = [self.__acked]
+        self.__write_offset = self.__segments[-1] + self.__recover(self.__segments[-1])
+        self.__acked = min(max(self.__acked, self.__segments[0]), self.__write_offset)
+        self.__read_offset = self.__acked
+        self.__pending = self.__count(self.__read_offset, self.__write_offset)
+        self.__unfinished = self.__pending
+        self.__writer = open(self.__path(self.__segments[-1]), "ab")
+        if self.__pending:
+            logger.info(
+                f"Spool: Replaying {self.__pending} unsent record(s) from {directory}."
+            )
+
+    def put(self, record: logging.LogRecord, force: bool = False) -> bool:
+        """Append a record to the spool, unless it is full.
+
+        Args:
+            record (logging.LogRecord): The record to add.
+            force (bool, optional): Whether to keep the record in memory rather than writing it to disk. Such a record is never dropped. Defaults to False.
+
+        Returns:
+            bool: Whether the record was added. If not, it was dropped and counted as such.
+        """
+        if force:
+            with self.__lock:
+                self.__forced.append((self.__write_offset, record))
+                self.__added()
+            return True
+        data = serialize_record(record)
+        entry = _header.pack(len(data), zlib.crc32(data)) + data
+        with self.__lock:
+            if self.__max_bytes and self.__size() + len(entry) > self.__max_bytes:
+                if self.__segments[-1] < self.__acked == self.__write_offset:
+                    self.__rotate()
+                else:
+                    self.__compact()
+                if self.__size() + len(entry) > self.__max_bytes:
+                    self.__dropped[record.levelname] += 1
+                    self.__dropped_total += 1
+                    return False
+            if self.__write_offset - self.__segments[-1] >= self.__segment_bytes:
+                self.__rotate()
+            self.__writer.write(entry)
+            self.__writer.flush()
+            if self.__fsync:
+                os.fsync(self.__writer.fileno())
+            self.__write_offset += len(entry)
+            self.__pending += 1
+            self.__enqueued_total += 1
+            self.__added()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> logging.LogRecord:
+        """Read the next record, waiting for one to be added if necessary.
+
+        Args:
+            timeout (Optional[float], optional): The maximum number of seconds to wait, or None to wait indefinitely. Defaults to None.
+
+        Returns:
+            logging.LogRecord: The oldest record that hasn't been read.
+
+        Raises:
+            queue.Empty: If no record was available within the timeout.
+        """
+        with self.__not_empty:
+            if not self.__available():
+                self.__waiting_getters += 1
+                try:
+                    if not self.__not_empty.wait_for(self.__available, timeout):
+                        raise Empty
+                finally:
+                    self.__waiting_getters -= 1
+            return self.__pop()
+
+    def get_nowait(self) -> logging.LogRecord:
+        """Read the next record without waiting.
+
+        Returns:
+            logging.LogRecord: The oldest record that hasn't been read.
+
+        Raises:
+            queue.Empty: If there are no records to read.
+        """
+        with self.__lock:
+            if not self.__available():
+                raise Empty
+            return self.__pop()
+
+    def task_done(self) -> None:
+        """Acknowledge the oldest record that was read but not yet acknowledged, indicating that it has been processed and need not be replayed."""
+        with self.__lock:
+            offset = self.__outstanding.popleft()
+            if offset is not None:
+                self.__acked = offset
+                self.__acks_since_persist += 1
+                if not self.__outstanding or (
+                    self.__acks_since_persist >= _acks_per_persist
+                ):
+                    self.__persist_ack()
+            self.__unfinished -= 1
+            if self.__unfinished <= 0:
+                self.__all_tasks_done.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record in the spool has been acknowledged.
+
+        Args:
+            timeout (Optional[float], optional): The maximum number of seconds to wait, or None to wait indefinitely. Defaults to None.
+
+        Returns:
+            bool: Whether all the records have been acknowledged.
+        """
+        with self.__all_tasks_done:
+            return self.__all_tasks_done.wait_for(
+                lambda: self.__unfinished <= 0, timeout
+            )
+
+    def qsize(self) -> int:
+        """Get the number of records that haven't been read yet."""
+        return self.__pending + len(self.__forced)
+
+    @property
+    def high_water(self) -> int:
+        """The largest number of records that have been waiting to be read at once."""
+        return self.__high_water
+
+    @property
+    def enqueued_total(self) -> int:
+        """The total number of records that have been written to the spool since it was opened."""
+        return self.__enqueued_total
+
+    @property
+    def dropped_total(self) -> int:
+        """The total number of records that have been dropped because the spool was full."""
+        return self.__dropped_total
+
+    @property
+    def size(self) -> int:
+        """The total size of the segments in bytes."""
+        return self.__size()
+
+    def take_dropped(self) -> Dict[str, int]:
+        """Get the number of records dropped since the last call, by level name, and reset the count.
+
+        Returns:
+            Dict[str, int]: The number of dropped records of each level that had any.
+        """
+        with self.__lock:
+            dropped, self.__dropped = self.__dropped, Counter()
+            return dict(dropped)
+
+    def compact(self) -> None:
+        """Save the acknowledged offset and delete the segments whose records have all been acknowledged."""
+        with self.__lock:
+            self.__compact()
+
+    def close(self) -> None:
+        """Save the acknowledged offset and close the segment files. Records that weren't acknowledged will be replayed when the spool is opened again."""
+        with self.__lock:
+            self.__persist_ack()
+            self.__writer.close()
+            if self.__reader:
+                self.__reader.close()
+                self.__reader = None
+
+    def __path(self, segment: int) -> str:
+        return os.path.join(self.__directory, f"{segment:020d}{_segment_suffix}")
+
+    def __size(self) -> int:
+        return self.__write_offset - self.__segments[0]
+
+    def __added(self) -> None:
+        """Update the counters after a record was added. The lock must be held by the caller."""
+        self.__unfinished += 1
+        if self.qsize() > self.__high_water:
+            self.__high_water = self.qsize()
+        if self.__waiting_getters:
+            self.__not_empty.notify()
+
+    def __available(self) -> bool:
+        return bool(self.__forced and self.__forced[0][0] <= self.__read_offset) or (
+            self.__read_offset < self.__write_offset
+        )
+
+    def __pop(self) -> logging.LogRecord:
+        """Read the next record. The lock must be held by the caller, and a record must be available."""
+        if self.__forced and self.__forced[0][0] <= self.__read_offset:
+            self.__outstanding.append(None)
+            return self.__forced.popleft()[1]
+        data = self.__read_entry(self.__read_offset)
+        self.__read_offset += _header.size + len(data)
+        self.__pending -= 1
+        self.__outstanding.append(self.__read_offset)
+        return deserialize_record(data)
+
+    def __read_entry(self, offset: int) -> bytes:
+        """Read the serialized record at an offset, opening the segment containing it if necessary."""
+        segment = self.__segments[bisect_right(self.__segments, offset) - 1]
+        if self.__reader is None or self.__reader_segment != segment:
+            if self.__reader:
+                self.__reader.close()
+            self.__reader = open(self.__path(segment), "rb")
+            self.__reader_segment = segment
+            self.__reader_offset = segment
+        if self.__reader_offset != offset:
+            self.__reader.seek(offset - segment)
+        length, _ = _header.unpack(self.__reader.read(_header.size))
+        data = self.__reader.read(length)
+        self.__reader_offset = offset + _header.size + length
+        return data
+
+    def __rotate(self) -> None:
+        """Start a new segment, and delete the segments that are no longer needed. The lock must be held by the caller."""
+        self.__writer.close()
+        self.__segments.append(self.__write_offset)
+        self.__writer = open(self.__path(self.__write_offset), "ab")
+        self.__compact()
+
+    def __compact(self) -> None:
+        """Delete the segments whose records have all been acknowledged. The lock must be held by the caller."""
+        self.__persist_ack()
+        while len(self.__segments) > 1 and self.__segments[1] <= self.__acked:
+            segment = self.__segments.pop(0)
+            if self.__reader_segment == segment and self.__reader:
+                self.__reader.close()
+                self.__reader = None
+                self.__reader_segment = -1
+            os.remove(self.__path(segment))
+
+    def __persist_ack(self) -> None:
+        """Save the acknowledged offset, replacing the previous one atomically."""
+        path = os.path.join(self.__directory, _ack_file_name)
+        with open(f"{path}.tmp", "w") as file:
+            file.write(str(self.__acked))
+        os.replace(f"{path}.tmp", path)
+        self.__acks_since_persist = 0
+
+    def __read_ack(self) -> int:
+        try:
+            with open(os.path.join(self.__directory, _ack_file_name)) as file:
+                return int(file.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def __recover(self, segment: int) -> int:
+        """Find the end of the last complete entry in a segment, truncating anything after it, which is what is left of a write interrupted by a crash.
+
+        Returns:
+            int: The size of the segment's valid entries in bytes.
+        """
+        path = self.__path(segment)
+        valid = 0
+        try:
+            with open(path, "rb") as file:
+                while True:
+                    header = file.read(_header.size)
+                    if len(header) < _header.size:
+                        break
+                    length, crc = _header.unpack(header)
+                    data = file.read(length)
+                    if len(data) < length or zlib.crc32(data) != crc:
+                        break
+                    valid += _header.size + length
+        except FileNotFoundError:
+            return 0
+        if valid != os.path.getsize(path):
+            logger.warning(f"Spool: Truncating an incomplete record in {path}.")
+            os.truncate(path, valid)
+        return valid
+
+    def __count(self, start: int, end: int) -> int:
+        """Count the entries between two offsets. The spool must not be in use by other threads yet."""
+        count = 0
+        offset = start
+        while offset < end:
+            offset += _header.size + len(self.__read_entry(offset))
+            count += 1
+        return count
@@ -10,9 +10,13 @@ from .message_creator import MessageCreator
 from .basic_message_creator import BasicMessageCreator
 from .embed_message_creator import EmbedMessageCreator
 from .embed_long_message_creator import EmbedLongMessageCreator
+from .attachment import Attachment
+from .attachment_message_creator import AttachmentMessageCreator
 
 __all__ = (
     "MessageCreator",
     "BasicMessageCreator",
     "EmbedMessageCreator",
+    "Attachment",
+    "AttachmentMessageCreator",
 )
@@ -0,0 +1,17 @@
+from typing import NamedTuple
+
+
+class Attachment(NamedTuple):
+    """A file to upload along with a message.
+
+    Message creators may put a list of attachments in the `files` key of a message, and the handlers will send that message as `multipart/form-data`, with the rest of the message as its JSON payload.
+    """
+
+    filename: str
+    """The name of the file, as shown in Discord."""
+
+    content: bytes
+    """The contents of the file."""
+
+    content_type: str = "text/plain"
+    """The MIME type of the file."""
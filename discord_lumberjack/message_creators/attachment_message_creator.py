@@ -0,0 +1,127 @@
+import gzip
+import logging
+from logging import LogRecord
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+from .attachment import Attachment
+from .basic_message_creator import BasicMessageCreator
+from .message_creator import MessageCreator
+
+
+class AttachmentMessageCreator(MessageCreator):
+    """Wraps another message creator, and sends each record whose formatted text is too long as a single message with a short summary and the full text attached as a file, instead of splitting it across many messages.
+
+    This way, a long traceback costs one request instead of one for every 2000 characters. The summary is created by the wrapped message creator from a copy of the record with only the first line of its message, so it looks like the messages of the other records.
+
+    Args:
+        message_creator (MessageCreator, optional): The message creator for the records that aren't too long, and for the summaries of those that are. Defaults to a `BasicMessageCreator`.
+        threshold (int, optional): The length of the formatted text of a record above which it is sent as an attachment. Defaults to 4000.
+        filename (str, optional): The name of the attached file. Defaults to "record.log".
+        compress (bool, optional): Whether to compress the attached file with gzip, adding ".gz" to its name. Defaults to False.
+        summary_length (int, optional): The maximum length of the message in the summary. Defaults to 200.
+    """
+
+    def __init__(
+        self,
+        message_creator: MessageCreator = None,
+        threshold: int = 4000,
+        filename: str = "record.log",
+        compress: bool = False,
+        summary_length: int = 200,
+    ) -> None:
+        super().__init__()
+        self.__message_creator = message_creator or BasicMessageCreator()
+        self.__threshold = threshold
+        self.__filename = f"{filename}.gz" if compress else filename
+        self.__compress = compress
+        self.__summary_length = summary_length
+
+    def messages(
+        self, record: LogRecord, format_func: Callable[[LogRecord], str]
+    ) -> Iterable[Dict[str, Any]]:
+        text = format_func(record)
+        if len(text) > self.__threshold:
+            return [self.__attachment_message(record, text, format_func)]
+        return self.__message_creator.messages(
+            record, lambda r: text if r is record else format_func(r)
+        )
+
+    def batch_messages(
+        self, records: Sequence[LogRecord], format_func: Callable[[LogRecord], str]
+    ) -> Iterable[Dict[str, Any]]:
+        """Let the wrapped message creator pack the records that aren't too long, and send each of the others as an attachment, keeping the records in order.
+
+        Args:
+            records (Sequence[LogRecord]): The records to create messages for.
+            format_func (Callable[[LogRecord], str]): The function used to format each record.
+
+        Yields:
+            Dict[str, Any]: The messages to pass on to the handler.
+        """
+        texts: Dict[int, str] = {}
+
+        def cached_format(r: LogRecord) -> str:
+            return texts[id(r)] if id(r) in texts else format_func(r)
+
+        pending: List[LogRecord] = []
+        for record in records:
+            text = format_func(record)
+            if len(text) <= self.__threshold:
+                texts[id(record)] = text
+                pending.append(record)
+                continue
+            if pending:
+                yield from self.__message_creator.batch_messages(pending, cached_format)
+                pending = []
+            yield self.__attachment_message(record, text, format_func)
+        if pending:
+            yield from self.__message_creator.batch_messages(pending, cached_format)
+
+    def combine_messages(
+        self, first: Mapping[str, Any], second: Mapping[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Let the wrapped message creator combine the messages, unless either has an attachment.
+
+        Args:
+            first (Mapping[str, Any]): The earlier message.
+            second (Mapping[str, Any]): The later message.
+
+        Returns:
+            Optional[Dict[str, Any]]: The combined message, or None if they can't be combined.
+        """
+        if first.get("files") or second.get("files"):
+            return None
+        return self.__message_creator.combine_messages(first, second)
+
+    def __attachment_message(
+        self, record: LogRecord, text: str, format_func: Callable[[LogRecord], str]
+    ) -> Dict[str, Any]:
+        """Create a message summarising a record, with its full formatted text attached. If the wrapped message creator makes no message for the summary, the summary is sent as plain content.
+
+        Args:
+            record (LogRecord): The record.
+            text (str): The formatted text of the record.
+            format_func (Callable[[LogRecord], str]): The function used to format the summary.
+
+        Returns:
+            Dict[str, Any]: The message.
+        """
+        line = record.getMessage().split("\n", 1)[0]
+        if len(line) > self.__summary_length:
+            line = line[: self.__summary_length - 1] + "…"
+        summary = logging.makeLogRecord(record.__dict__)
+        summary.msg = f"{line} (full record attached as {self.__filename})"
+        summary.args = None
+        summary.exc_info = None
+        summary.exc_text = None
+        summary.stack_info = None
+        message = next(
+            iter(self.__message_creator.messages(summary, format_func)),
+            {"content": summary.getMessage()},
+        )
+        content = text.encode()
+        attachment = (
+            Attachment(self.__filename, gzip.compress(content), "application/gzip")
+            if self.__compress
+            else Attachment(self.__filename, content)
+        )
+        return {**message, "files": [*message.get("files", ()), attachment]}
@@ -1,7 +1,7 @@
 from logging import LogRecord
-from typing import Callable, Iterable
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
 from .message_creator import MessageCreator
-from .chunks import chunks
+from .chunks import text_chunks
 
 
 class BasicMessageCreator(MessageCreator):
@@ -27,6 +27,62 @@ class BasicMessageCreator(MessageCreator):
         self, record: LogRecord, format_func: Callable[[LogRecord], str]
     ) -> Iterable[dict]:
         return (
-            {"content": self.__prefix + "".join(chunk) + self.__suffix}
-            for chunk in chunks(format_func(record), self.__content_limit)
+            {"content": self.__prefix + chunk + self.__suffix}
+            for chunk in text_chunks(format_func(record), self.__content_limit)
         )
+
+    def batch_messages(
+        self, records: Sequence[LogRecord], format_func: Callable[[LogRecord], str]
+    ) -> Iterable[dict]:
+        """Pack the formatted records, one per line, into as few messages as possible.
+
+        Records that are too long for a single message are split across several, just as they are by `messages` (see `text_chunks`), but every message is filled with as many consecutive records as will fit.
+
+        Args:
+            records (Sequence[LogRecord]): The records to create messages for.
+            format_func (Callable[[LogRecord], str]): The function used to format each record.
+
+        Yields:
+            dict: The messages to pass on to the handler.
+        """
+        lines: List[str] = []
+        length = 0
+        for record in records:
+            for chunk in text_chunks(format_func(record), self.__content_limit):
+                if lines and length + 1 + len(chunk) > self.__content_limit:
+                    yield {"content": self.__prefix + "\n".join(lines) + self.__suffix}
+                    lines = []
+                length = length + 1 + len(chunk) if lines else len(chunk)
+                lines.append(chunk)
+        if lines:
+            yield {"content": self.__prefix + "\n".join(lines) + self.__suffix}
+
+    def combine_messages(
+        self, first: Mapping[str, Any], second: Mapping[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Append the lines of one message to those of another, if they fit in one message.
+
+        Args:
+            first (Mapping[str, Any]): The earlier message.
+            second (Mapping[str, Any]): The later message.
+
+        Returns:
+            Optional[Dict[str, Any]]: The combined message, or None if it would be too long, or if either message's content isn't one this creator made.
+        """
+        bodies = []
+        for message in (first, second):
+            content = message.get("content")
+            if (
+                not isinstance(content, str)
+                or len(content) < len(self.__prefix) + len(self.__suffix)
+                or not content.startswith(self.__prefix)
+                or not content.endswith(self.__suffix)
+            ):
+                return None
+            bodies.append(
+                content[len(self.__prefix) : len(content) - len(self.__suffix)]
+            )
+        body = "\n".join(bodies)
+        if len(body) > self.__content_limit:
+            return None
+        return {**first, **second, "content": self.__prefix + body + self.__suffix}
@@ -1,7 +1,60 @@
-from typing import Iterable, Sequence, TypeVar
+import re
+from typing import Iterable, Iterator, Sequence, TypeVar
 
 T = TypeVar("T")
 
+_ansi_escape = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
+_max_escape_length = 32
+
 
 def chunks(seq: Sequence[T], chunk_size: int) -> Iterable[Sequence[T]]:
     return (seq[pos : pos + chunk_size] for pos in range(0, len(seq), chunk_size))
+
+
+def text_chunks(text: str, limit: int) -> Iterator[str]:
+    """Split text into chunks of at most `limit` characters, in a single pass.
+
+    As many whole lines as fit are packed into each chunk, and the line break between two chunks is dropped. Only lines longer than `limit` are split in the middle, and never inside an ANSI escape sequence, a surrogate pair or a run of backticks (which could otherwise turn into or break a code fence).
+
+    Args:
+        text (str): The text to split.
+        limit (int): The maximum length of each chunk.
+
+    Yields:
+        str: The chunks, in order. Nothing is yielded for empty text.
+    """
+    start = 0
+    while len(text) - start > limit:
+        end = text.rfind("\n", start, start + limit + 1)
+        if end > start:
+            yield text[start:end]
+            start = end + 1
+        else:
+            end = _split_point(text, start, start + limit)
+            yield text[start:end]
+            start = end
+    if start < len(text):
+        yield text[start:]
+
+
+def _split_point(text: str, start: int, end: int) -> int:
+    """Find the last index, no later than `end`, at which a line may be split without breaking an escape sequence, a surrogate pair or a run of backticks.
+
+    Args:
+        text (str): The text being split.
+        start (int): The start of the chunk being split off.
+        end (int): The latest index to split at.
+
+    Returns:
+        int: The index to split at, which is always after `start`.
+    """
+    escape = text.rfind("\x1b", max(start, end - _max_escape_length), end)
+    if escape > start:
+        match = _ansi_escape.match(text, escape)
+        if not match or match.end() > end:
+            end = escape
+    while end - 1 > start and text[end - 1] == "`" and text[end] == "`":
+        end -= 1
+    if end - 1 > start and "\ud800" <= text[end - 1] <= "\udbff":
+        end -= 1
+    return end
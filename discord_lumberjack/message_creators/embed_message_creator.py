@@ -1,12 +1,104 @@
 from logging import LogRecord
-from typing import Callable, Generator, Iterable, List, Mapping, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from .message_creator import MessageCreator
 from .log_colours import LogColours
-from .embed import Embed, EmbedFieldSetter, embed_length, empty_embed
+from .embed import Embed, embed_length, empty_embed
+from .exception_groups import ExceptionGroups
 import datetime as dt
 from itertools import chain
+import time
 import traceback
 
+_missing = object()
+_constant_getters = frozenset(
+    (
+        "get_thumbnail_url",
+        "get_author_url",
+        "get_url",
+        "get_footer_icon_url",
+        "get_footer_text",
+        "get_image_url",
+    )
+)
+"""The getters whose default implementations always return an empty string."""
+
+
+class _Step(NamedTuple):
+    """One step of the plan used to render records into embeds: it sets one field of the embed."""
+
+    keys: Tuple[Union[str, int], ...]
+    """The keys leading to the dictionary containing the field."""
+    last_key: Union[str, int]
+    """The key of the field within that dictionary."""
+    get_value: Optional[Callable[[LogRecord], Any]]
+    """The getter for the field's value, or None if the value is `constant`."""
+    constant: Any
+    """The value of the field, if it is the same for every record."""
+    limit: Optional[int]
+    """The maximum length of the field, if it has one."""
+
+
+_timezone_cache: List[Any] = [None, None]
+
+
+def _local_timezone() -> Optional[dt.tzinfo]:
+    """Get the local timezone, looking it up again at most once a minute so that changes such as daylight saving time are still picked up.
+
+    Returns:
+        Optional[dt.tzinfo]: The local timezone.
+    """
+    minute = int(time.time() // 60)
+    if _timezone_cache[0] != minute:
+        _timezone_cache[:] = [minute, dt.datetime.now().astimezone().tzinfo]
+    return _timezone_cache[1]
+
+
+def _copy_embed(embed: Embed) -> Embed:
+    """Copy an embed, including the dictionaries and lists nested in it."""
+    return {  # type: ignore
+        key: (
+            value.copy()
+            if type(value) is dict
+            else [field.copy() for field in value] if type(value) is list else value
+        )
+        for key, value in embed.items()
+    }
+
+
+def _split(value: str, limit: Optional[int]) -> Generator[str, None, None]:
+    """Split a value that is too long for its field into pieces, one per embed, the same way `EmbedFieldSetter` does.
+
+    Args:
+        value (str): The value to split.
+        limit (Optional[int]): The maximum length of the field, if it has one.
+
+    Yields:
+        str: The pieces of the value.
+    """
+    remaining: Optional[int] = 6000
+    while True:
+        piece_limit = (
+            min(limit, remaining) if limit and remaining else limit or remaining
+        ) or None
+        piece, value = value[:piece_limit], value[piece_limit:]
+        yield piece
+        if piece_limit is None or not value:
+            return
+        remaining = remaining - len(piece) if remaining else None
+
 
 class EmbedMessageCreator(MessageCreator):
     """This message creator creates messages with the `LogRecord`'s data nicely formatted in an embed.
@@ -19,15 +111,34 @@ class EmbedMessageCreator(MessageCreator):
 
     Args:
         colours (Mapping[int, int]): A mapping of log levels to colours. If a log level doesn't have an index in this mapping, the colour of the closest level lower than it will be used. If not provided, sensible selection of colours will be used.
+        exception_ttl (float, optional): If positive, the traceback of an exception is only sent in full the first time it happens within this many seconds. Further exceptions of the same type raised from the same lines only get a one-line reference to it with the number of times it happened, which keeps crash loops from sending the same traceback over and over. Defaults to 0, which sends every traceback in full.
+        max_exception_fingerprints (int, optional): The maximum number of distinct exceptions to remember when `exception_ttl` is positive. The least recently seen ones are forgotten first. Defaults to 256.
     """
 
     def __init__(
         self,
         colours: Mapping[int, int] = None,
+        exception_ttl: float = 0.0,
+        max_exception_fingerprints: int = 256,
     ) -> None:
         super().__init__()
         self.__colours = LogColours(colours)
-        self.__field_setters = self.__create_field_setters()
+        self.__exception_groups = (
+            ExceptionGroups(exception_ttl, max_exception_fingerprints)
+            if exception_ttl > 0
+            else None
+        )
+        self.__field_definitions = self.get_field_definitions()
+        self.__plan = self.__compile_plan()
+        self.__dynamic_steps = [step for step in self.__plan if step.get_value]
+        self.__template: Optional[Embed] = None
+        if type(self).get_new_embed is EmbedMessageCreator.get_new_embed:
+            self.__template = empty_embed(len(self.__field_definitions))
+            for step in self.__plan:
+                if step.get_value is None:
+                    self.__container(self.__template, step.keys)[
+                        step.last_key
+                    ] = step.constant
 
     def messages(
         self, record: LogRecord, format_func: Callable[[LogRecord], str]
@@ -43,19 +154,123 @@ class EmbedMessageCreator(MessageCreator):
         Returns:
             Iterable[dict]: The messages to pass on to the handler.
         """
-        first_embed = self.get_new_embed(record)
-        embeds = [first_embed]
-        for field_setter in self.__field_setters:
-            for new_embed in field_setter.set_field(
-                embeds[-1], record, None, self.get_new_embed, 6000
-            ):
-                embeds.append(new_embed)
-        for embed in embeds:
-            self.__fix_fields(embed)
         return (
-            {"embeds": embeds_chunk} for embeds_chunk in self.__embed_chunks(embeds)
+            {"embeds": embeds_chunk}
+            for embeds_chunk in self.__embed_chunks(self.__embeds(record))
+        )
+
+    def batch_messages(
+        self, records: Sequence[LogRecord], format_func: Callable[[LogRecord], str]
+    ) -> Iterable[dict]:
+        """Create the embeds of each record, and pack the embeds of consecutive records into shared messages, keeping within the limits of 10 embeds and 6000 characters per message.
+
+        This method ignores the `format_func` argument.
+
+        Args:
+            records (Sequence[LogRecord]): The records to create messages for.
+            format_func (Callable[[LogRecord], str]): This argument is ignored.
+
+        Returns:
+            Iterable[dict]: The messages to pass on to the handler.
+        """
+        return (
+            {"embeds": embeds_chunk}
+            for embeds_chunk in self.__embed_chunks(
+                chain.from_iterable(self.__embeds(record) for record in records)
+            )
         )
 
+    def combine_messages(
+        self, first: Mapping[str, Any], second: Mapping[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Put the embeds of two messages in one message, if they keep within the limits of 10 embeds and 6000 characters per message.
+
+        Args:
+            first (Mapping[str, Any]): The earlier message.
+            second (Mapping[str, Any]): The later message.
+
+        Returns:
+            Optional[Dict[str, Any]]: The combined message, or None if the embeds don't fit in one message.
+        """
+        if not first.get("embeds") or not second.get("embeds"):
+            return None
+        embeds = [*first["embeds"], *second["embeds"]]
+        if len(embeds) > 10 or sum(embed_length(e) for e in embeds) > 6000:
+            return None
+        return {**first, **second, "embeds": embeds}
+
+    def __embeds(self, record: LogRecord) -> List[Embed]:
+        """Create all the embeds that a record is split up into.
+
+        Unless `get_new_embed` has been overridden, the embed is first rendered by copying a template with the constant fields already set and setting the rest. If a value turns out to be too long for its field, the record is rendered again by `__split_embeds`, reusing the values obtained so far.
+
+        Args:
+            record (LogRecord): The record to create embeds for.
+
+        Returns:
+            List[Embed]: The embeds, each of which has at most 6000 characters.
+        """
+        values: List[Any] = []
+        template = self.__template
+        if template is not None:
+            embed = _copy_embed(template)
+            embed["color"] = self.get_colour(record)
+            for keys, last_key, get_value, _, limit in self.__dynamic_steps:
+                value = get_value(record)
+                values.append(value)
+                if value is None:
+                    continue
+                if isinstance(value, str) and len(value) > (limit or 6000):
+                    break
+                component: Any = embed
+                for key in keys:
+                    component = component[key]
+                component[last_key] = value
+            else:
+                self.__fix_fields(embed)
+                return [embed]
+        return self.__split_embeds(record, values)
+
+    def __split_embeds(self, record: LogRecord, values: List[Any]) -> List[Embed]:
+        """Create all the embeds that a record is split up into, in the general case.
+
+        Each step of the rendering plan sets one field of the last embed. A value that is too long for its field is split, and each piece after the first is set in a new embed.
+
+        Args:
+            record (LogRecord): The record to create embeds for.
+            values (List[Any]): The values already obtained from the first getters of the plan, which won't be called again.
+
+        Returns:
+            List[Embed]: The embeds, each of which has at most 6000 characters.
+        """
+        obtained = iter(values)
+        embeds = [self.get_new_embed(record)]
+        for keys, last_key, get_value, constant, limit in self.__plan:
+            if get_value is None:
+                value = constant
+            else:
+                value = next(obtained, _missing)
+                if value is _missing:
+                    value = get_value(record)
+            if value is None:
+                continue
+            component: Any = embeds[-1]
+            for key in keys:
+                component = component[key]
+            if not isinstance(value, str) or len(value) <= (limit or 6000):
+                component[last_key] = value
+                continue
+            for i, piece in enumerate(_split(value, limit)):
+                if i:
+                    embeds.append(self.get_new_embed(record))
+                    component = embeds[-1]
+                    for key in keys:
+                        component = component[key]
+                component[last_key] = piece
+        for embed in embeds:
+            self.__fix_fields(embed)
+        return embeds
+
     def __embed_chunks(
         self, embeds: Iterable[Embed]
     ) -> Generator[List[Embed], None, None]:
@@ -73,7 +288,7 @@ class EmbedMessageCreator(MessageCreator):
         chunk: List[Embed] = []
         for embed in embeds:
             length = embed_length(embed)
-            if length < limit and len(chunk) < 10:
+            if length <= limit and len(chunk) < 10:
                 chunk.append(embed)
                 limit -= length
             else:
@@ -223,8 +438,9 @@ class EmbedMessageCreator(MessageCreator):
         Returns:
             str: The string to set the timestamp to.
         """
-        tzinfo = dt.datetime.now().astimezone().tzinfo
-        return dt.datetime.fromtimestamp(record.created, tz=tzinfo).isoformat()
+        return dt.datetime.fromtimestamp(
+            record.created, tz=_local_timezone()
+        ).isoformat()
 
     def get_image_url(self, record: LogRecord) -> str:
         """Returns the string to set the embed's image URL to. By default this is left empty.
@@ -244,7 +460,7 @@ class EmbedMessageCreator(MessageCreator):
     ) -> List[Tuple[Callable[[LogRecord], str], Callable[[LogRecord], str]]]:
         """This method defines which fields will be included in the embed.
 
-        By default, it defines one field which contains exception information, if there was an exception. You can override this method to change what fields are included.
+        By default, it defines one field which contains exception information, if there was an exception. If `exception_ttl` was given, the traceback is replaced by a reference to an earlier one when the same exception happened recently. You can override this method to change what fields are included.
 
         This function should return a list of tuples, one for each field definition. Each tuple should consist of two functions both of which take the `LogRecord` as input and return a string. The first returns the string to set the field name to, and the second returns the string to set the field value to.
 
@@ -263,11 +479,17 @@ class EmbedMessageCreator(MessageCreator):
 
         def exception_info(record: LogRecord) -> str:
             nl = "\n"
-            return (
-                f"```{nl.join(traceback.format_tb(record.exc_info[2]))}```"
-                if record.exc_info and record.exc_info[2]
-                else ""
+            if not record.exc_info or not record.exc_info[2]:
+                return ""
+            reference, count = (
+                self.__exception_groups.add(record.exc_info[0], record.exc_info[2])
+                if self.__exception_groups and record.exc_info[0]
+                else (None, 1)
             )
+            if count > 1:
+                return f"Same traceback as `{reference}` (occurrence {count})"
+            tb = f"```{nl.join(traceback.format_tb(record.exc_info[2]))}```"
+            return f"Traceback `{reference}`:{nl}{tb}" if reference else tb
 
         return [(exception_title, exception_info)]
 
@@ -282,35 +504,67 @@ class EmbedMessageCreator(MessageCreator):
         Returns:
             Embed: A new embed with possibly some properties preset.
         """
-        embed = empty_embed(len(self.get_field_definitions()))
+        embed = empty_embed(len(self.__field_definitions))
         embed["color"] = self.get_colour(record)
         return embed
 
-    def __create_field_setters(self) -> Iterable[EmbedFieldSetter]:
+    def __compile_plan(self) -> List[_Step]:
+        """Build the list of steps used to render every record, one per embed field that can be set.
+
+        Getters which haven't been overridden and whose default is a constant are evaluated here, once, rather than for every record. The colour is skipped altogether if neither it nor `get_new_embed` has been overridden, since every new embed already has it.
 
-        fields_field_setters = chain.from_iterable(
+        Returns:
+            List[_Step]: The steps, in the order the fields are set.
+        """
+        cls = type(self)
+        field_getters = chain.from_iterable(
             (
-                EmbedFieldSetter(("fields", i, "name"), get_name, 256),
-                EmbedFieldSetter(("fields", i, "value"), get_value, 1024),
+                (("fields", i, "name"), get_name, 256),
+                (("fields", i, "value"), get_value, 1024),
             )
-            for i, (get_name, get_value) in enumerate(self.get_field_definitions())
+            for i, (get_name, get_value) in enumerate(self.__field_definitions)
         )
-
-        return [
-            EmbedFieldSetter(("color",), self.get_colour),
-            EmbedFieldSetter(("thumbnail", "url"), self.get_thumbnail_url),
-            EmbedFieldSetter(("author", "url"), self.get_author_url),
-            EmbedFieldSetter(("author", "icon_url"), self.get_author_icon_url),
-            EmbedFieldSetter(("author", "name"), self.get_author_name, 256),
-            EmbedFieldSetter(("title",), self.get_title, 256),
-            EmbedFieldSetter(("description",), self.get_description, 4096),
-            EmbedFieldSetter(("url",), self.get_url),
-            *fields_field_setters,
-            EmbedFieldSetter(("footer", "icon_url"), self.get_footer_icon_url),
-            EmbedFieldSetter(("footer", "text"), self.get_footer_text, 2048),
-            EmbedFieldSetter(("timestamp",), self.get_timestamp),
-            EmbedFieldSetter(("image", "url"), self.get_image_url),
+        getters = [
+            (("color",), self.get_colour, None),
+            (("thumbnail", "url"), self.get_thumbnail_url, None),
+            (("author", "url"), self.get_author_url, None),
+            (("author", "icon_url"), self.get_author_icon_url, None),
+            (("author", "name"), self.get_author_name, 256),
+            (("title",), self.get_title, 256),
+            (("description",), self.get_description, 4096),
+            (("url",), self.get_url, None),
+            *field_getters,
+            (("footer", "icon_url"), self.get_footer_icon_url, None),
+            (("footer", "text"), self.get_footer_text, 2048),
+            (("timestamp",), self.get_timestamp, None),
+            (("image", "url"), self.get_image_url, None),
         ]
+        plan: List[_Step] = []
+        for key_chain, getter, limit in getters:
+            name = getattr(getter, "__name__", "")
+            inherited = getattr(cls, name, None) is getattr(
+                EmbedMessageCreator, name, _missing
+            )
+            if (
+                name == "get_colour"
+                and inherited
+                and cls.get_new_embed is EmbedMessageCreator.get_new_embed
+            ):
+                continue
+            if inherited and name in _constant_getters:
+                step = _Step(key_chain[:-1], key_chain[-1], None, "", limit)
+            else:
+                step = _Step(key_chain[:-1], key_chain[-1], getter, None, limit)
+            plan.append(step)
+        return plan
+
+    @staticmethod
+    def __container(embed: Embed, keys: Tuple[Union[str, int], ...]) -> Any:
+        """Get the dictionary within an embed that is reached by following some keys."""
+        component: Any = embed
+        for key in keys:
+            component = component[key]
+        return component
 
     def __fix_fields(self, embed: Embed) -> None:
         """This method is called to fix any fields that are invalid.
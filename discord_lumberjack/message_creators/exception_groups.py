@@ -0,0 +1,77 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from types import TracebackType
+from typing import Callable, List, Optional, Tuple, Type
+
+
+def exception_fingerprint(
+    exc_type: Type[BaseException], tb: Optional[TracebackType]
+) -> str:
+    """Identify where an exception came from, so that the same crash happening repeatedly can be recognised.
+
+    Args:
+        exc_type (Type[BaseException]): The type of the exception.
+        tb (Optional[TracebackType]): The traceback of the exception.
+
+    Returns:
+        str: A short hexadecimal reference derived from the exception's type and the file name and line number of every frame in its traceback. It is the same in every process.
+    """
+    frames: List[str] = [f"{exc_type.__module__}.{exc_type.__qualname__}"]
+    while tb is not None:
+        frames.append(f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}")
+        tb = tb.tb_next
+    return f"{zlib.crc32(chr(0).join(frames).encode()):08x}"
+
+
+class ExceptionGroups:
+    """Counts the occurrences of exceptions with the same `exception_fingerprint`, so that a traceback can be sent in full once and only referred to when the same exception happens again.
+
+    The first occurrence of a fingerprint should be sent in full. Any more occurrences within `ttl` seconds of it are only counted, and the next one after that should be sent in full again.
+
+    Only the `max_fingerprints` most recently seen fingerprints are remembered.
+
+    Args:
+        ttl (float): The number of seconds after a traceback is sent in full during which further occurrences are only referred to.
+        max_fingerprints (int, optional): The maximum number of fingerprints to remember. Defaults to 256.
+        clock (Callable[[], float], optional): A monotonic clock returning seconds. Defaults to `time.monotonic`.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_fingerprints: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__ttl = ttl
+        self.__max_fingerprints = max_fingerprints
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__groups: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def add(
+        self, exc_type: Type[BaseException], tb: Optional[TracebackType]
+    ) -> Tuple[str, int]:
+        """Register an occurrence of an exception.
+
+        Args:
+            exc_type (Type[BaseException]): The type of the exception.
+            tb (Optional[TracebackType]): The traceback of the exception.
+
+        Returns:
+            Tuple[str, int]: The exception's fingerprint, and the number of occurrences since its traceback was last sent in full, counting this one. If this is 1, the traceback should be sent in full now.
+        """
+        key = exception_fingerprint(exc_type, tb)
+        now = self.__clock()
+        with self.__lock:
+            group = self.__groups.get(key)
+            if group is None or now - group[0] >= self.__ttl:
+                self.__groups[key] = [now, 1]
+                self.__groups.move_to_end(key)
+                while len(self.__groups) > self.__max_fingerprints:
+                    self.__groups.popitem(last=False)
+                return key, 1
+            group[1] += 1
+            self.__groups.move_to_end(key)
+            return key, int(group[1])
@@ -1,5 +1,5 @@
 import logging
-from typing import Mapping
+from typing import Dict, Mapping
 
 default_colours = {
     logging.NOTSET: 0x888888,
@@ -24,11 +24,18 @@ class LogColours:
 
     def __init__(self, colours: Mapping[int, int] = None) -> None:
         self.__colours = colours or default_colours
+        self.__cache: Dict[int, int] = {}
 
     def __getitem__(self, level: int) -> int:
         try:
-            return self.__colours[
+            return self.__cache[level]
+        except KeyError:
+            pass
+        try:
+            colour = self.__colours[
                 max(min_lvl for min_lvl in self.__colours if min_lvl <= level)
             ]
         except KeyError:
-            return 0xFFFFFF
+            colour = 0xFFFFFF
+        self.__cache[level] = colour
+        return colour
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from logging import LogRecord, Formatter
-from typing import Any, Callable, Iterable, Dict
+from itertools import chain
+from typing import Any, Callable, Iterable, Dict, Mapping, Optional, Sequence
 
 
 class MessageCreator(ABC):
@@ -23,6 +24,10 @@ class MessageCreator(ABC):
 
         Subclasses should make sure the messages it creates are not too long to be rejected by discord. If they are, they should split the message into multiple messages.
 
+        A message may also have a `files` key with a list of `Attachment`s to upload along with it.
+
+        The handlers may modify the messages before sending them, so each call must create new message objects, rather than return ones that are kept and reused.
+
         Args:
             record (LogRecord): The log record to format into a message.
             format_func (Callable[[LogRecord], str]): A function which formats a log record into a string. This function is expected to originate from a `Formatter` instance.
@@ -31,3 +36,39 @@ class MessageCreator(ABC):
             Iterable[dict]: An iterable of discord message objects (dicts). The reason it returns many messages is in case there is too much information in the log record to fit into a single message.
         """
         pass
+
+    def batch_messages(
+        self, records: Sequence[LogRecord], format_func: Callable[[LogRecord], str]
+    ) -> Iterable[Dict[str, Any]]:
+        """
+        Format a batch of log records to discord message objects (dicts).
+
+        This method is used by handlers that batch records together. Subclasses may override it to pack several records into each message, so that fewer requests are made. By default, it simply creates the messages of each record separately with `messages`.
+
+        Args:
+            records (Sequence[LogRecord]): The log records to format into messages, in the order they were logged.
+            format_func (Callable[[LogRecord], str]): A function which formats a log record into a string. This function is expected to originate from a `Formatter` instance.
+
+        Returns:
+            Iterable[dict]: An iterable of discord message objects (dicts) for all of the records.
+        """
+        return chain.from_iterable(
+            self.messages(record, format_func) for record in records
+        )
+
+    def combine_messages(
+        self, first: Mapping[str, Any], second: Mapping[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Combine two messages created by this message creator into one, as if their records had been batched together.
+
+        This is used by handlers in tail mode to append records to a message that was already sent, without creating its messages again. Subclasses that pack several records into each message should override it. By default, messages aren't combined.
+
+        Args:
+            first (Mapping[str, Any]): The earlier message, which must not be modified.
+            second (Mapping[str, Any]): The later message, which must not be modified.
+
+        Returns:
+            Optional[Dict[str, Any]]: A new message with the contents of both, or None if they can't be combined, for example because the result wouldn't fit in one message.
+        """
+        return None
@@ -0,0 +1,12 @@
+"""
+Tools for testing and benchmarking code that logs to Discord without a network connection.
+
+`FakeDiscord` is a local HTTP server implementing the parts of Discord's API that the handlers use, including its rate limits. Point a handler at it with the `api_url` parameter of the channel and DM handlers, or with `FakeDiscord.webhook_url` for webhook handlers.
+
+`RecordingTransport` goes further and makes no requests at all, recording them in memory instead. Give it to a handler as its `transport` to measure the cost of creating and sending messages without any network.
+"""
+
+from .fake_discord import FakeDiscord, ReceivedRequest
+from .recording_transport import RecordingTransport
+
+__all__ = ["FakeDiscord", "ReceivedRequest", "RecordingTransport"]
@@ -0,0 +1,419 @@
+import email.parser
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+_webhook_pattern = re.compile(r"^/api/webhooks/(\d+)/([^/?]+)$")
+_channel_messages_pattern = re.compile(r"^/api/channels/(\d+)/messages$")
+_dm_pattern = re.compile(r"^/api/users/@me/channels$")
+_webhook_message_pattern = re.compile(r"^/api/webhooks/(\d+)/([^/?]+)/messages/(\d+)$")
+_channel_message_pattern = re.compile(r"^/api/channels/(\d+)/messages/(\d+)$")
+
+
+class ReceivedRequest(NamedTuple):
+    """A request received by a `FakeDiscord` server."""
+
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+    received_at: float
+    """The value of `time.time()` when the request was accepted."""
+
+    def json(self) -> Any:
+        """Parse the body of the request as JSON, or the `payload_json` field of a `multipart/form-data` body."""
+        if not self.__is_multipart():
+            return json.loads(self.body)
+        for part in self.__parts():
+            if part.get_param("name", header="content-disposition") == "payload_json":
+                return json.loads(part.get_payload(decode=True))
+        return None
+
+    def files(self) -> Dict[str, bytes]:
+        """Get the files uploaded in a `multipart/form-data` body.
+
+        Returns:
+            Dict[str, bytes]: The contents of each file, by file name.
+        """
+        if not self.__is_multipart():
+            return {}
+        return {
+            part.get_filename(): part.get_payload(decode=True)
+            for part in self.__parts()
+            if part.get_filename()
+        }
+
+    def __content_type(self) -> str:
+        return next(
+            (v for k, v in self.headers.items() if k.lower() == "content-type"), ""
+        )
+
+    def __is_multipart(self) -> bool:
+        return self.__content_type().startswith("multipart/form-data")
+
+    def __parts(self) -> List[Any]:
+        message = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {self.__content_type()}\r\n\r\n".encode() + self.body
+        )
+        return message.get_payload()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        """Ignore clients that disconnect before getting their response, such as a process that was killed."""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Window:
+    """A fixed window rate limit for one bucket and major parameter."""
+
+    __slots__ = ("started", "used")
+
+    def __init__(self) -> None:
+        self.started = 0.0
+        self.used = 0
+
+
+class FakeDiscord:
+    """A local stand-in for Discord's HTTP API, for testing and benchmarking handlers without a network or a bot.
+
+    It implements the endpoints used by the handlers: executing webhooks, creating channel messages, editing the messages they created and creating DM channels. Every request is accepted (no tokens are checked) and recorded in `requests`, unless it is rate limited. Rate limits work like Discord's: each route and major parameter has a budget of `rate_limit` requests per `rate_limit_window` seconds, reported in the `X-RateLimit-*` headers of every response, and requests beyond it are rejected with a 429 status, a `Retry-After` header and a JSON body with `retry_after`.
+
+    To simulate an outage, set `failure_status` to a server error status such as 503, and every request will be answered with it until it is set back to 0.
+
+    The server runs in a background thread. Use it as a context manager, or call `start` and `stop`.
+
+    ```py
+    with FakeDiscord(latency=0.05) as discord:
+        handler = DiscordChannelHandler("token", 1234, api_url=discord.api_url)
+    ```
+
+    Args:
+        latency (float, optional): The number of seconds to wait before responding to each request. It may be changed while the server is running, which also affects requests that are already waiting. Defaults to 0.
+        rate_limit (int, optional): The number of requests allowed per route and major parameter in each window. Defaults to 5, like Discord's limit for sending messages to a channel.
+        rate_limit_window (float, optional): The length of each rate limit window in seconds. Defaults to 2.
+        global_rate_limit (int, optional): The number of requests allowed per second across all routes, or 0 for no global limit. Defaults to 0.
+        host (str, optional): The interface to listen on. Defaults to "127.0.0.1".
+        port (int, optional): The port to listen on. Defaults to 0, which picks a free port.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit: int = 5,
+        rate_limit_window: float = 2.0,
+        global_rate_limit: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.__latency = latency
+        self.__latency_changed = threading.Condition()
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.global_rate_limit = global_rate_limit
+        self.requests: List[ReceivedRequest] = []
+        self.rate_limited = 0
+        self.failure_status = 0
+        self.failed = 0
+        self.__lock = threading.Lock()
+        self.__windows: Dict[Tuple[str, str], _Window] = {}
+        self.__global_window = _Window()
+        self.__ids = itertools.count(100000000000000000)
+        self.__message_ids: Set[str] = set()
+        self.__server = _Server((host, port), self.__request_handler())
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def latency(self) -> float:
+        """The number of seconds to wait before responding to each request."""
+        return self.__latency
+
+    @latency.setter
+    def latency(self, latency: float) -> None:
+        with self.__latency_changed:
+            self.__latency = latency
+            self.__latency_changed.notify_all()
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server, for example "http://127.0.0.1:12345"."""
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """The base URL of the fake API, to pass as the `api_url` of the handlers."""
+        return f"{self.url}/api"
+
+    def webhook_url(self, webhook_id: int = 1, token: str = "token") -> str:
+        """Get the URL of a fake webhook.
+
+        Args:
+            webhook_id (int, optional): The ID of the webhook. Defaults to 1.
+            token (str, optional): The token of the webhook. Defaults to "token".
+
+        Returns:
+            str: The URL to pass to `DiscordWebhookHandler`.
+        """
+        return f"{self.api_url}/webhooks/{webhook_id}/{token}"
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Get the messages that were sent, in the order they were accepted. Edits of the messages are not included.
+
+        Returns:
+            List[Dict[str, Any]]: The JSON body of each accepted request that sent a new message.
+        """
+        with self.__lock:
+            return [
+                request.json()
+                for request in self.requests
+                if request.method == "POST"
+                and not _dm_pattern.match(request.path.split("?")[0])
+            ]
+
+    def start(self) -> "FakeDiscord":
+        """Start serving requests in a background thread.
+
+        Returns:
+            FakeDiscord: This server.
+        """
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="FakeDiscord", daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving requests."""
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> "FakeDiscord":
+        return self.start()
+
+    def __exit__(self, *_: Any) -> None:
+        self.stop()
+
+    def __check_rate_limit(
+        self, route: str, major: str
+    ) -> Tuple[bool, bool, Dict[str, str]]:
+        """Count a request against its rate limit.
+
+        Returns:
+            Tuple[bool, bool, Dict[str, str]]: Whether the request is allowed, whether it was rejected by the global limit, and the rate limit headers to respond with.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            if self.global_rate_limit:
+                window = self.__global_window
+                if now - window.started >= 1:
+                    window.started, window.used = now, 0
+                if window.used >= self.global_rate_limit:
+                    retry_after = window.started + 1 - now
+                    self.rate_limited += 1
+                    return (
+                        False,
+                        True,
+                        {
+                            "Retry-After": f"{retry_after:.3f}",
+                            "X-RateLimit-Global": "true",
+                            "X-RateLimit-Scope": "global",
+                        },
+                    )
+                window.used += 1
+            window = self.__windows.setdefault((route, major), _Window())
+            if now - window.started >= self.rate_limit_window:
+                window.started, window.used = now, 0
+            reset_after = window.started + self.rate_limit_window - now
+            allowed = window.used < self.rate_limit
+            if allowed:
+                window.used += 1
+            else:
+                self.rate_limited += 1
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(self.rate_limit - window.used),
+                "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                "X-RateLimit-Bucket": f"{abs(hash(route)):x}",
+            }
+            if not allowed:
+                headers["Retry-After"] = f"{reset_after:.3f}"
+                headers["X-RateLimit-Scope"] = "user"
+            return allowed, False, headers
+
+    def __check_failure(self) -> int:
+        """Count a request that fails because of a simulated outage.
+
+        Returns:
+            int: The status to respond with, or 0 if the request shouldn't fail.
+        """
+        with self.__lock:
+            if self.failure_status:
+                self.failed += 1
+            return self.failure_status
+
+    def __delay(self) -> None:
+        """Wait until `latency` seconds have passed since the request arrived."""
+        arrived = time.monotonic()
+        with self.__latency_changed:
+            while True:
+                remaining = arrived + self.__latency - time.monotonic()
+                if remaining <= 0:
+                    return
+                self.__latency_changed.wait(remaining)
+
+    def __record(self, request: ReceivedRequest) -> int:
+        with self.__lock:
+            self.requests.append(request)
+            message_id = next(self.__ids)
+            self.__message_ids.add(str(message_id))
+            return message_id
+
+    def __record_edit(self, request: ReceivedRequest, message_id: str) -> bool:
+        """Record a request editing a message, if the message exists.
+
+        Returns:
+            bool: Whether the message exists.
+        """
+        with self.__lock:
+            if message_id not in self.__message_ids:
+                return False
+            self.requests.append(request)
+            return True
+
+    def __request_handler(self) -> type:
+        fake = self
+        check_rate_limit = self.__check_rate_limit
+        check_failure = self.__check_failure
+        record = self.__record
+        record_edit = self.__record_edit
+        delay = self.__delay
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *_: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                path = self.path.split("?")[0]
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                delay()
+                failure_status = check_failure()
+                if failure_status:
+                    return self.respond(
+                        failure_status, {"message": "Service Unavailable", "code": 0}
+                    )
+                for pattern, route in (
+                    (_webhook_pattern, "webhooks"),
+                    (_channel_messages_pattern, "channels"),
+                    (_dm_pattern, "dm"),
+                ):
+                    match = pattern.match(path)
+                    if match:
+                        break
+                else:
+                    return self.respond(404, {"message": "404: Not Found", "code": 0})
+                allowed, is_global, headers = check_rate_limit(
+                    f"{self.command} {route}", match.group(1) if route != "dm" else ""
+                )
+                if not allowed:
+                    retry_after = float(headers["Retry-After"])
+                    return self.respond(
+                        429,
+                        {
+                            "message": "You are being rate limited.",
+                            "retry_after": retry_after,
+                            "global": is_global,
+                        },
+                        headers,
+                    )
+                request = ReceivedRequest(
+                    self.command, self.path, dict(self.headers), body, time.time()
+                )
+                message_id = record(request)
+                if route == "dm":
+                    recipient = request.json()["recipient_id"]
+                    return self.respond(200, {"id": str(recipient), "type": 1}, headers)
+                channel_id = match.group(1)
+                if route == "webhooks" and "wait=true" not in self.path:
+                    return self.respond(204, None, headers)
+                return self.respond(
+                    200,
+                    {
+                        **request.json(),
+                        "id": str(message_id),
+                        "channel_id": channel_id,
+                    },
+                    headers,
+                )
+
+            def do_PATCH(self) -> None:
+                path = self.path.split("?")[0]
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                delay()
+                failure_status = check_failure()
+                if failure_status:
+                    return self.respond(
+                        failure_status, {"message": "Service Unavailable", "code": 0}
+                    )
+                for pattern, route in (
+                    (_webhook_message_pattern, "webhooks"),
+                    (_channel_message_pattern, "channels"),
+                ):
+                    match = pattern.match(path)
+                    if match:
+                        break
+                else:
+                    return self.respond(404, {"message": "404: Not Found", "code": 0})
+                allowed, is_global, headers = check_rate_limit(
+                    f"{self.command} {route}", match.group(1)
+                )
+                if not allowed:
+                    return self.respond(
+                        429,
+                        {
+                            "message": "You are being rate limited.",
+                            "retry_after": float(headers["Retry-After"]),
+                            "global": is_global,
+                        },
+                        headers,
+                    )
+                request = ReceivedRequest(
+                    self.command, self.path, dict(self.headers), body, time.time()
+                )
+                message_id = match.group(match.lastindex or 0)
+                if not record_edit(request, message_id):
+                    return self.respond(
+                        404, {"message": "Unknown Message", "code": 10008}, headers
+                    )
+                return self.respond(
+                    200,
+                    {**request.json(), "id": message_id, "channel_id": match.group(1)},
+                    headers,
+                )
+
+            def respond(
+                self, status: int, body: Any, headers: Dict[str, str] = None
+            ) -> None:
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if body is not None:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return RequestHandler
@@ -0,0 +1,83 @@
+import itertools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+from urllib.parse import urlsplit
+from discord_lumberjack.transports import Response, Transport
+from .fake_discord import ReceivedRequest
+
+
+class RecordingTransport(Transport):
+    """A transport that sends nothing, recording each request in `requests` instead and answering it the way Discord would, so that handlers and message creators can be tested and benchmarked without a network or even a local server.
+
+    Requests creating a DM channel are answered with a channel whose ID is the recipient's. Requests executing a webhook are answered with no content, unless they ask to `wait`, requests editing a message are answered with the message's ID, and every other request is answered with a new message ID. Responses never carry rate limit headers.
+
+    ```py
+    transport = RecordingTransport()
+    handler = DiscordWebhookHandler(webhook_url, transport=transport)
+    ```
+
+    Args:
+        latency (float, optional): The number of seconds to wait before answering each request. Defaults to 0.
+        respond (Callable[[ReceivedRequest], Response], optional): A function to answer each request instead, for example to simulate errors. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        respond: Optional[Callable[[ReceivedRequest], Response]] = None,
+    ) -> None:
+        self.latency = latency
+        self.requests: List[ReceivedRequest] = []
+        self.__respond = respond or _respond
+        self.__lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        content: bytes,
+        headers: Mapping[str, str],
+        timeout: float,
+    ) -> Response:
+        parts = urlsplit(url)
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        request = ReceivedRequest(method, path, dict(headers), content, time.time())
+        if self.latency:
+            time.sleep(self.latency)
+        with self.__lock:
+            self.requests.append(request)
+        return self.__respond(request)
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Get the messages that were sent, in the order they were made. Edits of the messages are not included.
+
+        Returns:
+            List[Dict[str, Any]]: The JSON body of each request that sent a new message.
+        """
+        with self.__lock:
+            return [
+                request.json()
+                for request in self.requests
+                if request.method == "POST"
+                and not request.path.endswith("/users/@me/channels")
+            ]
+
+
+_message_ids = itertools.count(100000000000000000)
+
+
+def _respond(request: ReceivedRequest) -> Response:
+    """Answer a request the way Discord would if it succeeded."""
+    path, _, query = request.path.partition("?")
+    headers = {"Content-Type": "application/json"}
+    if path.endswith("/users/@me/channels"):
+        body = {"id": str(request.json()["recipient_id"]), "type": 1}
+    elif request.method == "PATCH":
+        body = {"id": path.rsplit("/", 1)[-1]}
+    elif "/webhooks/" in path and "wait=true" not in query:
+        return Response(204, {}, b"")
+    else:
+        body = {"id": str(next(_message_ids))}
+    return Response(200, headers, json.dumps(body).encode())
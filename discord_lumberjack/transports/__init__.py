@@ -0,0 +1,17 @@
+"""
+The HTTP clients with which the handlers send their requests to Discord.
+
+Every handler makes its requests through a `Transport`, which can be chosen with the handler's `transport` argument (or a `DispatchEngine`'s, to share it between the engine's handlers). `RequestsTransport`, the default, uses a `requests.Session` whose connection pool and timeouts can be tuned. `HTTPClientTransport` uses the standard library's `http.client` directly, which has less overhead per request. To send requests nowhere at all, for tests and benchmarks, use `discord_lumberjack.testing.RecordingTransport`.
+"""
+
+from .transport import Response, Transport, TransportError
+from .requests_transport import RequestsTransport
+from .http_client_transport import HTTPClientTransport
+
+__all__ = (
+    "Response",
+    "Transport",
+    "TransportError",
+    "RequestsTransport",
+    "HTTPClientTransport",
+)
@@ -0,0 +1,109 @@
+import http.client
+import ssl
+import threading
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+from .transport import Response, Transport, TransportError
+
+
+class HTTPClientTransport(Transport):
+    """A transport that makes requests with the standard library's `http.client`, keeping connections alive between requests. It does less work per request than `RequestsTransport`, at the cost of its features, such as proxies taken from the environment.
+
+    Idle connections are kept per host, and each request takes one of them, or opens a new one if there are none, so the transport may be shared by several threads. If a connection that was kept alive turns out to have been closed by the server before the request was sent, the request is made again on a new connection.
+
+    Args:
+        max_idle_connections (int, optional): The maximum number of idle connections to keep alive per host. Defaults to 10.
+        ssl_context (ssl.SSLContext, optional): The SSL context of HTTPS connections. Defaults to `ssl.create_default_context()`.
+    """
+
+    def __init__(
+        self,
+        max_idle_connections: int = 10,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        self.__max_idle_connections = max_idle_connections
+        self.__ssl_context = ssl_context or ssl.create_default_context()
+        self.__lock = threading.Lock()
+        self.__idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = (
+            defaultdict(list)
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        content: bytes,
+        headers: Mapping[str, str],
+        timeout: float,
+    ) -> Response:
+        parts = urlsplit(url)
+        host = (parts.scheme, parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            connection, reused = self.__connection(host, timeout)
+            try:
+                connection.request(method, target, content, dict(headers))
+                response = connection.getresponse()
+                body = response.read()
+            except (ConnectionResetError, BrokenPipeError) as e:
+                connection.close()
+                if reused:
+                    continue
+                raise TransportError(str(e)) from e
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                raise TransportError(str(e)) from e
+            if response.will_close:
+                connection.close()
+            else:
+                self.__release(host, connection)
+            return Response(response.status, response.msg, body)
+
+    def close(self) -> None:
+        with self.__lock:
+            connections = [c for idle in self.__idle.values() for c in idle]
+            self.__idle.clear()
+        for connection in connections:
+            connection.close()
+
+    def __connection(
+        self, host: Tuple[str, str], timeout: float
+    ) -> Tuple[http.client.HTTPConnection, bool]:
+        """Take an idle connection to a host, or open a new one if there are none.
+
+        Args:
+            host (Tuple[str, str]): The scheme and the network location of the host.
+            timeout (float): The timeout of the connection's socket.
+
+        Returns:
+            Tuple[http.client.HTTPConnection, bool]: The connection, and whether it was kept alive from an earlier request.
+        """
+        with self.__lock:
+            idle = self.__idle.get(host)
+            connection = idle.pop() if idle else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+        scheme, netloc = host
+        if scheme == "https":
+            return (
+                http.client.HTTPSConnection(
+                    netloc, timeout=timeout, context=self.__ssl_context
+                ),
+                False,
+            )
+        return http.client.HTTPConnection(netloc, timeout=timeout), False
+
+    def __release(
+        self, host: Tuple[str, str], connection: http.client.HTTPConnection
+    ) -> None:
+        """Keep a connection alive for the next request to its host, unless enough are kept already."""
+        with self.__lock:
+            idle = self.__idle[host]
+            if len(idle) < self.__max_idle_connections:
+                idle.append(connection)
+                return
+        connection.close()
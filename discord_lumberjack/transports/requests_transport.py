@@ -0,0 +1,63 @@
+from typing import Mapping, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from .transport import Response, Transport, TransportError
+
+
+class RequestsTransport(Transport):
+    """A transport that makes requests with a `requests.Session`, whose connection pool keeps connections alive between requests.
+
+    Args:
+        pool_connections (int, optional): The number of hosts to keep a connection pool for. Defaults to 4.
+        pool_maxsize (int, optional): The maximum number of connections to keep alive per host. Defaults to 10.
+        connect_timeout (Optional[float], optional): The maximum number of seconds to wait for the server to accept the connection. Defaults to None, which uses the timeout given to `post`.
+        session (requests.Session, optional): The session to make the requests with, for example one configured with proxies or with adapters of its own, in which case `pool_connections` and `pool_maxsize` are ignored. Defaults to a new session.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        connect_timeout: Optional[float] = None,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        self.__connect_timeout = connect_timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.__session = session
+
+    @property
+    def session(self) -> requests.Session:
+        """The session the requests are made with."""
+        return self.__session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        content: bytes,
+        headers: Mapping[str, str],
+        timeout: float,
+    ) -> Response:
+        connect_timeout = (
+            timeout if self.__connect_timeout is None else self.__connect_timeout
+        )
+        try:
+            response = self.__session.request(
+                method,
+                url,
+                data=content,
+                headers=headers,
+                timeout=(connect_timeout, timeout),
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise TransportError(str(e)) from e
+        return Response(response.status_code, response.headers, response.content)
+
+    def close(self) -> None:
+        self.__session.close()
@@ -0,0 +1,80 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Mapping
+
+
+class TransportError(Exception):
+    """Raised by a `Transport` when a request couldn't be completed, such as due to a connection error or a timeout. The handlers retry requests that fail this way."""
+
+
+class Response:
+    """The response to a request made by a `Transport`.
+
+    Args:
+        status_code (int): The HTTP status code.
+        headers (Mapping[str, str]): The headers of the response. Lookups must be case insensitive.
+        content (bytes): The body of the response.
+    """
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(
+        self, status_code: int, headers: Mapping[str, str], content: bytes
+    ) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        """The body of the response, decoded as UTF-8."""
+        return self.content.decode(errors="replace")
+
+    def json(self) -> Any:
+        """Parse the body of the response as JSON.
+
+        Returns:
+            Any: The parsed body.
+        """
+        return json.loads(self.content)
+
+
+class Transport(ABC):
+    """Makes the HTTP requests of the handlers.
+
+    A transport may be shared by several handlers, and by the threads of a `DispatchEngine`, so `request` must be thread safe.
+    """
+
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        content: bytes,
+        headers: Mapping[str, str],
+        timeout: float,
+    ) -> Response:
+        """Make a request with a body, such as a POST or a PATCH request.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL to make the request to.
+            content (bytes): The body of the request.
+            headers (Mapping[str, str]): The headers to send with the request, including its `Content-Type`.
+            timeout (float): The maximum number of seconds to wait for the server to accept the connection and for each part of its response.
+
+        Returns:
+            Response: The response, whatever its status.
+
+        Raises:
+            TransportError: If the request couldn't be completed, such as due to a connection error or a timeout.
+        """
+
+    def post(
+        self, url: str, content: bytes, headers: Mapping[str, str], timeout: float
+    ) -> Response:
+        """Make a POST request. See `request`."""
+        return self.request("POST", url, content, headers, timeout)
+
+    def close(self) -> None:
+        """Close any connections kept alive by the transport. By default, this does nothing."""
@@ -7,6 +7,7 @@ from tests import utils
 from dotenv import load_dotenv
 from discord_lumberjack.handlers import DiscordHandler, DiscordDMHandler
 from discord_lumberjack.message_creators import (
+    AttachmentMessageCreator,
     BasicMessageCreator,
     EmbedMessageCreator,
     EmbedLongMessageCreator,
@@ -30,6 +31,7 @@ dl_logger.addHandler(dl_handler)
         EmbedMessageCreator(),
         EmbedLongMessageCreator(),
         utils.CustomEmbedMessageCreator(),
+        AttachmentMessageCreator(EmbedMessageCreator(), threshold=1000),
     ]
 )
 def message_creator(request) -> MessageCreator:
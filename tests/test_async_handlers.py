@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+import pytest
+from discord_lumberjack.handlers import (
+    AsyncDiscordChannelHandler,
+    AsyncDiscordDMHandler,
+    AsyncDiscordWebhookHandler,
+    RateLimiter,
+)
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+from discord_lumberjack.transports import Response
+
+
+@pytest.fixture
+def discord():
+    with FakeDiscord(rate_limit=1000) as fake:
+        yield fake
+
+
+async def log(handler, *messages: str) -> None:
+    logger = logging.Logger("test_async_handlers")
+    logger.addHandler(handler)
+    for message in messages:
+        logger.info(message)
+    await handler.aclose()
+
+
+@pytest.mark.timeout(30)
+def test_webhook_handler(discord: FakeDiscord):
+    asyncio.run(
+        log(
+            AsyncDiscordWebhookHandler(
+                discord.webhook_url(), username="bot", max_concurrency=1
+            ),
+            "one",
+            "two",
+        )
+    )
+    assert [m["content"] for m in discord.messages()] == [
+        "```ansi\none```",
+        "```ansi\ntwo```",
+    ]
+    assert discord.messages()[0]["username"] == "bot"
+
+
+@pytest.mark.timeout(30)
+def test_channel_and_dm_handlers(discord: FakeDiscord):
+    async def main():
+        await log(
+            AsyncDiscordChannelHandler("secret", 1234, api_url=discord.api_url), "one"
+        )
+        await log(AsyncDiscordDMHandler("secret", 93, api_url=discord.api_url), "two")
+
+    asyncio.run(main())
+    assert [r.path for r in discord.requests] == [
+        "/api/channels/1234/messages",
+        "/api/users/@me/channels",
+        "/api/channels/93/messages",
+    ]
+    assert discord.requests[0].headers["Authorization"] == "Bot secret"
+
+
+@pytest.mark.timeout(30)
+def test_records_logged_while_sending_are_ignored(discord: FakeDiscord):
+    """The HTTP client's own debug records, logged from the threads making the requests, must not be sent."""
+
+    async def main():
+        handler = AsyncDiscordWebhookHandler(
+            discord.webhook_url(), rate_limiter=RateLimiter()
+        )
+        root = logging.getLogger()
+        level = root.level
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        try:
+            logging.getLogger("test_async_handlers").info("hello")
+            await handler.aflush()
+            await asyncio.sleep(0.5)
+            await handler.aflush()
+        finally:
+            root.removeHandler(handler)
+            root.setLevel(level)
+            await handler.aclose()
+
+    asyncio.run(main())
+    assert [m["content"] for m in discord.messages()] == ["```ansi\nhello```"]
+
+
+@pytest.mark.timeout(30)
+def test_server_errors_are_retried():
+    statuses = [503, 502]
+
+    def respond(request):
+        return Response(statuses.pop(0) if statuses else 204, {}, b"")
+
+    transport = RecordingTransport(respond=respond)
+    asyncio.run(
+        log(
+            AsyncDiscordWebhookHandler(
+                "https://discord.invalid/api/webhooks/1/token",
+                transport=transport,
+                rate_limiter=RateLimiter(),
+            ),
+            "hello",
+        )
+    )
+    assert len(transport.requests) == 3
+    assert transport.messages()[-1]["content"] == "```ansi\nhello```"
+
+
+@pytest.mark.timeout(30)
+def test_handlers_share_the_thread_pool(discord: FakeDiscord):
+    async def main():
+        before = threading.active_count()
+        handlers = [
+            AsyncDiscordWebhookHandler(discord.webhook_url(i)) for i in range(10)
+        ]
+        assert threading.active_count() == before
+        for handler in handlers:
+            await log(handler, "hello")
+        assert handlers[0].transport is handlers[-1].transport
+
+    asyncio.run(main())
+    assert len(discord.messages()) == 10
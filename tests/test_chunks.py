@@ -0,0 +1,32 @@
+from discord_lumberjack.message_creators.chunks import text_chunks
+
+
+def test_whole_lines_are_packed():
+    text = "\n".join(f"line {i}" for i in range(10))
+    chunks = list(text_chunks(text, 20))
+    assert all(len(chunk) <= 20 for chunk in chunks)
+    assert "\n".join(chunks) == text
+    assert chunks[0] == "line 0\nline 1\nline 2"
+
+
+def test_long_lines_are_split():
+    assert list(text_chunks("short\n" + "x" * 25, 10)) == [
+        "short",
+        "x" * 10,
+        "x" * 10,
+        "x" * 5,
+    ]
+    assert list(text_chunks("", 10)) == []
+
+
+def test_escape_sequences_are_not_split():
+    text = "abcdefg\x1b[31;1mred\x1b[0m"
+    chunks = list(text_chunks(text, 10))
+    assert chunks[0] == "abcdefg"
+    assert "".join(chunks) == text
+
+
+def test_surrogate_pairs_and_backticks_are_not_split():
+    pair = "\ud83d\ude00"
+    assert list(text_chunks(f"abcd{pair}ef", 5)) == ["abcd", f"{pair}ef"]
+    assert list(text_chunks("abc```def", 4)) == ["abc", "```d", "ef"]
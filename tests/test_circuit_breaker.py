@@ -0,0 +1,140 @@
+import logging
+import time
+from typing import List
+import pytest
+from discord_lumberjack.handlers import (
+    CircuitBreaker,
+    CircuitState,
+    DiscordWebhookHandler,
+    RateLimiter,
+)
+from discord_lumberjack.message_creators import BasicMessageCreator
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+from discord_lumberjack.transports import Response
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow()
+
+
+def test_probes_after_reset_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 9
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 19
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow()
+
+
+@pytest.mark.timeout(30)
+def test_records_go_to_fallback_while_open():
+    fallback = ListHandler()
+    with FakeDiscord() as discord:
+        handler = DiscordWebhookHandler(
+            discord.webhook_url(),
+            flush_on_exit=False,
+            rate_limiter=RateLimiter(),
+            max_retries=1,
+            circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.5),
+            fallback_handler=fallback,
+        )
+        logger = logging.Logger("test_circuit_breaker")
+        logger.addHandler(handler)
+        try:
+            discord.failure_status = 503
+            for i in range(10):
+                logger.info(f"message {i}")
+            handler.flush(raise_exceptions=False)
+            assert discord.failed == 4
+            assert [r.getMessage() for r in fallback.records] == [
+                f"message {i}" for i in range(1, 10)
+            ]
+            assert handler.stats()["circuit_open"] == 1
+            discord.failure_status = 0
+            time.sleep(0.5)
+            logger.info("recovered")
+            handler.flush(raise_exceptions=False)
+            handler.close()
+            assert [m["content"] for m in discord.messages()] == [
+                "```ansi\nrecovered```"
+            ]
+            stats = handler.stats()
+            assert stats["circuit_open"] == 0
+            assert stats["records_failed"] == 1
+            assert stats["records_diverted"] == 9
+            with pytest.raises(RuntimeError):
+                handler.flush()
+        finally:
+            handler.close()
+
+
+class FailingMessageCreator(BasicMessageCreator):
+    def messages(self, record, format_func):
+        if record.msg == "bad":
+            raise ValueError("Can't create the message.")
+        return super().messages(record, format_func)
+
+
+@pytest.mark.timeout(30)
+@pytest.mark.parametrize("probe", ["", "bad"])
+def test_probe_without_a_request_is_released(probe: str):
+    statuses = [503, 200, 200]
+    transport = RecordingTransport(respond=lambda _: Response(statuses.pop(0), {}, b""))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    handler = DiscordWebhookHandler(
+        "https://discord.invalid/api/webhooks/1/token",
+        flush_on_exit=False,
+        message_creator=FailingMessageCreator(),
+        max_retries=0,
+        circuit_breaker=breaker,
+        transport=transport,
+    )
+    logger = logging.Logger("test_circuit_breaker")
+    logger.addHandler(handler)
+    try:
+        for message in ("down", probe, "up", "again"):
+            logger.info(message)
+            handler.flush(raise_exceptions=False)
+    finally:
+        handler.close()
+    assert breaker.state is CircuitState.CLOSED
+    assert len(transport.requests) == 3
+    assert handler.stats()["records_failed"] == (2 if probe else 1)
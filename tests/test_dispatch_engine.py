@@ -0,0 +1,148 @@
+import logging
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from discord_lumberjack.handlers import (
+    DiscordWebhookHandler,
+    DispatchEngine,
+    RateLimiter,
+)
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+
+exit_script = """
+import logging, sys
+from discord_lumberjack.handlers import DiscordWebhookHandler, DispatchEngine
+engine = DispatchEngine(workers=1)
+for webhook_id in (1, 2):
+    logger = logging.getLogger(f"test_dispatch_engine.{webhook_id}")
+    logger.addHandler(DiscordWebhookHandler(f"{sys.argv[1]}/webhooks/{webhook_id}/token", engine=engine))
+    logger.setLevel(logging.INFO)
+    for i in range(3):
+        logger.info("record %d", i)
+"""
+
+
+def contents(messages) -> list:
+    return [m["content"][len("```ansi\n") : -len("```")] for m in messages]
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.Logger(name)
+    logger.addHandler(handler)
+    return logger
+
+
+@pytest.mark.timeout(30)
+def test_handlers_are_served_in_turn():
+    transport = RecordingTransport(latency=0.01)
+    engine = DispatchEngine(workers=1, transport=transport)
+    busy = DiscordWebhookHandler("https://discord.test/webhooks/1/a", engine=engine)
+    quiet = DiscordWebhookHandler("https://discord.test/webhooks/2/b", engine=engine)
+    for i in range(50):
+        make_logger("busy", busy).info("busy %d", i)
+    make_logger("quiet", quiet).info("quiet")
+    engine.flush()
+    sent = contents(transport.messages())
+    assert sent.index("quiet") < 5
+    busy.close()
+    quiet.close()
+
+
+@pytest.mark.timeout(30)
+def test_rate_limited_handler_doesnt_hold_up_the_others():
+    with FakeDiscord(rate_limit=1, rate_limit_window=2) as discord:
+        engine = DispatchEngine(workers=1)
+        rate_limiter = RateLimiter()
+        limited = DiscordWebhookHandler(
+            discord.webhook_url(1), engine=engine, rate_limiter=rate_limiter
+        )
+        other = DiscordWebhookHandler(
+            discord.webhook_url(2), engine=engine, rate_limiter=rate_limiter
+        )
+        make_logger("limited", limited).info("first")
+        limited.flush()
+        make_logger("limited", limited).info("second")
+        time.sleep(0.1)  # Let the engine find out that it has to wait.
+        started = time.monotonic()
+        make_logger("other", other).info("other")
+        other.flush()
+        assert time.monotonic() - started < 1
+        limited.flush()
+        assert contents(discord.messages()) == ["first", "other", "second"]
+        assert discord.rate_limited == 0
+        limited.close()
+        other.close()
+
+
+@pytest.mark.timeout(30)
+def test_order_of_each_handler_is_kept():
+    transport = RecordingTransport(latency=0.005)
+    engine = DispatchEngine(workers=4, transport=transport)
+    handlers = [
+        DiscordWebhookHandler(f"https://discord.test/webhooks/{i}/t", engine=engine)
+        for i in range(3)
+    ]
+    for i in range(20):
+        for n, handler in enumerate(handlers):
+            make_logger(f"handler{n}", handler).info("%d %d", n, i)
+    engine.flush()
+    sent = [tuple(map(int, c.split())) for c in contents(transport.messages())]
+    for n in range(3):
+        assert [i for m, i in sent if m == n] == list(range(20))
+    for handler in handlers:
+        handler.close()
+
+
+@pytest.mark.timeout(60)
+def test_queued_records_are_sent_at_exit():
+    with FakeDiscord(rate_limit=1000) as discord:
+        subprocess.run(
+            [sys.executable, "-c", exit_script, discord.api_url],
+            check=True,
+            timeout=30,
+        )
+        assert sorted(contents(discord.messages())) == sorted(
+            f"record {i}" for i in range(3) for _ in range(2)
+        )
+
+
+@pytest.mark.timeout(30)
+def test_records_logged_by_the_engine_threads_are_ignored():
+    with FakeDiscord(rate_limit=1000) as discord:
+        engine = DispatchEngine(workers=2)
+        handler = DiscordWebhookHandler(discord.webhook_url(), engine=engine)
+        root = logging.getLogger()
+        level = root.level
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        try:
+            logging.getLogger("test_dispatch_engine").info("hello")
+            engine.flush()
+            time.sleep(0.5)  # Give any feedback a chance to show up.
+            engine.flush()
+        finally:
+            root.removeHandler(handler)
+            root.setLevel(level)
+            handler.close()
+        assert contents(discord.messages()) == ["hello"]
+
+
+@pytest.mark.timeout(30)
+def test_close_stops_the_engine(monkeypatch):
+    with FakeDiscord(rate_limit=1000) as discord:
+        engine = DispatchEngine(workers=2)
+        closed = []
+        monkeypatch.setattr(engine.transport, "close", lambda: closed.append(True))
+        handler = DiscordWebhookHandler(discord.webhook_url(), engine=engine)
+        make_logger("closed", handler).info("before close")
+        engine.close()
+        assert contents(discord.messages()) == ["before close"]
+        assert closed == [True], "The engine's own transport should be closed."
+        assert not any(
+            engine.owns_thread(t.ident) for t in threading.enumerate() if t.ident
+        ), "The sender threads should have stopped."
+        with pytest.raises(RuntimeError):
+            DiscordWebhookHandler(discord.webhook_url(), engine=engine)
+        engine.close()
@@ -0,0 +1,381 @@
+import json
+import logging
+import sys
+import time
+import pytest
+from discord_lumberjack.handlers import (
+    DiscordChannelHandler,
+    DiscordDMHandler,
+    DiscordWebhookHandler,
+    RateLimiter,
+)
+from discord_lumberjack.handlers.discord_dm_handler import _dm_channels
+from discord_lumberjack.message_creators import (
+    AttachmentMessageCreator,
+    EmbedMessageCreator,
+)
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+from discord_lumberjack.transports import Response
+
+
+@pytest.fixture
+def discord():
+    with FakeDiscord() as fake:
+        yield fake
+
+
+def log(handler, *messages: str) -> None:
+    logger = logging.Logger("test_fake_discord")
+    logger.addHandler(handler)
+    for message in messages:
+        logger.info(message)
+    handler.flush()
+    handler.close()
+
+
+@pytest.mark.timeout(30)
+def test_webhook_handler(discord: FakeDiscord):
+    log(
+        DiscordWebhookHandler(
+            discord.webhook_url(), username="bot", flush_on_exit=False
+        ),
+        "hello",
+    )
+    assert [m["content"] for m in discord.messages()] == ["```ansi\nhello```"]
+    assert discord.messages()[0]["username"] == "bot"
+
+
+@pytest.mark.timeout(30)
+def test_channel_handler(discord: FakeDiscord):
+    log(
+        DiscordChannelHandler(
+            "secret", 1234, api_url=discord.api_url, flush_on_exit=False
+        ),
+        "hello",
+    )
+    (request,) = discord.requests
+    assert request.path == "/api/channels/1234/messages"
+    assert request.headers["Authorization"] == "Bot secret"
+
+
+@pytest.mark.timeout(30)
+def test_dm_handler(discord: FakeDiscord):
+    log(
+        DiscordDMHandler("secret", 5678, api_url=discord.api_url, flush_on_exit=False),
+        "hello",
+    )
+    assert [r.path for r in discord.requests] == [
+        "/api/users/@me/channels",
+        "/api/channels/5678/messages",
+    ]
+
+
+@pytest.mark.timeout(30)
+def test_dm_channel_is_created_lazily_once(discord: FakeDiscord):
+    first = DiscordDMHandler("secret", 91, api_url=discord.api_url, flush_on_exit=False)
+    second = DiscordDMHandler(
+        "secret", 91, api_url=discord.api_url, flush_on_exit=False
+    )
+    assert discord.requests == []
+    log(first, "hello")
+    log(second, "again")
+    assert [r.path for r in discord.requests] == [
+        "/api/users/@me/channels",
+        "/api/channels/91/messages",
+        "/api/channels/91/messages",
+    ]
+
+
+@pytest.mark.timeout(30)
+def test_dm_channel_cache_file(discord: FakeDiscord, tmp_path):
+    cache_path = str(tmp_path / "dm_channels.json")
+    log(
+        DiscordDMHandler(
+            "id.timestamp.hmac",
+            92,
+            api_url=discord.api_url,
+            dm_cache_path=cache_path,
+            flush_on_exit=False,
+        ),
+        "hello",
+    )
+    with open(cache_path) as file:
+        host = discord.url.split("://")[1]
+        assert json.load(file) == {f"{host}/id:92": "92"}
+    _dm_channels.clear()
+    log(
+        DiscordDMHandler(
+            "id.timestamp.hmac",
+            92,
+            api_url=discord.api_url,
+            dm_cache_path=cache_path,
+            flush_on_exit=False,
+        ),
+        "again",
+    )
+    assert [r.path for r in discord.requests] == [
+        "/api/users/@me/channels",
+        "/api/channels/92/messages",
+        "/api/channels/92/messages",
+    ]
+
+
+@pytest.mark.timeout(30)
+def test_long_record_is_sent_as_one_attachment(discord: FakeDiscord):
+    log(
+        DiscordWebhookHandler(
+            discord.webhook_url(),
+            message_creator=AttachmentMessageCreator(threshold=2000),
+            flush_on_exit=False,
+        ),
+        "long\n" + "x" * 40000,
+    )
+    (request,) = discord.requests
+    assert request.json()["attachments"] == [{"id": 0, "filename": "record.log"}]
+    assert request.files()["record.log"] == ("long\n" + "x" * 40000).encode()
+
+
+@pytest.mark.timeout(30)
+def test_rate_limits_are_respected():
+    with FakeDiscord(rate_limit=2, rate_limit_window=0.5) as discord:
+        log(
+            DiscordChannelHandler(
+                "secret",
+                1234,
+                api_url=discord.api_url,
+                flush_on_exit=False,
+                rate_limiter=RateLimiter(),
+            ),
+            *(f"message {i}" for i in range(5)),
+        )
+        assert len(discord.messages()) == 5
+        assert discord.rate_limited <= 1, "Only the first request is made blind."
+
+
+@pytest.mark.timeout(30)
+def test_own_records_are_not_sent(discord: FakeDiscord):
+    handler = DiscordWebhookHandler(discord.webhook_url(), flush_on_exit=False)
+    own = logging.LogRecord("discord_lumberjack.x", logging.INFO, "", 1, "", (), None)
+    assert not handler.handle(own), "Records of the library must be filtered out."
+    handler.addFilter(lambda r: r.msg != "filtered")
+    log(handler, "filtered", "kept")
+    assert [m["content"] for m in discord.messages()] == ["```ansi\nkept```"]
+    assert handler.stats()["records_enqueued"] == 1
+
+
+def log_separately(handler, *messages: str) -> None:
+    logger = logging.Logger("test_fake_discord")
+    logger.addHandler(handler)
+    for message in messages:
+        logger.info(message)
+        handler.flush()
+    handler.close()
+
+
+@pytest.mark.timeout(30)
+def test_tail_mode_edits_the_last_message(discord: FakeDiscord):
+    handler = DiscordWebhookHandler(
+        discord.webhook_url(), tail=True, flush_on_exit=False
+    )
+    log_separately(handler, "one", "two", "three")
+    post, *edits = discord.requests
+    assert post.method == "POST" and post.path == "/api/webhooks/1/token?wait=true"
+    assert [r.method for r in edits] == ["PATCH", "PATCH"]
+    assert {r.path for r in edits} == {
+        "/api/webhooks/1/token/messages/100000000000000000"
+    }
+    assert edits[-1].json()["content"] == "```ansi\none\ntwo\nthree```"
+    assert len(discord.messages()) == 1
+    assert handler.stats()["messages_edited"] == 2
+
+
+@pytest.mark.timeout(30)
+def test_tail_mode_rolls_over(discord: FakeDiscord):
+    handler = DiscordChannelHandler(
+        "secret", 1234, api_url=discord.api_url, tail=True, flush_on_exit=False
+    )
+    log_separately(handler, "a" * 900, "b" * 900, "c" * 900, "d")
+    assert [(r.method, r.path) for r in discord.requests] == [
+        ("POST", "/api/channels/1234/messages"),
+        ("PATCH", "/api/channels/1234/messages/100000000000000000"),
+        ("POST", "/api/channels/1234/messages"),
+        ("PATCH", "/api/channels/1234/messages/100000000000000001"),
+    ]
+    assert discord.requests[-1].json()["content"] == "```ansi\n" + "c" * 900 + "\nd```"
+
+
+@pytest.mark.timeout(30)
+def test_tail_mode_replaces_a_deleted_message():
+    def respond(request):
+        if request.method == "PATCH":
+            return Response(404, {}, b'{"message": "Unknown Message"}')
+        return Response(200, {}, b'{"id": "42"}')
+
+    transport = RecordingTransport(respond=respond)
+    handler = DiscordChannelHandler(
+        "secret",
+        1234,
+        api_url="https://discord.invalid/api",
+        tail=True,
+        transport=transport,
+        flush_on_exit=False,
+    )
+    log_separately(handler, "one", "two")
+    assert [(r.method, r.path) for r in transport.requests] == [
+        ("POST", "/api/channels/1234/messages"),
+        ("PATCH", "/api/channels/1234/messages/42"),
+        ("POST", "/api/channels/1234/messages"),
+    ]
+    assert transport.messages()[-1]["content"] == "```ansi\ntwo```"
+
+
+@pytest.mark.timeout(30)
+def test_tail_mode_keeps_what_the_live_message_says(discord: FakeDiscord):
+    handler = DiscordWebhookHandler(
+        discord.webhook_url(),
+        message_creator=EmbedMessageCreator(exception_ttl=60),
+        tail=True,
+        flush_on_exit=False,
+    )
+    logger = logging.Logger("test_fake_discord")
+    logger.addHandler(handler)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    handler.flush()
+    log_separately(handler, "next")
+    post, edit = discord.requests
+    assert edit.method == "PATCH"
+    first, second = edit.json()["embeds"]
+    assert first == post.json()["embeds"][0], "The traceback was created again."
+    assert "Same traceback" not in json.dumps(edit.json())
+    assert second["title"] == "next"
+
+
+@pytest.mark.timeout(30)
+def test_pool_avoids_a_rate_limited_webhook():
+    with FakeDiscord(rate_limit=2, rate_limit_window=5) as discord:
+        rate_limiter = RateLimiter()
+        log(
+            DiscordWebhookHandler(
+                discord.webhook_url(1),
+                rate_limiter=rate_limiter,
+                flush_on_exit=False,
+            ),
+            "one",
+            "two",
+        )
+        started = time.monotonic()
+        log(
+            DiscordWebhookHandler(
+                [discord.webhook_url(i) for i in (1, 2, 3)],
+                rate_limiter=rate_limiter,
+                flush_on_exit=False,
+            ),
+            *(f"pooled {i}" for i in range(4)),
+        )
+        assert time.monotonic() - started < 2, "No request should have waited."
+        pooled = [r.path.split("?")[0] for r in discord.requests[2:]]
+        assert sorted(pooled) == [
+            "/api/webhooks/2/token",
+            "/api/webhooks/2/token",
+            "/api/webhooks/3/token",
+            "/api/webhooks/3/token",
+        ]
+        assert discord.rate_limited == 0
+
+
+@pytest.mark.timeout(30)
+def test_pool_keeps_the_order_of_a_records_messages():
+    with FakeDiscord(rate_limit=1000) as discord:
+        text = "".join(f"{i:04d} " for i in range(900))
+        log(
+            DiscordWebhookHandler(
+                [discord.webhook_url(i) for i in (1, 2, 3)], flush_on_exit=False
+            ),
+            text,
+        )
+        assert len({r.path for r in discord.requests}) > 1
+        chunks = [
+            m["content"][len("```ansi\n") : -len("```")] for m in discord.messages()
+        ]
+        assert len(chunks) > 1
+        assert "".join(chunks) == text
+
+
+@pytest.mark.timeout(30)
+def test_pool_tracks_each_destinations_bucket():
+    with FakeDiscord(rate_limit=3, rate_limit_window=5) as discord:
+        rate_limiter = RateLimiter()
+        log(
+            DiscordChannelHandler(
+                "first",
+                1234,
+                pool=[("second", 5678)],
+                api_url=discord.api_url,
+                rate_limiter=rate_limiter,
+                flush_on_exit=False,
+            ),
+            *(f"message {i}" for i in range(6)),
+        )
+        paths = [r.path for r in discord.requests]
+        assert paths.count("/api/channels/1234/messages") == 3
+        assert paths.count("/api/channels/5678/messages") == 3
+        assert discord.rate_limited == 0
+        first = f"{discord.api_url}/channels/1234/messages"
+        second = f"{discord.api_url}/channels/5678/messages"
+        assert rate_limiter.remaining("POST", first, "Bot first") < 0
+        assert rate_limiter.remaining("POST", second, "Bot second") < 0
+        assert rate_limiter.remaining("POST", first, "Bot second") == float("inf")
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 12), reason="Filters may only return records from 3.12."
+)
+@pytest.mark.timeout(30)
+def test_record_returned_by_a_filter_is_sent(discord: FakeDiscord):
+    handler = DiscordWebhookHandler(discord.webhook_url(), flush_on_exit=False)
+    handler.addFilter(
+        lambda r: logging.makeLogRecord({**r.__dict__, "msg": "replaced"})
+    )
+    log(handler, "original")
+    assert [m["content"] for m in discord.messages()] == ["```ansi\nreplaced```"]
+
+
+@pytest.mark.timeout(30)
+def test_dm_channel_is_forgotten_when_it_no_longer_exists(tmp_path):
+    cache_path = str(tmp_path / "dm_channels.json")
+    with open(cache_path, "w") as file:
+        json.dump({"discord.invalid/id:94": "13"}, file)
+
+    def respond(request):
+        if request.path == "/api/channels/13/messages":
+            return Response(404, {}, b'{"message": "Unknown Channel"}')
+        return Response(200, {}, b'{"id": "94"}')
+
+    transport = RecordingTransport(respond=respond)
+    handler = DiscordDMHandler(
+        "id.timestamp.hmac",
+        94,
+        api_url="https://discord.invalid/api",
+        dm_cache_path=cache_path,
+        transport=transport,
+        flush_on_exit=False,
+    )
+    logger = logging.Logger("test_fake_discord")
+    logger.addHandler(handler)
+    logger.info("lost")
+    handler.flush(raise_exceptions=False)
+    with open(cache_path) as file:
+        assert json.load(file) == {}
+    logger.info("found")
+    handler.flush(raise_exceptions=False)
+    handler.close()
+    assert [r.path for r in transport.requests] == [
+        "/api/channels/13/messages",
+        "/api/users/@me/channels",
+        "/api/channels/94/messages",
+    ]
+    with open(cache_path) as file:
+        assert json.load(file) == {"discord.invalid/id:94": "94"}
@@ -0,0 +1,91 @@
+import logging
+import socket
+import time
+import pytest
+from discord_lumberjack.handlers import DiscordWebhookHandler, FanInHandler
+from discord_lumberjack.testing import FakeDiscord
+
+
+@pytest.mark.timeout(30)
+def test_records_are_funnelled_into_the_elected_handler(tmp_path):
+    path = str(tmp_path / "discord.sock")
+    with FakeDiscord(rate_limit=1000) as discord:
+        created = []
+
+        def handler_factory():
+            handler = DiscordWebhookHandler(discord.webhook_url(), flush_on_exit=False)
+            created.append(handler)
+            return handler
+
+        # Two handlers in one process stand in for two worker processes.
+        first = FanInHandler(path, handler_factory)
+        second = FanInHandler(path, handler_factory)
+        logger = logging.Logger("test_fan_in")
+        for i, handler in enumerate((first, second, first)):
+            handler.handle(
+                logger.makeRecord("w", logging.INFO, "", 1, "r%d", (i,), None)
+            )
+        assert first.is_elected and not second.is_elected
+        second.handle(logger.makeRecord("w", logging.INFO, "", 1, "r3", None, None))
+        first.flush()  # The second handler's records may still be in transit.
+        first.close()
+        second.handle(logger.makeRecord("w", logging.INFO, "", 1, "r4", None, None))
+        assert second.is_elected, "A new process should be elected."
+        second.close()
+        contents = {m["content"] for m in discord.messages()}
+        assert len(created) == 2
+        assert {"```ansi\nr0```", "```ansi\nr2```", "```ansi\nr4```"} <= contents
+
+
+@pytest.mark.timeout(30)
+def test_records_logged_while_sending_are_ignored(tmp_path):
+    path = str(tmp_path / "discord.sock")
+    with FakeDiscord(rate_limit=1000) as discord:
+        handler = FanInHandler(
+            path,
+            lambda: DiscordWebhookHandler(discord.webhook_url(), flush_on_exit=False),
+        )
+        root = logging.getLogger()
+        level = root.level
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        try:
+            logging.getLogger("test_fan_in").info("hello")
+            handler.flush()
+            time.sleep(0.5)  # Give any feedback a chance to show up.
+            handler.flush()
+        finally:
+            root.removeHandler(handler)
+            root.setLevel(level)
+            handler.close()
+        assert [m["content"] for m in discord.messages()] == ["```ansi\nhello```"]
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.mark.timeout(30)
+def test_records_are_kept_locally_while_the_elected_process_stalls(tmp_path):
+    path = str(tmp_path / "discord.sock")
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stalled.bind(path)
+    stalled.listen()  # Accepts connections but never reads from them.
+    fallback = ListHandler()
+    handler = FanInHandler(path, lambda: fallback, send_timeout=0.1)
+    logger = logging.Logger("test_fan_in")
+    logger.addHandler(handler)
+    try:
+        for i in range(20):
+            started = time.monotonic()
+            logger.info("%d %s", i, "x" * 100000)
+            assert time.monotonic() - started < 1
+    finally:
+        handler.close()
+        stalled.close()
+    assert fallback.records, "Records that couldn't be sent should be kept locally."
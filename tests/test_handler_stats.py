@@ -0,0 +1,35 @@
+from discord_lumberjack.handlers import prometheus_text
+from discord_lumberjack.handlers.handler_stats import HandlerStats, Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5))
+    for value in (0.5, 2, 3, 10):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {1: 1, 5: 3, float("inf"): 4}
+    assert snapshot["count"] == 4 and snapshot["sum"] == 15.5
+
+
+class FakeHandler:
+    def __init__(self) -> None:
+        self.__stats = HandlerStats()
+        self.__stats.records_sent = 4
+        self.__stats.requests = 2
+
+    def get_name(self) -> str:
+        return 'my "handler"'
+
+    def stats(self):
+        return self.__stats.snapshot(3, 7, 1)
+
+
+def test_prometheus_text():
+    text = prometheus_text([FakeHandler()])  # type: ignore
+    assert "# TYPE discord_lumberjack_records_sent_total counter" in text
+    assert 'discord_lumberjack_records_sent_total{handler="my \\"handler\\""} 4' in text
+    assert 'discord_lumberjack_queue_high_water{handler="my \\"handler\\""} 7' in text
+    assert (
+        'discord_lumberjack_requests_per_record{handler="my \\"handler\\""} 0.5' in text
+    )
+    assert 'send_latency_seconds_bucket{handler="my \\"handler\\"",le="+Inf"} 0' in text
@@ -1,6 +1,13 @@
+import gzip
+import sys
 from logging import LogRecord, Logger
 from typing import Callable
-from discord_lumberjack.message_creators import MessageCreator, EmbedMessageCreator
+from discord_lumberjack.message_creators import (
+    AttachmentMessageCreator,
+    BasicMessageCreator,
+    EmbedMessageCreator,
+    MessageCreator,
+)
 from tests.utils import assert_messages_sent
 
 
@@ -57,3 +64,103 @@ def test_embed_long_message_creator(
     assert (
         len(list(embed_long_message_creator.messages(long_record, lambda _: ""))) == 1
     ), "EmbedLongMessageCreator should only send one message for the testing long_record."
+
+
+def test_basic_batch_messages_packs_records(record: LogRecord):
+    creator = BasicMessageCreator()
+    msgs = list(creator.batch_messages([record] * 500, lambda r: r.getMessage()))
+    assert all(len(msg["content"]) <= 2000 for msg in msgs), "Messages are too long."
+    assert len(msgs) == 8, "Records should be packed into as few messages as possible."
+    lines = "".join(msg["content"] for msg in msgs).count(record.getMessage())
+    assert lines == 500, "Every record should be in the messages."
+
+
+def test_embed_batch_messages_packs_records(
+    embed_message_creator: EmbedMessageCreator, record: LogRecord
+):
+    msgs = list(embed_message_creator.batch_messages([record] * 25, lambda _: ""))
+    assert len(msgs) == 3, "Embeds of different records should share messages."
+    assert all(len(msg["embeds"]) <= 10 for msg in msgs), "Too many embeds."
+
+
+def test_embed_overridden_getters_are_used(long_record: LogRecord):
+    class FooterMessageCreator(EmbedMessageCreator):
+        def get_footer_text(self, record: LogRecord) -> str:
+            return "footer"
+
+    embeds = [
+        embed
+        for msg in FooterMessageCreator().messages(long_record, lambda _: "")
+        for embed in msg["embeds"]
+    ]
+    assert len(embeds) == 2, "The long title should be split into two embeds."
+    assert embeds[0]["title"] + embeds[1]["title"] == long_record.getMessage()
+    assert embeds[0]["footer"]["text"] is None, "Later fields go in the last embed."
+    assert embeds[1]["footer"]["text"] == "footer", "Overridden getter was skipped."
+
+
+def test_attachment_message_creator_attaches_long_records(record: LogRecord):
+    creator = AttachmentMessageCreator(threshold=100, compress=True)
+    text = "first line\n" + "x" * 5000
+    (message,) = creator.messages(record, lambda r: text if r is record else r.msg)
+    (attachment,) = message["files"]
+    assert attachment.filename == "record.log.gz"
+    assert gzip.decompress(attachment.content).decode() == text
+    assert "full record attached as record.log.gz" in message["content"]
+
+
+def test_attachment_message_creator_without_a_summary_message(record: LogRecord):
+    class SilentMessageCreator(BasicMessageCreator):
+        def messages(self, record, format_func):
+            return iter(())
+
+    creator = AttachmentMessageCreator(SilentMessageCreator(), threshold=100)
+    text = "first line\n" + "x" * 5000
+    (message,) = creator.batch_messages([record], lambda _: text)
+    assert message["content"].endswith("(full record attached as record.log)")
+    assert message["files"][0].content == text.encode()
+
+
+def test_attachment_message_creator_batches_short_records(record: LogRecord):
+    creator = AttachmentMessageCreator(threshold=100)
+    texts = {"a": "short", "b": "y" * 500, "c": "also short", "d": "fine"}
+    records = [LogRecord("test", 20, __file__, 1, key, None, None) for key in texts]
+    messages = list(creator.batch_messages(records, lambda r: texts.get(r.msg, r.msg)))
+    assert [bool(m.get("files")) for m in messages] == [False, True, False]
+    assert messages[2]["content"] == "```ansi\nalso short\nfine```"
+
+
+def test_embed_repeated_exceptions_are_referenced():
+    creator = EmbedMessageCreator(exception_ttl=60)
+    values = []
+    for _ in range(3):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = LogRecord("test", 40, __file__, 1, "failed", None, sys.exc_info())
+        (message,) = creator.messages(record, lambda _: "")
+        values.append(message["embeds"][0]["fields"][0]["value"])
+    reference = values[0].split("`")[1]
+    assert "```" in values[0]
+    assert values[1:] == [
+        f"Same traceback as `{reference}` (occurrence {n})" for n in (2, 3)
+    ]
+
+
+def test_combine_messages_appends_within_the_limits(record: LogRecord):
+    basic = BasicMessageCreator()
+    first = {"content": "```ansi\none```", "username": "bot"}
+    combined = basic.combine_messages(first, {"content": "```ansi\ntwo```"})
+    assert combined == {"content": "```ansi\none\ntwo```", "username": "bot"}
+    long = {"content": "```ansi\n" + "x" * 1000 + "```"}
+    assert basic.combine_messages(long, long) is None, "Combined content is too long."
+    embeds = EmbedMessageCreator()
+    (message,) = embeds.messages(record, lambda _: "")
+    assert len(embeds.combine_messages(message, message)["embeds"]) == 2
+    assert embeds.combine_messages({"embeds": message["embeds"] * 10}, message) is None
+    attachments = AttachmentMessageCreator()
+    assert attachments.combine_messages(first, first) == {
+        "content": "```ansi\none\none```",
+        "username": "bot",
+    }
+    assert attachments.combine_messages({**first, "files": ["f"]}, first) is None
@@ -0,0 +1,71 @@
+from typing import List
+from discord_lumberjack.handlers import RateLimiter
+
+URL = "https://discord.com/api/channels/123456789012345678/messages"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def headers(remaining: int, reset_after: float, **extra: str):
+    return {
+        "X-RateLimit-Limit": "5",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset-After": str(reset_after),
+        "X-RateLimit-Bucket": "abcd",
+        **extra,
+    }
+
+
+def test_paces_requests_when_bucket_exhausted():
+    clock = FakeClock()
+    limiter = RateLimiter(clock, clock.sleep)
+    assert limiter.acquire("POST", URL) == 0
+    limiter.update("POST", URL, 200, headers(0, 2.5))
+    assert limiter.acquire("POST", URL) == 2.5, "Should wait until the bucket resets."
+    assert clock.sleeps == [2.5]
+
+
+def test_429_waits_for_retry_after():
+    clock = FakeClock()
+    limiter = RateLimiter(clock, clock.sleep)
+    limiter.acquire("POST", URL)
+    retry_after = limiter.update(
+        "POST", URL, 429, headers(0, 0.5, **{"Retry-After": "3"})
+    )
+    assert retry_after == 3
+    assert limiter.acquire("POST", URL) == 3
+
+
+def test_global_limit_applies_to_all_routes_of_identity():
+    clock = FakeClock()
+    limiter = RateLimiter(clock, clock.sleep)
+    limiter.update(
+        "POST",
+        URL,
+        429,
+        {"Retry-After": "1.5", "X-RateLimit-Global": "true"},
+        identity="bot",
+    )
+    other_url = "https://discord.com/api/channels/987654321098765432/messages"
+    assert limiter.acquire("POST", other_url, "bot") == 1.5
+    assert limiter.acquire("POST", other_url, "other bot") == 0
+
+
+def test_major_parameters_have_separate_buckets():
+    clock = FakeClock()
+    limiter = RateLimiter(clock, clock.sleep)
+    limiter.update("POST", URL, 200, headers(0, 10))
+    other_url = "https://discord.com/api/channels/987654321098765432/messages"
+    assert limiter.acquire("POST", other_url) == 0
+    assert limiter.remaining("POST", URL) < 0
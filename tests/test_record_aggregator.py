@@ -0,0 +1,39 @@
+import logging
+from discord_lumberjack.handlers import RecordAggregator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_record(msg: str = "Failed %d times", lineno: int = 1) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.ERROR, "file.py", lineno, msg, (3,), None)
+
+
+def test_duplicates_are_counted_and_summarised():
+    clock = FakeClock()
+    aggregator = RecordAggregator(10, clock=clock)
+    assert aggregator.add(make_record()), "The first occurrence should be sent."
+    assert not any(aggregator.add(make_record()) for _ in range(99))
+    assert aggregator.add(make_record(lineno=2)), "Other statements aren't duplicates."
+    assert aggregator.summaries() == [], "The window isn't over yet."
+    clock.now = 10
+    (summary,) = aggregator.summaries()
+    assert summary.getMessage().startswith("Failed 3 times (repeated 99 more times")
+    assert aggregator.add(make_record()), "A new window should have started."
+
+
+def test_flush_and_eviction_report_repeats():
+    clock = FakeClock()
+    aggregator = RecordAggregator(10, max_fingerprints=1, clock=clock)
+    aggregator.add(make_record())
+    aggregator.add(make_record())
+    aggregator.add(make_record(lineno=2))
+    aggregator.add(make_record(lineno=2))
+    assert len(aggregator.summaries()) == 1, "The evicted repeats should be reported."
+    assert len(aggregator.summaries(flush=True)) == 1
+    assert aggregator.summaries(flush=True) == []
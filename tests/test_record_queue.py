@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from discord_lumberjack.handlers import OverflowPolicy, RecordQueue
+
+
+def make_record(level: int, msg: str = "message") -> logging.LogRecord:
+    return logging.LogRecord("test", level, "file.py", 1, msg, None, None)
+
+
+def drain(queue: RecordQueue):
+    records = []
+    while queue.qsize():
+        records.append(queue.get_nowait())
+        queue.task_done()
+    return records
+
+
+def test_drop_newest():
+    queue = RecordQueue(max_records=2, policy=OverflowPolicy.DROP_NEWEST)
+    assert queue.put(make_record(logging.INFO, "1"))
+    assert queue.put(make_record(logging.INFO, "2"))
+    assert not queue.put(make_record(logging.INFO, "3"))
+    assert [r.msg for r in drain(queue)] == ["1", "2"]
+    assert queue.take_dropped() == {"INFO": 1}
+    assert queue.take_dropped() == {}, "The dropped count should be reset."
+
+
+def test_drop_oldest():
+    queue = RecordQueue(max_records=2, policy=OverflowPolicy.DROP_OLDEST)
+    for msg in "123":
+        queue.put(make_record(logging.INFO, msg))
+    assert [r.msg for r in drain(queue)] == ["2", "3"]
+
+
+def test_drop_lowest_level():
+    queue = RecordQueue(max_records=2, policy=OverflowPolicy.DROP_LOWEST_LEVEL)
+    queue.put(make_record(logging.ERROR, "error"))
+    queue.put(make_record(logging.DEBUG, "debug"))
+    assert queue.put(make_record(logging.WARNING, "warning"))
+    assert not queue.put(make_record(logging.INFO, "info"))
+    assert [r.msg for r in drain(queue)] == ["error", "warning"]
+    assert queue.take_dropped() == {"DEBUG": 1, "INFO": 1}
+
+
+def test_byte_budget():
+    queue = RecordQueue(max_bytes=2000, policy=OverflowPolicy.DROP_OLDEST)
+    for i in range(10):
+        queue.put(make_record(logging.INFO, str(i) * 500))
+    assert queue.qsize() == 1, "Only one record fits in the byte budget."
+
+
+def test_block_times_out_and_forced_records_are_kept():
+    queue = RecordQueue(max_records=1, policy=OverflowPolicy.BLOCK, block_timeout=0.01)
+    assert queue.put(make_record(logging.INFO))
+    assert not queue.put(make_record(logging.INFO))
+    assert queue.put(make_record(logging.INFO), force=True)
+    assert queue.qsize() == 2
+    assert not queue.join(timeout=0.01)
+    drain(queue)
+    assert queue.join(timeout=0.01)
+
+
+def test_waiting_threads_are_woken():
+    queue = RecordQueue(max_records=1, policy=OverflowPolicy.BLOCK)
+    received = []
+    getter = threading.Thread(target=lambda: received.append(queue.get(timeout=5)))
+    getter.start()
+    time.sleep(0.05)
+    queue.put(make_record(logging.INFO, "1"))
+    getter.join(timeout=5)
+    assert [r.msg for r in received] == ["1"], "The waiting getter wasn't woken."
+    queue.put(make_record(logging.INFO, "2"))
+    putter = threading.Thread(target=lambda: queue.put(make_record(logging.INFO)))
+    putter.start()
+    time.sleep(0.05)
+    assert queue.get_nowait().msg == "2"
+    putter.join(timeout=5)
+    assert not putter.is_alive(), "The waiting putter wasn't woken."
+    assert queue.enqueued_total == 3
+
+
+def test_priority_lanes():
+    queue = RecordQueue(priority_levels=(logging.WARNING, logging.ERROR))
+    for level, msg in (
+        (logging.INFO, "info"),
+        (logging.WARNING, "warning"),
+        (logging.DEBUG, "debug"),
+        (logging.CRITICAL, "critical"),
+        (logging.ERROR, "error"),
+    ):
+        queue.put(make_record(level, msg))
+    assert [r.msg for r in drain(queue)] == [
+        "critical",
+        "error",
+        "warning",
+        "info",
+        "debug",
+    ]
+
+
+def test_lower_lanes_are_not_starved():
+    queue = RecordQueue(priority_levels=(logging.ERROR,), starvation_limit=2)
+    queue.put(make_record(logging.INFO, "info"))
+    for i in range(5):
+        queue.put(make_record(logging.ERROR, str(i)))
+    assert [r.msg for r in drain(queue)] == ["0", "1", "info", "2", "3", "4"]
+
+
+def test_drop_oldest_across_lanes():
+    queue = RecordQueue(
+        max_records=2, policy=OverflowPolicy.DROP_OLDEST, priority_levels=(30,)
+    )
+    for level, msg in ((logging.ERROR, "1"), (logging.INFO, "2"), (logging.INFO, "3")):
+        queue.put(make_record(level, msg))
+    assert [r.msg for r in drain(queue)] == ["2", "3"]
+
+
+def test_dropped_records_are_skipped_after_gets():
+    queue = RecordQueue(max_records=3, policy=OverflowPolicy.DROP_LOWEST_LEVEL)
+    for level, msg in (
+        (logging.WARNING, "1"),
+        (logging.DEBUG, "2"),
+        (logging.WARNING, "3"),
+    ):
+        queue.put(make_record(level, msg))
+    assert queue.get_nowait().msg == "1"
+    queue.task_done()
+    queue.put(make_record(logging.INFO, "4"))
+    queue.put(make_record(logging.INFO, "5"))  # Drops "2".
+    queue.put(
+        make_record(logging.WARNING, "6")
+    )  # Drops "4", from the middle of the queue.
+    assert [r.msg for r in drain(queue)] == ["3", "5", "6"]
+    assert queue.take_dropped() == {"DEBUG": 1, "INFO": 1}
+    assert queue.join(timeout=0)
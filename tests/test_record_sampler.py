@@ -0,0 +1,81 @@
+import logging
+from discord_lumberjack.handlers import RecordSampler
+from discord_lumberjack.handlers.record_sampler import annotate
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_record(level: int, msg: str = "message") -> logging.LogRecord:
+    return logging.LogRecord("test", level, "file.py", 1, msg, None, None)
+
+
+def test_samples_low_levels_under_load():
+    clock = FakeClock()
+    depth = [0]
+    sampler = RecordSampler(5, lambda: depth[0], clock=clock)
+    for second in range(1, 4):
+        weights = {logging.INFO: [], logging.ERROR: []}
+        for level in (logging.INFO, logging.ERROR):
+            for _ in range(100):
+                weights[level].append(sampler.sample(make_record(level)))
+        sampler.drained(10)
+        depth[0] += 200 - 10
+        clock.now = second
+    sampler.sample(make_record(logging.DEBUG))
+    assert 0 < sampler.probabilities[logging.INFO] < 1
+    assert sampler.probabilities[logging.DEBUG] == 0.01
+    assert weights[logging.ERROR] == [1] * 100, "Errors should never be sampled."
+    kept = [w for w in weights[logging.INFO] if w]
+    assert 0 < len(kept) < 100
+    assert sampler.sampled_out_total > 0
+
+
+def test_relaxes_when_backlog_clears():
+    clock = FakeClock()
+    depth = [1000]
+    sampler = RecordSampler(1, lambda: depth[0], clock=clock)
+    for _ in range(10):
+        sampler.sample(make_record(logging.INFO))
+    clock.now = 1
+    sampler.drained(10)
+    sampler.sample(make_record(logging.INFO))
+    assert sampler.probabilities
+    depth[0] = 0
+    for second in range(2, 12):
+        clock.now = second
+        sampler.drained(10)
+        sampler.sample(make_record(logging.INFO))
+    assert not sampler.probabilities
+
+
+def test_burst_at_startup_waits_for_a_drain_rate():
+    clock = FakeClock()
+    depth = [0]
+    sampler = RecordSampler(5, lambda: depth[0], clock=clock)
+    for _ in range(500):
+        sampler.sample(make_record(logging.INFO))
+    depth[0] = 500
+    clock.now = 1
+    sampler.sample(make_record(logging.INFO))
+    assert not sampler.probabilities, "Nothing was sent yet to measure against."
+    for _ in range(100):
+        sampler.sample(make_record(logging.INFO))
+    sampler.drained(100)
+    depth[0] = 600
+    clock.now = 2
+    sampler.sample(make_record(logging.INFO))
+    assert sampler.probabilities[logging.INFO] > 0.5
+
+
+def test_annotate():
+    record = make_record(logging.INFO, "hello %s")
+    record.args = ("world",)
+    annotated = annotate(record, 4)
+    assert annotated.getMessage() == "hello world (1 of ~4 similar records shown)"
+    assert record.getMessage() == "hello world"
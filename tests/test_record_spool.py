@@ -0,0 +1,114 @@
+import logging
+import os
+import pytest
+from discord_lumberjack.handlers import DiscordWebhookHandler, RecordSpool
+from discord_lumberjack.testing import RecordingTransport
+
+
+def make_record(msg: str = "Record %d", i: int = 0) -> logging.LogRecord:
+    args = (i,) if "%" in msg else None
+    return logging.LogRecord("test", logging.INFO, "file.py", 1, msg, args, None)
+
+
+def consume(spool: RecordSpool, n: int):
+    messages = []
+    for _ in range(n):
+        messages.append(spool.get_nowait().getMessage())
+        spool.task_done()
+    return messages
+
+
+def test_records_are_replayed_until_acknowledged(tmp_path):
+    spool = RecordSpool(str(tmp_path))
+    for i in range(5):
+        spool.put(make_record(i=i))
+    assert consume(spool, 2) == ["Record 0", "Record 1"]
+    spool.get_nowait()  # Read but not acknowledged.
+    spool.close()
+    replayed = RecordSpool(str(tmp_path))
+    assert replayed.qsize() == 3
+    assert consume(replayed, 3) == ["Record 2", "Record 3", "Record 4"]
+    assert replayed.join(timeout=0)
+
+
+def test_torn_write_is_truncated(tmp_path):
+    spool = RecordSpool(str(tmp_path))
+    spool.put(make_record(i=1))
+    spool.close()
+    (segment,) = [name for name in os.listdir(tmp_path) if name.endswith(".spool")]
+    with open(tmp_path / segment, "ab") as file:
+        file.write(b"\x40\x00\x00\x00garbage")
+    recovered = RecordSpool(str(tmp_path))
+    assert consume(recovered, 1) == ["Record 1"]
+    assert recovered.qsize() == 0
+
+
+def test_segments_are_rotated_compacted_and_capped(tmp_path):
+    spool = RecordSpool(str(tmp_path), segment_bytes=1000, max_bytes=5000)
+    assert all(spool.put(make_record("x" * 200)) for _ in range(6))
+    assert not spool.put(make_record("x" * 2000)), "The spool should be full."
+    assert spool.take_dropped() == {"INFO": 1}
+    consume(spool, 6)
+    spool.compact()
+    segments = [name for name in os.listdir(tmp_path) if name.endswith(".spool")]
+    assert len(segments) == 1, "Acknowledged segments should be deleted."
+    assert spool.size < 2000
+
+
+def test_forced_records_keep_their_place(tmp_path):
+    spool = RecordSpool(str(tmp_path))
+    sentinel = make_record("sentinel")
+    spool.put(make_record(i=1))
+    spool.put(sentinel, force=True)
+    spool.put(make_record(i=2))
+    assert spool.get_nowait().getMessage() == "Record 1"
+    assert spool.get_nowait() is sentinel
+    assert spool.get_nowait().getMessage() == "Record 2"
+
+
+def open_files(directory: str):
+    fds = "/proc/self/fd"
+    paths = []
+    for fd in os.listdir(fds):
+        try:
+            paths.append(os.readlink(os.path.join(fds, fd)))
+        except OSError:
+            pass
+    return [path for path in paths if path.startswith(directory)]
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="Needs procfs.")
+def test_handler_releases_the_spool_files_when_closed(tmp_path):
+    transport = RecordingTransport()
+    handler = DiscordWebhookHandler(
+        "https://discord.test/webhooks/1/token",
+        spool_directory=str(tmp_path),
+        transport=transport,
+        flush_on_exit=False,
+    )
+    logger = logging.Logger("test_record_spool")
+    logger.addHandler(handler)
+    logger.info("hello")
+    handler.flush()
+    assert open_files(str(tmp_path))
+    handler.close()
+    assert open_files(str(tmp_path)) == []
+    assert len(transport.messages()) == 1
+
+
+def test_record_that_cant_be_spooled_doesnt_raise(tmp_path, capsys):
+    transport = RecordingTransport()
+    handler = DiscordWebhookHandler(
+        "https://discord.test/webhooks/1/token",
+        spool_directory=str(tmp_path),
+        transport=transport,
+        flush_on_exit=False,
+    )
+    logger = logging.Logger("test_record_spool")
+    logger.addHandler(handler)
+    logger.info("%d records", "not a number")
+    logger.info("kept")
+    handler.flush()
+    handler.close()
+    assert [m["content"] for m in transport.messages()] == ["```ansi\nkept```"]
+    assert "TypeError" in capsys.readouterr().err
@@ -0,0 +1,88 @@
+import logging
+import subprocess
+import sys
+import time
+import pytest
+from discord_lumberjack.handlers import DiscordWebhookHandler, RateLimiter
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+from discord_lumberjack.transports import Response
+
+exit_script = """
+import logging, sys
+from discord_lumberjack.handlers import DiscordWebhookHandler
+logger = logging.getLogger("test_shutdown")
+logger.addHandler(DiscordWebhookHandler(sys.argv[1], close_timeout=float(sys.argv[2])))
+logger.setLevel(logging.INFO)
+for i in range(int(sys.argv[3])):
+    logger.info("record %d", i)
+"""
+
+
+def run_until_exit(url: str, close_timeout: float, records: int) -> float:
+    started = time.monotonic()
+    subprocess.run(
+        [sys.executable, "-c", exit_script, url, str(close_timeout), str(records)],
+        check=True,
+        timeout=30,
+    )
+    return time.monotonic() - started
+
+
+@pytest.mark.timeout(60)
+def test_queued_records_are_sent_at_exit():
+    with FakeDiscord(rate_limit=1000) as discord:
+        run_until_exit(discord.webhook_url(), 10, 3)
+        assert len(discord.messages()) == 3
+
+
+@pytest.mark.timeout(60)
+def test_exit_is_bounded_by_close_timeout():
+    with FakeDiscord(latency=0.2, rate_limit=1000) as discord:
+        elapsed = run_until_exit(discord.webhook_url(), 0.5, 100)
+        assert elapsed < 10
+        assert 0 < len(discord.messages()) < 100
+
+
+@pytest.mark.timeout(30)
+def test_flush_timeout_and_close_deadline():
+    with FakeDiscord(latency=0.2, rate_limit=1000) as discord:
+        handler = DiscordWebhookHandler(
+            discord.webhook_url(), flush_on_exit=False, rate_limiter=RateLimiter()
+        )
+        logger = logging.Logger("test_shutdown")
+        logger.addHandler(handler)
+        logger.error("error")
+        for i in range(20):
+            logger.info("info %d", i)
+        logger.critical("critical")
+        assert not handler.flush(timeout=0.1)
+        handler.close(deadline=0.5)
+        assert handler.flush()
+        time.sleep(0.5)  # A record may still have been in flight.
+        contents = [m["content"] for m in discord.messages()]
+        assert "```ansi\ncritical```" in contents[:3], "Alerts should be sent first."
+        stats = handler.stats()
+        assert stats["records_abandoned"] + stats["records_sent"] == 22
+        assert stats["records_abandoned"] > 0
+        logger.info("after close")
+        assert handler.stats()["queue_depth"] == 0
+
+
+@pytest.mark.timeout(30)
+def test_batch_that_waits_after_close_is_abandoned():
+    transport = RecordingTransport(
+        latency=0.5, respond=lambda _: Response(429, {"Retry-After": "1"}, b"{}")
+    )
+    handler = DiscordWebhookHandler(
+        "https://discord.invalid/api/webhooks/1/token",
+        flush_on_exit=False,
+        rate_limiter=RateLimiter(),
+        transport=transport,
+    )
+    logger = logging.Logger("test_shutdown")
+    logger.addHandler(handler)
+    logger.info("rate limited")
+    time.sleep(0.1)  # Let the request start.
+    handler.close(deadline=0.1)
+    time.sleep(1)  # Let the request end while the handler is closed.
+    assert handler.stats()["records_abandoned"] == 1
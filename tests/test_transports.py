@@ -0,0 +1,127 @@
+import json
+import logging
+import socket
+import pytest
+from discord_lumberjack.handlers import (
+    DiscordDMHandler,
+    DiscordWebhookHandler,
+    RateLimiter,
+    discord_handler,
+)
+from discord_lumberjack.message_creators import AttachmentMessageCreator
+from discord_lumberjack.testing import FakeDiscord, RecordingTransport
+from discord_lumberjack.transports import (
+    HTTPClientTransport,
+    RequestsTransport,
+    Response,
+    TransportError,
+)
+
+
+def log(handler, *messages: str) -> None:
+    logger = logging.Logger("test_transports")
+    logger.addHandler(handler)
+    for message in messages:
+        logger.info(message)
+    handler.flush()
+    handler.close()
+
+
+def unused_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api/webhooks/1/token"
+
+
+@pytest.mark.timeout(30)
+def test_http_client_transport():
+    transport = HTTPClientTransport()
+    with FakeDiscord() as discord:
+        log(
+            DiscordWebhookHandler(
+                discord.webhook_url(),
+                message_creator=AttachmentMessageCreator(threshold=50),
+                transport=transport,
+                flush_on_exit=False,
+            ),
+            "one",
+            "two",
+            "long\n" + "x" * 100,
+        )
+        transport.close()
+        messages = discord.messages()
+        assert [m["content"] for m in messages[:2]] == [
+            "```ansi\none```",
+            "```ansi\ntwo```",
+        ]
+        assert (
+            discord.requests[2].files()["record.log"] == ("long\n" + "x" * 100).encode()
+        )
+
+
+@pytest.mark.parametrize("transport", [HTTPClientTransport(), RequestsTransport()])
+def test_connection_errors_raise_transport_error(transport):
+    with pytest.raises(TransportError):
+        transport.post(unused_url(), b"{}", {"Content-Type": "application/json"}, 5)
+
+
+@pytest.mark.timeout(30)
+def test_recording_transport():
+    transport = RecordingTransport()
+    log(
+        DiscordDMHandler(
+            "secret", 5678, api_url="https://discord.invalid/api", transport=transport
+        ),
+        "hello",
+    )
+    assert [r.path for r in transport.requests] == [
+        "/api/users/@me/channels",
+        "/api/channels/5678/messages",
+    ]
+    assert transport.requests[1].headers["Authorization"] == "Bot secret"
+    assert [m["content"] for m in transport.messages()] == ["```ansi\nhello```"]
+
+
+@pytest.mark.timeout(30)
+def test_payload_is_encoded_once_across_retries(monkeypatch):
+    encoded = []
+    encode_json = discord_handler._encode_json
+    monkeypatch.setattr(
+        discord_handler,
+        "_encode_json",
+        lambda value: encoded.append(value) or encode_json(value),
+    )
+    statuses = iter([429, 503, 204])
+
+    def respond(request):
+        status = next(statuses)
+        headers = {"Retry-After": "0.01"} if status == 429 else {}
+        return Response(status, headers, b"")
+
+    transport = RecordingTransport(respond=respond)
+    log(
+        DiscordWebhookHandler(
+            "https://discord.invalid/api/webhooks/1/token",
+            username="bot",
+            transport=transport,
+            rate_limiter=RateLimiter(),
+            flush_on_exit=False,
+        ),
+        "hello",
+    )
+    assert len(encoded) == 1
+    assert len(transport.requests) == 3
+    assert len({request.body for request in transport.requests}) == 1
+    assert transport.requests[0].json() == {
+        "content": "```ansi\nhello```",
+        "username": "bot",
+    }
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_encode_json(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(discord_handler, "orjson", None)
+    message = {"content": 'héllo "world"', "embeds": [{"color": 1, "fields": []}]}
+    assert json.loads(discord_handler._encode_json(message)) == message